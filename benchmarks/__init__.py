@@ -0,0 +1,12 @@
+# Benchmarks module
+# File trạng thái của bot (journal outbox, snapshot tháng, ID đã cấp) → thư mục tạm, không đụng data/ thật
+
+import os
+import tempfile
+
+import config
+
+_data = tempfile.mkdtemp(prefix='cashflow-bench-')
+config.OUTBOX_PATH = os.path.join(_data, 'outbox.jsonl')
+config.SNAPSHOT_PATH = os.path.join(_data, 'snapshots.json')
+config.ID_SEQUENCE_PATH = os.path.join(_data, 'ids.json')
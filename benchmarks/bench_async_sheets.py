@@ -0,0 +1,55 @@
+"""
+Benchmark: N update đồng thời qua sheets_async vs gọi sheets trực tiếp
+
+Giả lập 1 lần gọi Google Sheets bằng time.sleep(LATENCY) để không cần
+tài khoản Google. Kết quả mong đợi:
+- sync: ~N × LATENCY (event loop bị chặn, các update xếp hàng)
+- async: ~LATENCY (chạy song song trên worker pool)
+
+Chạy: python -m benchmarks.bench_async_sheets [N] [LATENCY]
+"""
+
+import sys
+import time
+import asyncio
+
+import config
+from services import sheets, sheets_async
+
+
+def fake_month_summary(month: int = None, year: int = None):
+    """Giả lập 1 round trip Sheets"""
+    time.sleep(LATENCY)
+    return {'month': month, 'year': year, 'sale_count': 0}
+
+
+async def handler_sync():
+    """Handler kiểu cũ: gọi thẳng hàm blocking"""
+    return sheets.get_month_sales_summary()
+
+
+async def handler_async():
+    """Handler kiểu mới: await qua worker pool"""
+    return await sheets_async.get_month_sales_summary()
+
+
+async def run(handler, n: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(n)))
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else config.SHEETS_MAX_WORKERS
+    LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+
+    sheets.get_month_sales_summary = fake_month_summary
+
+    sync_time = asyncio.run(run(handler_sync, N))
+    async_time = asyncio.run(run(handler_async, N))
+    sheets_async.shutdown()
+
+    print(f"{N} update đồng thời, mỗi lần gọi Sheets {LATENCY * 1000:.0f}ms "
+          f"(workers={config.SHEETS_MAX_WORKERS})")
+    print(f"  sync  : {sync_time:.2f}s ({sync_time / LATENCY:.1f}× 1 lần gọi)")
+    print(f"  async : {async_time:.2f}s ({async_time / LATENCY:.1f}× 1 lần gọi)")
@@ -0,0 +1,94 @@
+"""
+Benchmark: các lệnh đọc chính của bot trên Sheets giả (services/fake_sheets.py)
+
+Không cần mạng/tài khoản Google: SHEETS_CLIENT=fake, mỗi request chậm LATENCY giây,
+tỉ lệ QUOTA_ERROR_RATE request trả về 429 (rate limiter chờ rồi thử lại).
+N update đồng thời qua sheets_async, in thời gian và số request theo thao tác
+(lấy từ services/metrics.py) → so sánh số round trip trước/sau khi tối ưu.
+
+Chạy: python -m benchmarks.bench_fake_sheets [SỐ_DÒNG] [N] [LATENCY] [QUOTA_ERROR_RATE]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import tempfile
+from datetime import datetime, timedelta
+
+import config
+
+config.SHEETS_CLIENT = 'fake'
+
+from services import metrics, sheets, sheets_async
+
+
+def make_data(size: int):
+    """Products + size dòng Sales/Expenses (60 ngày gần nhất) + size/10 dòng Debts"""
+    today = datetime.now(config.VN_TIMEZONE).date()
+    skus = [f'SP{i:03d}' for i in range(1, 301)]
+    products = [sheets.PRODUCTS_HEADERS] + [[sku, f'Sản phẩm {sku}', 100_000] for sku in skus]
+    sales, expenses, debts = [sheets.SALES_HEADERS], [sheets.EXPENSES_HEADERS], [sheets.DEBTS_HEADERS]
+    for i in range(size):
+        day = today - timedelta(days=60 - i * 60 // size)
+        qty = random.randint(1, 5)
+        price = qty * 250_000
+        sales.append([
+            day.strftime('%d/%m/%Y'), random.choice(skus), qty, price, qty * 100_000,
+            price - qty * 100_000, '', '', i + 1, '', day.isoformat(),
+        ])
+        expenses.append([day.strftime('%d/%m/%Y'), 50_000, 'chi', 'Living', i + 1, '', day.isoformat()])
+    for i in range(size // 10):
+        day = today - timedelta(days=i % 60)
+        debts.append([
+            day.strftime('%d/%m/%Y'), f'Khách {i % 50}', 10_000, '', 'pending', '', '', i + 1, '', day.isoformat(),
+        ])
+    return {
+        config.SHEET_PRODUCTS: products, config.SHEET_SALES: sales,
+        config.SHEET_EXPENSES: expenses, config.SHEET_DEBTS: debts,
+    }
+
+
+async def one_update():
+    """1 lượt dùng bot: tổng quan hôm nay/tháng, nợ, bán gần đây, tìm sản phẩm"""
+    await sheets_async.get_today_overview()
+    await sheets_async.get_month_overview()
+    await sheets_async.get_debt_summary()
+    await sheets_async.get_recent_sales(10)
+    await sheets_async.search_products('SP01')
+
+
+async def run(n: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(one_update() for _ in range(n)))
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    N = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    config.FAKE_SHEETS_LATENCY = float(sys.argv[3]) if len(sys.argv) > 3 else 0.2
+    config.FAKE_SHEETS_QUOTA_ERROR_RATE = float(sys.argv[4]) if len(sys.argv) > 4 else 0.0
+
+    random.seed(1)
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+        json.dump(make_data(SIZE), f, ensure_ascii=False)
+    config.FAKE_SHEETS_DATA = f.name
+
+    cold = asyncio.run(run(N))
+    warm = asyncio.run(run(N))
+    sheets_async.shutdown()
+    os.remove(f.name)
+
+    stats = sheets.get_cache_stats()
+    print(f"{SIZE} dòng, {N} update đồng thời, mỗi request {config.FAKE_SHEETS_LATENCY * 1000:.0f}ms, "
+          f"429: {config.FAKE_SHEETS_QUOTA_ERROR_RATE:.0%} (cache TTL={config.SHEETS_CACHE_TTL}s)")
+    print(f"  lượt 1 (cache trống): {cold:.2f}s")
+    print(f"  lượt 2              : {warm:.2f}s")
+    print(f"  request: {stats['fake_sheets']['requests']}, 429: {stats['fake_sheets']['quota_errors']}, "
+          f"thử lại: {stats.get('rate_limit', {}).get('retries', 0)}")
+    for row in metrics.query(api='sheets'):
+        print(f"  {row['operation']:<20} {row['service']:<28} {row['count']:>4} lần  "
+              f"avg {row['avg_ms']:>7.1f}ms  {row['bytes'] / 1024:>8.1f} KB")
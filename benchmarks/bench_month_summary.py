@@ -0,0 +1,115 @@
+"""
+Benchmark: Sales đang cache dạng ColumnStore (cột có kiểu) so với list object Sale / list dict
+
+So sánh bộ nhớ records đang cache (ColumnStore là bản duy nhất: object Sale chỉ tạo khi đọc
+tới dòng đó), thời gian báo cáo tháng (tổng theo ngày/SKU giữ sẵn so với duyệt từng dòng,
+parse Date, cộng theo ngày/SKU như cách cũ) và cái giá phải trả: duyệt cả sheet phải tạo lại
+object từng dòng. Không gọi Google Sheets.
+NumPy có cài → group-by lúc build tổng chạy bằng NumPy, không thì array thuần.
+
+Chạy: python -m benchmarks.bench_month_summary [SỐ_DÒNG]
+"""
+
+import sys
+import time
+import random
+import tracemalloc
+from datetime import date, timedelta
+
+from services import columns
+from services.columns import ColumnStore
+from services.models import Sale
+
+TOTALS = {'revenue': 'price', 'profit': 'profit', 'quantity': 'quantity'}
+NUMBER_FIELDS = ['quantity', 'price', 'cost', 'profit', 'id']
+
+
+def scan_month(records, year, month):
+    """Cách cũ: duyệt toàn bộ records, parse Date từng dòng"""
+    days, groups = {}, {}
+    for r in records:
+        try:
+            d, m, y = (int(p) for p in str(r.get('date', '')).split('/'))
+        except ValueError:
+            continue
+        if (y, m) != (year, month):
+            continue
+        for buckets, key in ((days, d), (groups, r.get('sku', ''))):
+            bucket = buckets.setdefault(key, dict.fromkeys(['count', *TOTALS], 0))
+            bucket['count'] += 1
+            for name, field in TOTALS.items():
+                bucket[name] += r.get(field, 0) or 0
+    return {'days': days, 'groups': groups}
+
+
+def make_rows(size: int):
+    """Các dòng như get_all_values đã ép kiểu (dict theo field)"""
+    start = date(2025, 1, 1)
+    rows = []
+    for i in range(size):
+        day = start + timedelta(days=i * 730 // size)
+        qty = random.randint(1, 5)
+        price = qty * random.choice([50_000, 120_000, 250_000])
+        rows.append({
+            'id': i + 1, 'date': day.strftime('%d/%m/%Y'), 'sku': f'SP{random.randint(1, 300):03d}',
+            'quantity': qty, 'price': price, 'cost': price // 2, 'profit': price - price // 2,
+            'customer': random.choice(['', 'An', 'Bình', 'Chi']), 'note': '',
+        })
+    return rows
+
+
+def measured(build):
+    """(kết quả, số byte cấp phát còn giữ lại)"""
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def timed(func, repeat: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def fresh(row):
+    """Bản sao dòng với chuỗi mới (không dùng chung chuỗi giữa các dòng)"""
+    return {k: (v + '.')[:-1] if isinstance(v, str) else v for k, v in row.items()}
+
+
+def build_store(rows):
+    store = ColumnStore(Sale, NUMBER_FIELDS, 'sku', TOTALS, interned=('customer',))
+    store.extend(Sale(**row) for row in rows)
+    return store
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    random.seed(1)
+    rows = make_rows(size)
+
+    # Mỗi ô là chuỗi riêng (như ColumnMap đọc từ get_all_values) → đo từ bản sao mới
+    dicts, dict_bytes = measured(lambda: [fresh(row) for row in rows])
+    objects, object_bytes = measured(lambda: [Sale(**fresh(row)) for row in rows])
+    store, store_bytes = measured(lambda: build_store(fresh(row) for row in rows))
+    start = time.perf_counter()
+    build_store(dicts)
+    print(f"Sales {size} dòng - build ColumnStore + tổng: {time.perf_counter() - start:.2f}s "
+          f"({'NumPy' if columns.np is not None else 'array thuần'})")
+    print(f"  Bộ nhớ records đang cache: list dict {dict_bytes / 1e6:.1f}MB | "
+          f"list Sale {object_bytes / 1e6:.1f}MB | "
+          f"ColumnStore {store_bytes / 1e6:.1f}MB (nbytes() {store.nbytes() / 1e6:.1f}MB)")
+
+    for year, month in [(2025, 3), (2026, 6), (2026, 12)]:
+        assert store.month(year, month) == scan_month(objects, year, month)
+        fast = timed(lambda: store.month(year, month))
+        slow = timed(lambda: scan_month(objects, year, month), repeat=5)
+        print(f"  {month:02d}/{year}: ColumnStore {fast:7.2f}ms | duyệt list Sale {slow:7.2f}ms "
+              f"(x{slow / fast:.0f})")
+
+    iterate_store = timed(lambda: sum(1 for _ in store), repeat=3)
+    iterate_list = timed(lambda: sum(1 for _ in objects), repeat=3)
+    print(f"  Duyệt cả sheet: ColumnStore {iterate_store:7.1f}ms | list Sale {iterate_list:7.1f}ms "
+          f"(tạo object từng dòng)")
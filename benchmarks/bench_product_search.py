@@ -0,0 +1,58 @@
+"""
+Benchmark: tìm sản phẩm theo tên trên catalog lớn (NameIndex)
+
+So sánh với cách dò tuyến tính cũ của find_product_by_name (lower() + substring
+trên toàn bộ catalog). Không gọi Google Sheets.
+
+Chạy: python -m benchmarks.bench_product_search [SỐ_SP]
+"""
+
+import sys
+import time
+import random
+
+from services.indexes import NameIndex
+
+BASE_NAMES = ['Áo thun', 'Quần jean', 'Mũ lưỡi trai', 'Giày thể thao', 'Đồng hồ',
+              'Túi xách', 'Kính mát', 'Váy đầm', 'Áo khoác', 'Dép tổ ong']
+COLORS = ['đen', 'trắng', 'xanh', 'đỏ', 'vàng']
+QUERIES = ['ao thun', 'Đồng hồ đen', 'giay', 'mẫu 1234', 'khoac xanh', 'hun', 'xyz']
+
+
+def linear_search(products, name):
+    """find_product_by_name cũ: exact rồi substring, trả về kết quả đầu tiên"""
+    for p in products:
+        if p['name'].lower() == name.lower():
+            return p
+    for p in products:
+        if name.lower() in p['name'].lower():
+            return p
+    return None
+
+
+def timed(func, repeat: int = 200) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    random.seed(1)
+    records = [
+        {'SKU': f'SP{i:05d}',
+         'Name': f'{random.choice(BASE_NAMES)} {random.choice(COLORS)} mẫu {i}'}
+        for i in range(size)
+    ]
+    products = [{'sku': r['SKU'], 'name': r['Name']} for r in records]
+
+    index = NameIndex()
+    start = time.perf_counter()
+    index.sync(records, lambda row, r: {'sku': r['SKU'], 'name': r['Name']})
+    print(f"Catalog {size} SP - build index: {time.perf_counter() - start:.2f}s")
+
+    for q in QUERIES:
+        indexed = timed(lambda: index.search(q, limit=10))
+        linear = timed(lambda: linear_search(products, q), repeat=5)
+        print(f"  {q!r:15} index top-10: {indexed:7.3f}ms | dò tuyến tính: {linear:7.2f}ms")
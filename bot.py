@@ -4,7 +4,9 @@ Main entry point
 """
 
 import os
+import asyncio
 import logging
+import signal
 import threading
 from telegram import Update
 from telegram.ext import (
@@ -209,6 +211,44 @@ async def unknown_command(update: Update, context):
     )
 
 
+async def on_shutdown(application: Application):
+    """Dọn dẹp khi bot dừng: đóng worker pool của Sheets và backend lưu trữ"""
+    from services import metrics, sheets_async, storage
+    sheets_async.shutdown()
+    storage.shutdown()
+    if config.METRICS_ENABLED:
+        logger.info(f"📈 Metrics: {metrics.dump()}")
+
+
+def dump_metrics():
+    """kill -USR1 <pid> → ghi metrics request Sheets/PayOS ra METRICS_PATH (bot vẫn chạy)"""
+    from services import metrics
+    logger.info(f"📈 Metrics: {metrics.dump()}")
+
+
+async def on_startup(application: Application):
+    """
+    Đăng ký SIGUSR1 qua event loop: dump_metrics chạy như 1 callback bình thường của loop,
+    không chen vào giữa lúc main thread đang giữ lock của metrics (signal.signal → deadlock).
+    Backend Sheets: chạy migration cột Day 1 lần (các hàm đọc không ghi lên sheet).
+    """
+    if config.METRICS_ENABLED and hasattr(signal, 'SIGUSR1'):
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, dump_metrics)
+        except NotImplementedError:
+            logger.warning("Không đăng ký được SIGUSR1 cho metrics trên nền tảng này")
+
+    if config.STORAGE_BACKEND == 'sheets':
+        from services import sheets, sheets_async
+        try:
+            written = await sheets_async.run_blocking(sheets.backfill_days)
+            if any(written.values()):
+                logger.info(f"📅 Đã ghi bù cột Day: {written}")
+        except Exception as e:
+            # Không chặn bot khởi động: đọc vẫn đúng (Day thiếu → tính từ Date)
+            logger.warning(f"Không ghi bù được cột Day: {e}")
+
+
 def main():
     """Khởi chạy bot"""
     # Kiểm tra config
@@ -216,12 +256,18 @@ def main():
         logger.error("❌ BOT_TOKEN không được tìm thấy trong file .env")
         return
     
-    if not config.SHEET_ID:
+    if not config.SHEET_ID and config.SHEETS_CLIENT != 'fake':
         logger.error("❌ SHEET_ID không được tìm thấy trong file .env")
         return
     
     # Tạo application
-    application = Application.builder().token(config.BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(config.BOT_TOKEN)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
     
     # ==================== PRODUCT CONVERSATIONS ====================
     
@@ -514,7 +560,7 @@ def main():
     
     # Chạy bot
     logger.info("🚀 CashFlow Bot đang khởi động...")
-    logger.info(f"📊 Sheet ID: {config.SHEET_ID[:20]}...")
+    logger.info(f"📊 Sheet ID: {(config.SHEET_ID or config.SHEETS_CLIENT)[:20]}...")
     
     # Lấy URL webhook từ env (Render tự set RENDER_EXTERNAL_URL)
     webhook_url = os.getenv('RENDER_EXTERNAL_URL', '')
@@ -15,12 +15,78 @@ BOT_TOKEN = os.getenv("BOT_TOKEN")
 SHEET_ID = os.getenv("SHEET_ID")
 CREDENTIALS_FILE = os.path.join(os.path.dirname(__file__), "credentials.json")
 
+# Client Sheets: "google" (API thật) hoặc "fake" (bảng trong bộ nhớ cho benchmark/test, không cần mạng).
+# Fake: dữ liệu ban đầu từ FAKE_SHEETS_DATA (JSON {tên tab: [[dòng], ...]}, trống = chỉ có header),
+# mỗi request chậm FAKE_SHEETS_LATENCY giây, tỉ lệ FAKE_SHEETS_QUOTA_ERROR_RATE request trả về 429
+SHEETS_CLIENT = os.getenv("SHEETS_CLIENT", "google").strip().lower()
+FAKE_SHEETS_DATA = os.getenv("FAKE_SHEETS_DATA", "")
+FAKE_SHEETS_LATENCY = float(os.getenv("FAKE_SHEETS_LATENCY", "0"))
+FAKE_SHEETS_QUOTA_ERROR_RATE = float(os.getenv("FAKE_SHEETS_QUOTA_ERROR_RATE", "0"))
+
 # Sheet names
 SHEET_PRODUCTS = os.getenv("SHEET_PRODUCTS", "Products")
 SHEET_SALES = os.getenv("SHEET_SALES", "Sales")
 SHEET_EXPENSES = os.getenv("SHEET_EXPENSES", "Expenses")
 SHEET_DEBTS = os.getenv("SHEET_DEBTS", "Debts")
 
+# Nơi lưu dữ liệu: "sheets" (Google Sheets), "sqlite" (file local)
+# hoặc "replica" (ghi vào Sheets, đọc từ bản sao SQLite đồng bộ nền)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sheets").strip().lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(os.path.dirname(__file__), "data", "shop.db"))
+REPLICA_PATH = os.getenv("REPLICA_PATH", os.path.join(os.path.dirname(__file__), "data", "replica.db"))
+
+# Chu kỳ đồng bộ bản sao từ Google Sheets (giây). 0 = chỉ đồng bộ khi khởi động và sau mỗi lần ghi
+REPLICA_SYNC_INTERVAL = int(os.getenv("REPLICA_SYNC_INTERVAL", "60"))
+
+# Cache records trong bộ nhớ (giây). 0 = tắt cache
+SHEETS_CACHE_TTL = int(os.getenv("SHEETS_CACHE_TTL", "300"))
+
+# Cache tắt: hàm duyệt cả sheet (nợ theo khách, tổng nợ...) đọc từng trang SCAN_CHUNK_ROWS dòng
+# thay vì tải cả sheet vào bộ nhớ
+SCAN_CHUNK_ROWS = int(os.getenv("SCAN_CHUNK_ROWS", "500"))
+
+# Số trang SCAN_CHUNK_ROWS dòng đọc chung 1 request values_batch_get khi duyệt cả sheet
+SCAN_BATCH_PAGES = int(os.getenv("SCAN_BATCH_PAGES", "10"))
+
+# Giới hạn request Google Sheets API mỗi phút (quota mặc định: 60 đọc + 60 ghi/phút/user).
+# Request của người dùng được ưu tiên hơn việc nền; 429 → chờ rồi thử lại tối đa SHEETS_MAX_RETRIES lần.
+# 0 = tắt giới hạn
+SHEETS_READS_PER_MINUTE = int(os.getenv("SHEETS_READS_PER_MINUTE", "60"))
+SHEETS_WRITES_PER_MINUTE = int(os.getenv("SHEETS_WRITES_PER_MINUTE", "60"))
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+
+# Đo từng request Sheets/PayOS (số lần, độ trễ, bytes) theo hàm service + handler Telegram.
+# Ghi ra METRICS_PATH khi bot dừng hoặc khi nhận SIGUSR1 (kill -USR1 <pid>)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+METRICS_PATH = os.getenv("METRICS_PATH", os.path.join(os.path.dirname(__file__), "data", "metrics.json"))
+
+# Outbox: add_sale/add_expense/add_debt ghi vào journal trên đĩa và trả lời ngay,
+# thread nền gửi lên Sheets bằng append_rows (gom các dòng trong OUTBOX_BATCH_DELAY giây).
+# Tắt mặc định: chỉ bật khi OUTBOX_PATH nằm trên ổ đĩa bền (đĩa của Render mất khi deploy/restart
+# → dòng chưa gửi mất theo). Dòng bị Sheets từ chối hẳn → file .failed.jsonl cạnh journal
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "false").strip().lower() in ("1", "true", "yes")
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", os.path.join(os.path.dirname(__file__), "data", "outbox.jsonl"))
+OUTBOX_BATCH_DELAY = float(os.getenv("OUTBOX_BATCH_DELAY", "1.0"))
+
+# Xóa mềm: xóa bán/chi/nợ chỉ ghi thời điểm xóa vào cột Deleted (không delete_rows),
+# thread nền xóa hẳn các dòng này mỗi ngày lúc COMPACTION_HOUR giờ (giờ VN, lúc ít dùng)
+SOFT_DELETE = os.getenv("SOFT_DELETE", "false").strip().lower() in ("1", "true", "yes")
+COMPACTION_HOUR = int(os.getenv("COMPACTION_HOUR", "3"))
+
+# Snapshot báo cáo các tháng đã kết thúc (file JSON), báo cáo tháng cũ không tính lại từ từng dòng
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", os.path.join(os.path.dirname(__file__), "data", "snapshots.json"))
+# Snapshot hết hạn sau SNAPSHOT_TTL giây (bắt được sửa tay giá trị trong dòng tháng cũ), 0 = không hết hạn.
+# Thêm/xóa dòng bằng tay được phát hiện ngay qua số dòng của tháng (cột Day)
+SNAPSHOT_TTL = int(os.getenv("SNAPSHOT_TTL", "604800"))
+
+# ID cuối cùng đã cấp của Sales/Expenses/Debts (thêm dòng không cần tải cả sheet để tìm ID lớn nhất).
+# Mất file (đĩa tạm) → lần thêm đầu tiên đọc lại cột ID trên sheet
+ID_SEQUENCE_PATH = os.getenv("ID_SEQUENCE_PATH", os.path.join(os.path.dirname(__file__), "data", "ids.json"))
+
+# Số thread tối đa gọi Google Sheets song song (services/sheets_async.py)
+SHEETS_MAX_WORKERS = int(os.getenv("SHEETS_MAX_WORKERS", "8"))
+
 # Bảo mật: Chỉ cho phép user ID này sử dụng bot
 # Để lấy ID: chat với @userinfobot trên Telegram
 import sys
@@ -285,13 +285,13 @@ Xem báo cáo thu chi và lợi nhuận:
     
     # Xem chi tiêu hôm nay
     elif data == "chitieu_today":
-        from services import sheets
+        from services import sheets_async
         from utils.formatting import format_currency, get_category_emoji
         
         try:
-            expenses = sheets.get_today_expenses()
-            summary = sheets.get_today_expense_summary()
-            date = sheets.get_local_date()
+            expenses = await sheets_async.get_today_expenses()
+            summary = await sheets_async.get_today_expense_summary()
+            date = sheets_async.get_local_date()
             
             if not expenses:
                 text = f"💸 *CHI TIÊU - {date}*\n\n📭 Chưa có chi tiêu nào hôm nay."
@@ -299,7 +299,7 @@ Xem báo cáo thu chi và lợi nhuận:
                 text = f"💸 *CHI TIÊU - {date}*\n\n"
                 for e in expenses:
                     emoji = get_category_emoji(e['category'])
-                    text += f"{emoji} *Row {e['row']}*: {format_currency(e['amount'])}\n"
+                    text += f"{emoji} *ID {e['id']}*: {format_currency(e['amount'])}\n"
                     text += f"   📝 {e['description']}\n\n"
                 
                 text += f"━━━━━━━━━━━━━━━━━\n"
@@ -311,11 +311,11 @@ Xem báo cáo thu chi và lợi nhuận:
     
     # Thống kê chi tiêu tháng
     elif data == "expense_month":
-        from services import sheets
+        from services import sheets_async
         from utils.formatting import format_currency, get_month_name, get_category_emoji
         
         try:
-            summary = sheets.get_month_expense_summary()
+            summary = await sheets_async.get_month_expense_summary()
             month_name = get_month_name(summary['month'])
             
             text = f"📊 CHI TIÊU {month_name.upper()}/{summary['year']}\n\n"
@@ -359,12 +359,12 @@ Xem báo cáo thu chi và lợi nhuận:
     
     # Xem chi tiết chi tiêu theo ngày
     elif data.startswith("expense_day_"):
-        from services import sheets
+        from services import sheets_async
         from utils.formatting import format_currency, get_category_emoji, get_month_name
         
         try:
             day = int(data.replace("expense_day_", ""))
-            expenses = sheets.get_expenses_by_date(day)
+            expenses = await sheets_async.get_expenses_by_date(day)
             
             from datetime import datetime
             import config
@@ -394,11 +394,11 @@ Xem báo cáo thu chi và lợi nhuận:
     
     # Xem danh sách sản phẩm
     elif data == "sanpham_list":
-        from services import sheets
+        from services import sheets_async
         from utils.formatting import format_currency
         
         try:
-            products = sheets.get_all_products()
+            products = await sheets_async.get_all_products()
             
             if not products:
                 text = "📦 *DANH SÁCH SẢN PHẨM*\n\n📭 Chưa có sản phẩm nào."
@@ -414,11 +414,11 @@ Xem báo cáo thu chi và lợi nhuận:
     
     # Lịch sử bán hàng
     elif data == "sales_history":
-        from services import sheets
+        from services import sheets_async
         from utils.formatting import format_currency
         
         try:
-            sales = sheets.get_recent_sales(limit=10)
+            sales = await sheets_async.get_recent_sales(limit=10)
             
             if not sales:
                 text = "🛒 *LỊCH SỬ BÁN HÀNG*\n\n📭 Chưa có giao dịch nào."
@@ -427,7 +427,7 @@ Xem báo cáo thu chi và lợi nhuận:
                 for s in sales:
                     profit = float(s['profit']) if s['profit'] else 0
                     profit_emoji = "📈" if profit >= 0 else "📉"
-                    text += f"🏷 *{s['sku']}* - Row {s['row']}\n"
+                    text += f"🏷 *{s['sku']}* - ID {s['id']}\n"
                     text += f"   📅 {s['date']} | Qty: {s['quantity']}\n"
                     text += f"   {profit_emoji} Profit: {format_currency(profit)}\n\n"
             
@@ -437,11 +437,11 @@ Xem báo cáo thu chi và lợi nhuận:
     
     # Lợi nhuận tháng
     elif data in ["sales_profit", "stats_profit"]:
-        from services import sheets
+        from services import sheets_async
         from utils.formatting import format_currency, get_month_name
         
         try:
-            summary = sheets.get_month_sales_summary()
+            summary = await sheets_async.get_month_sales_summary()
             month_name = get_month_name(summary['month'])
             
             text = f"💹 LỢI NHUẬN {month_name.upper()}/{summary['year']}\n\n"
@@ -482,12 +482,12 @@ Xem báo cáo thu chi và lợi nhuận:
     
     # Xem chi tiết bán hàng theo ngày
     elif data.startswith("sales_day_"):
-        from services import sheets
+        from services import sheets_async
         from utils.formatting import format_currency
         
         try:
             day = int(data.replace("sales_day_", ""))
-            sales = sheets.get_sales_by_date(day)
+            sales = await sheets_async.get_sales_by_date(day)
             
             from datetime import datetime
             import config
@@ -521,13 +521,14 @@ Xem báo cáo thu chi và lợi nhuận:
     
     # Thống kê hôm nay
     elif data == "stats_today":
-        from services import sheets
+        from services import sheets_async
         from utils.formatting import format_currency
         
         try:
-            date = sheets.get_local_date()
-            expense_summary = sheets.get_today_expense_summary()
-            sales_summary = sheets.get_today_sales_summary()
+            date = sheets_async.get_local_date()
+            overview = await sheets_async.get_today_overview()
+            expense_summary = overview['expenses']
+            sales_summary = overview['sales']
             
             balance = sales_summary['total_profit'] - expense_summary['total']
             balance_emoji = "📈" if balance >= 0 else "📉"
@@ -546,12 +547,13 @@ Xem báo cáo thu chi và lợi nhuận:
     
     # Thống kê tháng
     elif data == "stats_month":
-        from services import sheets
+        from services import sheets_async
         from utils.formatting import format_currency, get_month_name
         
         try:
-            expense_summary = sheets.get_month_expense_summary()
-            sales_summary = sheets.get_month_sales_summary()
+            overview = await sheets_async.get_month_overview()
+            expense_summary = overview['expenses']
+            sales_summary = overview['sales']
             month_name = get_month_name(expense_summary['month'])
             
             balance = sales_summary['total_profit'] - expense_summary['total']
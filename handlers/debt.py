@@ -5,7 +5,7 @@ Debt Management Handlers - Quản lý nợ khách hàng
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler, MessageHandler, CallbackQueryHandler, filters
 
-from services import sheets
+from services import sheets_async
 from utils.formatting import format_currency, parse_amount
 from utils.security import check_permission, UNAUTHORIZED_MESSAGE
 
@@ -76,7 +76,7 @@ async def ghino_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.answer()
         
         # Lấy danh sách khách đang nợ
-        customers = sheets.get_all_customers_with_debt()
+        customers = await sheets_async.get_all_customers_with_debt()
         
         text = "📝 GHI NỢ MỚI\n\n"
         
@@ -126,7 +126,7 @@ async def ghino_select_customer(update: Update, context: ContextTypes.DEFAULT_TY
     customer = query.data.replace("debt_addto_", "")
     context.user_data['debt_customer'] = customer
     
-    existing_debt = sheets.get_customer_total_debt(customer)
+    existing_debt = await sheets_async.get_customer_total_debt(customer)
     
     text = f"""📝 GHI NỢ MỚI
 
@@ -149,7 +149,7 @@ async def ghino_customer(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data['debt_customer'] = customer
     
     # Kiểm tra xem khách này có nợ cũ không
-    existing_debt = sheets.get_customer_total_debt(customer)
+    existing_debt = await sheets_async.get_customer_total_debt(customer)
     
     text = f"""📝 GHI NỢ MỚI
 
@@ -210,7 +210,7 @@ async def ghino_note(update: Update, context: ContextTypes.DEFAULT_TYPE):
     amount = context.user_data.get('debt_amount', 0)
     
     # Kiểm tra khách đã có Telegram ID chưa
-    existing_tid = sheets.get_customer_telegram_id(customer)
+    existing_tid = await sheets_async.get_customer_telegram_id(customer)
     if existing_tid:
         # Đã có → bỏ qua, hoàn thành luôn
         context.user_data['debt_telegram_id'] = existing_tid
@@ -245,7 +245,7 @@ async def ghino_skip_note(update: Update, context: ContextTypes.DEFAULT_TYPE):
     amount = context.user_data.get('debt_amount', 0)
     
     # Kiểm tra khách đã có Telegram ID chưa
-    existing_tid = sheets.get_customer_telegram_id(customer)
+    existing_tid = await sheets_async.get_customer_telegram_id(customer)
     if existing_tid:
         context.user_data['debt_telegram_id'] = existing_tid
         await complete_debt(query, context, '', is_callback=True)
@@ -294,10 +294,10 @@ async def complete_debt(update_or_query, context, note: str, is_callback: bool =
     telegram_id = context.user_data.get('debt_telegram_id', '')
     
     try:
-        result = sheets.add_debt(customer, amount, note, telegram_id=telegram_id)
+        result = await sheets_async.add_debt(customer, amount, note, telegram_id=telegram_id)
         
         # Lấy tổng nợ mới của khách
-        total_debt = sheets.get_customer_total_debt(customer)
+        total_debt = await sheets_async.get_customer_total_debt(customer)
         
         note_text = f"📝 Ghi chú: {note}\n" if note else ""
         
@@ -337,7 +337,7 @@ async def debt_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
     
     try:
-        debts = sheets.get_all_debts(status='pending')
+        debts = await sheets_async.get_all_debts(status='pending')
         
         if not debts:
             text = "📋 DANH SÁCH NỢ\n\n🎉 Không có ai nợ!"
@@ -347,7 +347,7 @@ async def debt_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
             
             for d in debts[-15:]:  # Hiển thị 15 khoản gần nhất
                 note_text = f" - {d['note']}" if d['note'] else ""
-                text += f"• Row {d['row']}: {d['customer']} - {format_currency(d['amount'])}{note_text}\n"
+                text += f"• ID {d['id']}: {d['customer']} - {format_currency(d['amount'])}{note_text}\n"
             
             if len(debts) > 15:
                 text += f"\n... và {len(debts) - 15} khoản khác"
@@ -370,7 +370,7 @@ async def debt_by_customer(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
     
     try:
-        customers = sheets.get_all_customers_with_debt()
+        customers = await sheets_async.get_all_customers_with_debt()
         
         if not customers:
             text = "👤 NỢ THEO KHÁCH\n\n🎉 Không có ai nợ!"
@@ -417,7 +417,7 @@ async def debt_customer_detail(update: Update, context: ContextTypes.DEFAULT_TYP
     customer = query.data.replace("debt_customer_", "")
     
     try:
-        debts = sheets.get_debts_by_customer(customer)
+        debts = await sheets_async.get_debts_by_customer(customer)
         
         if not debts:
             text = f"👤 NỢ CỦA: {customer}\n\n🎉 Đã trả hết!"
@@ -426,7 +426,7 @@ async def debt_customer_detail(update: Update, context: ContextTypes.DEFAULT_TYP
             ]
         else:
             total = sum(d['amount'] for d in debts)
-            telegram_id = sheets.get_customer_telegram_id(customer)
+            telegram_id = await sheets_async.get_customer_telegram_id(customer)
             
             text = f"👤 NỢ CỦA: {customer}\n"
             if telegram_id:
@@ -468,7 +468,7 @@ async def debt_create_paylink(update: Update, context: ContextTypes.DEFAULT_TYPE
         from services.payos_service import create_payment_link
         
         # Lấy tổng nợ
-        total = sheets.get_customer_total_debt(customer)
+        total = await sheets_async.get_customer_total_debt(customer)
         
         if total <= 0:
             await query.edit_message_text(
@@ -586,7 +586,7 @@ async def debt_check_payment(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 pass
             
             # Tự động đánh dấu tất cả nợ đã trả trong sheet
-            count = sheets.mark_customer_debts_paid(customer)
+            count = await sheets_async.mark_customer_debts_paid(customer)
             
             text = f"""✅ ĐÃ THANH TOÁN THÀNH CÔNG!
 
@@ -680,7 +680,7 @@ async def trano_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
     
     try:
-        debts = sheets.get_all_debts(status='pending')
+        debts = await sheets_async.get_all_debts(status='pending')
         
         if not debts:
             await query.edit_message_text(
@@ -691,9 +691,9 @@ async def trano_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         text = "✅ TRẢ NỢ\n\n📋 Danh sách nợ:\n"
         for d in debts[-10:]:
-            text += f"• Row {d['row']}: {d['customer']} - {format_currency(d['amount'])}\n"
+            text += f"• ID {d['id']}: {d['customer']} - {format_currency(d['amount'])}\n"
         
-        text += "\n📝 Nhập số row để đánh dấu đã trả:"
+        text += "\n📝 Nhập ID để đánh dấu đã trả:"
         
         await query.edit_message_text(text, reply_markup=get_cancel_keyboard())
         
@@ -704,23 +704,23 @@ async def trano_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def trano_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Xác nhận trả nợ theo row"""
+    """Xác nhận trả nợ theo ID"""
     try:
-        row_num = int(update.message.text.strip())
+        debt_id = int(update.message.text.strip())
     except ValueError:
         await update.message.reply_text(
-            "❌ Số row không hợp lệ!\n\nVui lòng nhập lại:",
+            "❌ ID không hợp lệ!\n\nVui lòng nhập lại:",
             reply_markup=get_cancel_keyboard()
         )
         return TRANO_SELECT
     
     try:
-        success = sheets.mark_debt_paid(row_num)
+        success = await sheets_async.mark_debt_paid(debt_id)
         
         if success:
-            text = f"✅ Đã đánh dấu row {row_num} đã trả nợ!"
+            text = f"✅ Đã đánh dấu ID {debt_id} đã trả nợ!"
         else:
-            text = f"❌ Không thể cập nhật row {row_num}"
+            text = f"❌ Không thể cập nhật ID {debt_id}"
         
         await update.message.reply_text(text, reply_markup=get_debt_keyboard())
     except Exception as e:
@@ -737,7 +737,7 @@ async def trano_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
     customer = query.data.replace("debt_payall_", "")
     
     try:
-        count = sheets.mark_customer_debts_paid(customer)
+        count = await sheets_async.mark_customer_debts_paid(customer)
         
         if count > 0:
             text = f"✅ Đã đánh dấu {count} khoản nợ của {customer} đã trả!"
@@ -757,8 +757,8 @@ async def debt_summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
     
     try:
-        summary = sheets.get_debt_summary()
-        customers = sheets.get_all_customers_with_debt()
+        summary = await sheets_async.get_debt_summary()
+        customers = await sheets_async.get_all_customers_with_debt()
         
         text = f"""📊 TỔNG KẾT NỢ
 
@@ -785,7 +785,7 @@ async def xoano_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
     
     try:
-        debts = sheets.get_all_debts()
+        debts = await sheets_async.get_all_debts()
         
         if not debts:
             await query.edit_message_text(
@@ -797,9 +797,9 @@ async def xoano_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         text = "🗑 XÓA NỢ\n\n📋 Danh sách nợ:\n"
         for d in debts[-10:]:
             status = "✅" if d['status'] == 'paid' else "⏳"
-            text += f"• Row {d['row']}: {status} {d['customer']} - {format_currency(d['amount'])}\n"
+            text += f"• ID {d['id']}: {status} {d['customer']} - {format_currency(d['amount'])}\n"
         
-        text += "\n⚠️ Nhập số row cần xóa:"
+        text += "\n⚠️ Nhập ID cần xóa:"
         
         await query.edit_message_text(text, reply_markup=get_cancel_keyboard())
         
@@ -812,21 +812,21 @@ async def xoano_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def xoano_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Xác nhận xóa nợ"""
     try:
-        row_num = int(update.message.text.strip())
+        debt_id = int(update.message.text.strip())
     except ValueError:
         await update.message.reply_text(
-            "❌ Số row không hợp lệ!",
+            "❌ ID không hợp lệ!",
             reply_markup=get_cancel_keyboard()
         )
         return XOANO_SELECT
     
     try:
-        success = sheets.delete_debt(row_num)
+        success = await sheets_async.delete_debt(debt_id)
         
         if success:
-            text = f"✅ Đã xóa khoản nợ ở row {row_num}!"
+            text = f"✅ Đã xóa khoản nợ ID {debt_id}!"
         else:
-            text = f"❌ Không thể xóa row {row_num}"
+            text = f"❌ Không thể xóa ID {debt_id}"
         
         await update.message.reply_text(text, reply_markup=get_debt_keyboard())
     except Exception as e:
@@ -874,8 +874,8 @@ async def debt_doino(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         # Lấy thông tin nợ
-        debts = sheets.get_debts_by_customer(customer)
-        telegram_id = sheets.get_customer_telegram_id(customer)
+        debts = await sheets_async.get_debts_by_customer(customer)
+        telegram_id = await sheets_async.get_customer_telegram_id(customer)
         
         if not debts:
             await query.edit_message_text(
@@ -955,7 +955,7 @@ async def debt_set_tid_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
     customer = query.data.replace("debt_settid_", "")
     context.user_data['settid_customer'] = customer
     
-    existing_tid = sheets.get_customer_telegram_id(customer)
+    existing_tid = await sheets_async.get_customer_telegram_id(customer)
     
     text = f"📱 CẬP NHẬT TELEGRAM ID\n\n"
     text += f"👤 Khách: {customer}\n"
@@ -985,7 +985,7 @@ async def debt_set_tid_confirm(update: Update, context: ContextTypes.DEFAULT_TYP
         return SET_TID
     
     try:
-        count = sheets.set_customer_telegram_id(customer, tid)
+        count = await sheets_async.set_customer_telegram_id(customer, tid)
         
         text = f"✅ Đã cập nhật Telegram ID cho {customer}!\n"
         text += f"📱 ID: {tid}\n"
@@ -1020,7 +1020,7 @@ async def cust_pay(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         from services.payos_service import create_payment_link
         
-        total = sheets.get_customer_total_debt(customer)
+        total = await sheets_async.get_customer_total_debt(customer)
         
         if total <= 0:
             await query.edit_message_text(
@@ -1128,7 +1128,7 @@ async def cust_check(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 pass
             
             # Cập nhật sheet
-            count = sheets.mark_customer_debts_paid(customer)
+            count = await sheets_async.mark_customer_debts_paid(customer)
             
             text = f"✅ THANH TOÁN THÀNH CÔNG!\n\n"
             text += f"👤 {customer}\n"
@@ -5,7 +5,7 @@ Expense handlers với Conversation Flow
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler, MessageHandler, CallbackQueryHandler, filters
 
-from services import sheets
+from services import sheets_async
 from utils.formatting import format_currency, parse_amount, get_month_name, get_category_emoji
 from utils.security import check_permission, UNAUTHORIZED_MESSAGE
 
@@ -149,7 +149,7 @@ async def chi_desc(update: Update, context: ContextTypes.DEFAULT_TYPE):
     category = context.user_data.get('expense_category', 'Living')
     
     try:
-        result = sheets.add_expense(amount, description, category)
+        result = await sheets_async.add_expense(amount, description, category)
         
         emoji = get_category_emoji(category)
         
@@ -162,7 +162,7 @@ async def chi_desc(update: Update, context: ContextTypes.DEFAULT_TYPE):
 """
         
         # Thêm tổng chi hôm nay
-        today_summary = sheets.get_today_expense_summary()
+        today_summary = await sheets_async.get_today_expense_summary()
         text += f"━━━ Chi tiêu hôm nay ━━━\n"
         text += f"📊 Số lần: {today_summary['count']} | 💸 Tổng: {format_currency(today_summary['total'])}"
         
@@ -187,7 +187,7 @@ async def xoachi_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.answer()
         
         try:
-            expenses = sheets.get_today_expenses()
+            expenses = await sheets_async.get_today_expenses()
             
             if not expenses:
                 await query.edit_message_text(
@@ -200,9 +200,9 @@ async def xoachi_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             text = "🗑 *XÓA CHI TIÊU*\n\n📋 *Chi tiêu hôm nay:*\n"
             for e in expenses:
                 emoji = get_category_emoji(e['category'])
-                text += f"• *Row {e['row']}*: {format_currency(e['amount'])} - {e['description']}\n"
+                text += f"• *ID {e['id']}*: {format_currency(e['amount'])} - {e['description']}\n"
             
-            text += "\n⚠️ Nhập số row cần xóa:"
+            text += "\n⚠️ Nhập ID cần xóa:"
             
             await query.edit_message_text(
                 text,
@@ -222,27 +222,27 @@ async def xoachi_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def xoachi_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Xác nhận và xóa"""
     try:
-        row_num = int(update.message.text.strip())
+        expense_id = int(update.message.text.strip())
     except ValueError:
         await update.message.reply_text(
-            "❌ Số row không hợp lệ!\n\nVui lòng nhập lại:",
+            "❌ ID không hợp lệ!\n\nVui lòng nhập lại:",
             parse_mode='Markdown',
             reply_markup=get_cancel_keyboard()
         )
         return XOACHI_ROW
     
     try:
-        success = sheets.delete_expense(row_num)
+        success = await sheets_async.delete_expense(expense_id)
         
         if success:
             await update.message.reply_text(
-                f"✅ *Đã xóa chi tiêu ở row {row_num}*",
+                f"✅ *Đã xóa chi tiêu ID {expense_id}*",
                 parse_mode='Markdown',
                 reply_markup=get_expense_keyboard()
             )
         else:
             await update.message.reply_text(
-                f"❌ Không thể xóa row {row_num}.",
+                f"❌ Không thể xóa ID {expense_id}.",
                 parse_mode='Markdown',
                 reply_markup=get_expense_keyboard()
             )
@@ -300,7 +300,7 @@ async def chi_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         category = 'Living'
     
     try:
-        result = sheets.add_expense(amount, description, category)
+        result = await sheets_async.add_expense(amount, description, category)
         emoji = get_category_emoji(category)
         
         await update.message.reply_text(
@@ -317,9 +317,9 @@ async def chi_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def chitieu_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /chitieu command"""
     try:
-        expenses = sheets.get_today_expenses()
-        summary = sheets.get_today_expense_summary()
-        date = sheets.get_local_date()
+        expenses = await sheets_async.get_today_expenses()
+        summary = await sheets_async.get_today_expense_summary()
+        date = sheets_async.get_local_date()
         
         if not expenses:
             text = f"💸 CHI TIÊU - {date}\n\n📭 Chưa có chi tiêu nào hôm nay."
@@ -327,7 +327,7 @@ async def chitieu_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             text = f"💸 CHI TIÊU - {date}\n\n"
             for e in expenses:
                 emoji = get_category_emoji(e['category'])
-                text += f"{emoji} Row {e['row']}: {format_currency(e['amount'])}\n"
+                text += f"{emoji} ID {e['id']}: {format_currency(e['amount'])}\n"
                 text += f"   📝 {e['description']}\n\n"
             
             text += f"━━━━━━━━━━━━━━━━━\n"
@@ -341,9 +341,10 @@ async def chitieu_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def homnay_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /homnay command"""
     try:
-        date = sheets.get_local_date()
-        expense_summary = sheets.get_today_expense_summary()
-        sales_summary = sheets.get_today_sales_summary()
+        date = sheets_async.get_local_date()
+        overview = await sheets_async.get_today_overview()
+        expense_summary = overview['expenses']
+        sales_summary = overview['sales']
         
         balance = sales_summary['total_profit'] - expense_summary['total']
         balance_emoji = "📈" if balance >= 0 else "📉"
@@ -364,8 +365,9 @@ async def homnay_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def thang_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /thang command"""
     try:
-        expense_summary = sheets.get_month_expense_summary()
-        sales_summary = sheets.get_month_sales_summary()
+        overview = await sheets_async.get_month_overview()
+        expense_summary = overview['expenses']
+        sales_summary = overview['sales']
         month_name = get_month_name(expense_summary['month'])
         
         balance = sales_summary['total_profit'] - expense_summary['total']
@@ -389,18 +391,18 @@ async def xoachi_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /xoachi command"""
     if not context.args:
         await update.message.reply_text(
-            "📝 Cách dùng: `/xoachi [row]`\nVí dụ: `/xoachi 5`",
+            "📝 Cách dùng: `/xoachi [ID]`\nVí dụ: `/xoachi 5`",
             parse_mode='Markdown'
         )
         return
     
     try:
-        row_num = int(context.args[0])
-        success = sheets.delete_expense(row_num)
+        expense_id = int(context.args[0])
+        success = await sheets_async.delete_expense(expense_id)
         
         if success:
-            await update.message.reply_text(f"✅ Đã xóa row {row_num}.", parse_mode='Markdown')
+            await update.message.reply_text(f"✅ Đã xóa ID {expense_id}.", parse_mode='Markdown')
         else:
-            await update.message.reply_text(f"❌ Không thể xóa row {row_num}.", parse_mode='Markdown')
+            await update.message.reply_text(f"❌ Không thể xóa ID {expense_id}.", parse_mode='Markdown')
     except Exception as e:
         await update.message.reply_text(f"❌ Lỗi: `{str(e)}`", parse_mode='Markdown')
@@ -5,7 +5,7 @@ Product handlers với Conversation Flow
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler, MessageHandler, CallbackQueryHandler, filters
 
-from services import sheets
+from services import sheets_async
 from utils.formatting import format_currency, parse_amount
 from utils.security import check_permission, UNAUTHORIZED_MESSAGE
 
@@ -44,7 +44,7 @@ def get_cancel_keyboard():
 async def sanpham_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /sanpham command"""
     try:
-        products = sheets.get_all_products()
+        products = await sheets_async.get_all_products()
         
         if not products:
             text = "📦 *DANH SÁCH SẢN PHẨM*\n\n📭 Chưa có sản phẩm nào."
@@ -95,7 +95,7 @@ async def themsp_sku(update: Update, context: ContextTypes.DEFAULT_TYPE):
     sku = update.message.text.strip().upper()
     
     # Kiểm tra SKU đã tồn tại chưa
-    if sheets.find_product_by_sku(sku):
+    if await sheets_async.find_product_by_sku(sku):
         await update.message.reply_text(
             f"❌ SKU `{sku}` đã tồn tại!\n\n"
             "Vui lòng nhập SKU khác:",
@@ -153,7 +153,7 @@ async def themsp_cost(update: Update, context: ContextTypes.DEFAULT_TYPE):
     name = context.user_data.get('new_product_name', '')
     
     try:
-        success = sheets.add_product(sku, name, cost)
+        success = await sheets_async.add_product(sku, name, cost)
         
         if success:
             await update.message.reply_text(
@@ -193,7 +193,7 @@ async def suasp_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         # Hiển thị danh sách sản phẩm trước
         try:
-            products = sheets.get_all_products()
+            products = await sheets_async.get_all_products()
             if products:
                 text = "✏️ *SỬA GIÁ SẢN PHẨM*\n\n"
                 text += "📦 *Danh sách hiện tại:*\n"
@@ -217,7 +217,7 @@ async def suasp_sku(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Nhận SKU, hỏi giá mới"""
     sku = update.message.text.strip().upper()
     
-    product = sheets.find_product_by_sku(sku)
+    product = await sheets_async.find_product_by_sku(sku)
     if not product:
         await update.message.reply_text(
             f"❌ Không tìm thấy `{sku}`!\n\n"
@@ -257,7 +257,7 @@ async def suasp_cost(update: Update, context: ContextTypes.DEFAULT_TYPE):
     product = context.user_data.get('edit_product', {})
     
     try:
-        success = sheets.update_product(sku, cost=cost)
+        success = await sheets_async.update_product(sku, cost=cost)
         
         if success:
             await update.message.reply_text(
@@ -290,7 +290,7 @@ async def xoasp_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.answer()
         
         try:
-            products = sheets.get_all_products()
+            products = await sheets_async.get_all_products()
             if products:
                 text = "🗑 *XÓA SẢN PHẨM*\n\n"
                 text += "📦 *Danh sách hiện tại:*\n"
@@ -314,7 +314,7 @@ async def xoasp_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Nhận SKU và xóa"""
     sku = update.message.text.strip().upper()
     
-    product = sheets.find_product_by_sku(sku)
+    product = await sheets_async.find_product_by_sku(sku)
     if not product:
         await update.message.reply_text(
             f"❌ Không tìm thấy `{sku}`!\n\nVui lòng nhập SKU khác:",
@@ -324,7 +324,7 @@ async def xoasp_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return XOASP_SKU
     
     try:
-        success = sheets.delete_product(sku)
+        success = await sheets_async.delete_product(sku)
         
         if success:
             await update.message.reply_text(
@@ -394,7 +394,7 @@ async def themsp_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     try:
-        success = sheets.add_product(sku, name, cost)
+        success = await sheets_async.add_product(sku, name, cost)
         if success:
             await update.message.reply_text(
                 f"✅ *Đã thêm!*\n\n🏷 {sku} - {name}\n💵 {format_currency(cost)}",
@@ -425,12 +425,12 @@ async def suasp_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     try:
-        product = sheets.find_product_by_sku(sku)
+        product = await sheets_async.find_product_by_sku(sku)
         if not product:
             await update.message.reply_text(f"❌ Không tìm thấy `{sku}`.", parse_mode='Markdown')
             return
         
-        success = sheets.update_product(sku, cost=cost)
+        success = await sheets_async.update_product(sku, cost=cost)
         if success:
             await update.message.reply_text(
                 f"✅ *Đã cập nhật {sku}*\n💵 {format_currency(product['cost'])} → {format_currency(cost)}",
@@ -453,12 +453,12 @@ async def xoasp_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     sku = context.args[0].upper()
     
     try:
-        product = sheets.find_product_by_sku(sku)
+        product = await sheets_async.find_product_by_sku(sku)
         if not product:
             await update.message.reply_text(f"❌ Không tìm thấy `{sku}`.", parse_mode='Markdown')
             return
         
-        success = sheets.delete_product(sku)
+        success = await sheets_async.delete_product(sku)
         if success:
             await update.message.reply_text(f"✅ Đã xóa `{sku}`.", parse_mode='Markdown')
     except Exception as e:
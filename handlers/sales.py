@@ -5,7 +5,7 @@ Sales handlers với Conversation Flow
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler, MessageHandler, CallbackQueryHandler, filters
 
-from services import sheets
+from services import sheets_async
 from utils.formatting import format_currency, parse_amount, get_month_name, escape_markdown
 from utils.security import check_permission, UNAUTHORIZED_MESSAGE
 
@@ -62,7 +62,7 @@ async def ban_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.answer()
         
         try:
-            products = sheets.get_all_products()
+            products = await sheets_async.get_all_products()
             
             if not products:
                 await query.edit_message_text(
@@ -116,7 +116,7 @@ async def ban_select_sp(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if data.startswith("sp_"):
         sku = data[3:]  # Lấy SKU từ callback data
         
-        product = sheets.find_product_by_sku(sku)
+        product = await sheets_async.find_product_by_sku(sku)
         if not product:
             await query.edit_message_text(
                 f"❌ Không tìm thấy SP `{sku}`!",
@@ -267,7 +267,7 @@ async def complete_sale(update_or_query, context, customer, note="", is_callback
     cost = product.get('cost', 0)  # Giá gốc/sp
     
     try:
-        result = sheets.add_sale(
+        result = await sheets_async.add_sale(
             sku=sku,
             quantity=qty,
             price=price,
@@ -329,7 +329,7 @@ async def xoabh_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.answer()
         
         try:
-            sales = sheets.get_recent_sales(limit=10)
+            sales = await sheets_async.get_recent_sales(limit=10)
             
             if not sales:
                 await query.edit_message_text(
@@ -343,9 +343,9 @@ async def xoabh_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             for s in sales:
                 profit = float(s['profit']) if s['profit'] else 0
                 profit_emoji = "📈" if profit >= 0 else "📉"
-                text += f"• *Row {s['row']}*: {s['sku']} - {format_currency(profit)} ({s['date']})\n"
+                text += f"• *ID {s['id']}*: {s['sku']} - {format_currency(profit)} ({s['date']})\n"
             
-            text += "\n⚠️ Nhập số row cần xóa:"
+            text += "\n⚠️ Nhập ID cần xóa:"
             
             await query.edit_message_text(
                 text,
@@ -365,27 +365,27 @@ async def xoabh_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def xoabh_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Xác nhận và xóa"""
     try:
-        row_num = int(update.message.text.strip())
+        sale_id = int(update.message.text.strip())
     except ValueError:
         await update.message.reply_text(
-            "❌ Số row không hợp lệ!\n\nVui lòng nhập lại:",
+            "❌ ID không hợp lệ!\n\nVui lòng nhập lại:",
             parse_mode='Markdown',
             reply_markup=get_cancel_keyboard()
         )
         return XOABH_ROW
     
     try:
-        success = sheets.delete_sale(row_num)
+        success = await sheets_async.delete_sale(sale_id)
         
         if success:
             await update.message.reply_text(
-                f"✅ *Đã xóa giao dịch ở row {row_num}*",
+                f"✅ *Đã xóa giao dịch ID {sale_id}*",
                 parse_mode='Markdown',
                 reply_markup=get_sales_keyboard()
             )
         else:
             await update.message.reply_text(
-                f"❌ Không thể xóa row {row_num}.",
+                f"❌ Không thể xóa ID {sale_id}.",
                 parse_mode='Markdown',
                 reply_markup=get_sales_keyboard()
             )
@@ -419,7 +419,7 @@ async def chitiet_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.answer()
         
         try:
-            sales = sheets.get_recent_sales(limit=10)
+            sales = await sheets_async.get_recent_sales(limit=10)
             
             if not sales:
                 await query.edit_message_text(
@@ -432,9 +432,9 @@ async def chitiet_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             text = "🔍 *XEM CHI TIẾT ĐƠN HÀNG*\n\n📋 *Giao dịch gần đây:*\n"
             for s in sales:
                 profit = float(s['profit']) if s['profit'] else 0
-                text += f"• *Row {s['row']}*: {s['sku']} - {format_currency(profit)} ({s['date']})\n"
+                text += f"• *ID {s['id']}*: {s['sku']} - {format_currency(profit)} ({s['date']})\n"
             
-            text += "\n📝 Nhập số row để xem chi tiết:"
+            text += "\n📝 Nhập ID để xem chi tiết:"
             
             await query.edit_message_text(
                 text,
@@ -454,34 +454,34 @@ async def chitiet_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def chitiet_show(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Hiển thị chi tiết đơn hàng"""
     try:
-        row_num = int(update.message.text.strip())
+        sale_id = int(update.message.text.strip())
     except ValueError:
         await update.message.reply_text(
-            "❌ Số row không hợp lệ!\n\nVui lòng nhập lại:",
+            "❌ ID không hợp lệ!\n\nVui lòng nhập lại:",
             parse_mode='Markdown',
             reply_markup=get_cancel_keyboard()
         )
         return CHITIET_ROW
     
     try:
-        sale = sheets.get_sale_by_row(row_num)
+        sale = await sheets_async.get_sale(sale_id)
         
         if not sale:
             await update.message.reply_text(
-                f"❌ Không tìm thấy đơn hàng ở row {row_num}",
+                f"❌ Không tìm thấy đơn hàng ID {sale_id}",
                 parse_mode='Markdown',
                 reply_markup=get_sales_keyboard()
             )
             return ConversationHandler.END
         
         # Get product info
-        product = sheets.get_product(sale['sku'])
+        product = await sheets_async.get_product(sale['sku'])
         product_name = product.get('name', sale['sku']) if product else sale['sku']
         
         profit_emoji = "📈" if sale['profit'] >= 0 else "📉"
         total_cost = sale['cost'] * sale['quantity']
         
-        text = f"""🔍 CHI TIẾT ĐƠN HÀNG - Row {row_num}
+        text = f"""🔍 CHI TIẾT ĐƠN HÀNG - ID {sale_id}
 
 📅 Ngày: {sale['date']}
 🏷 Sản phẩm: {product_name} ({sale['sku']})
@@ -534,7 +534,7 @@ async def suabh_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.answer()
         
         try:
-            sales = sheets.get_recent_sales(limit=10)
+            sales = await sheets_async.get_recent_sales(limit=10)
             
             if not sales:
                 await query.edit_message_text(
@@ -547,9 +547,9 @@ async def suabh_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             text = "✏️ *SỬA ĐƠN HÀNG*\n\n📋 *Giao dịch gần đây:*\n"
             for s in sales:
                 profit = float(s['profit']) if s['profit'] else 0
-                text += f"• *Row {s['row']}*: {s['sku']} - {format_currency(profit)} ({s['date']})\n"
+                text += f"• *ID {s['id']}*: {s['sku']} - {format_currency(profit)} ({s['date']})\n"
             
-            text += "\n📝 Nhập số row cần sửa:"
+            text += "\n📝 Nhập ID cần sửa:"
             
             await query.edit_message_text(
                 text,
@@ -569,29 +569,29 @@ async def suabh_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def suabh_select_field(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Chọn trường cần sửa"""
     try:
-        row_num = int(update.message.text.strip())
+        sale_id = int(update.message.text.strip())
     except ValueError:
         await update.message.reply_text(
-            "❌ Số row không hợp lệ!\n\nVui lòng nhập lại:",
+            "❌ ID không hợp lệ!\n\nVui lòng nhập lại:",
             parse_mode='Markdown',
             reply_markup=get_cancel_keyboard()
         )
         return SUABH_ROW
     
     # Check if row exists
-    sale = sheets.get_sale_by_row(row_num)
+    sale = await sheets_async.get_sale(sale_id)
     if not sale:
         await update.message.reply_text(
-            f"❌ Không tìm thấy đơn hàng ở row {row_num}",
+            f"❌ Không tìm thấy đơn hàng ID {sale_id}",
             parse_mode='Markdown',
             reply_markup=get_sales_keyboard()
         )
         return ConversationHandler.END
     
-    context.user_data['edit_row'] = row_num
+    context.user_data['edit_id'] = sale_id
     context.user_data['edit_sale'] = sale
     
-    text = f"""✏️ SỬA ĐƠN HÀNG - Row {row_num}
+    text = f"""✏️ SỬA ĐƠN HÀNG - ID {sale_id}
 
 📦 Số lượng: {sale['quantity']}
 💰 Tổng thu: {format_currency(sale['price'])}
@@ -647,13 +647,13 @@ async def suabh_get_field(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def suabh_save(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Lưu giá trị mới"""
     new_value = update.message.text.strip()
-    row_num = context.user_data.get('edit_row')
+    sale_id = context.user_data.get('edit_id')
     field = context.user_data.get('edit_field')
     
     try:
         if field == 'qty':
             quantity = int(new_value)
-            success = sheets.update_sale(row_num, quantity=quantity)
+            success = await sheets_async.update_sale(sale_id, quantity=quantity)
         elif field == 'price':
             price = parse_amount(new_value)
             if price is None:
@@ -663,23 +663,23 @@ async def suabh_save(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     reply_markup=get_cancel_keyboard()
                 )
                 return SUABH_VALUE
-            success = sheets.update_sale(row_num, price=price)
+            success = await sheets_async.update_sale(sale_id, price=price)
         elif field == 'customer':
-            success = sheets.update_sale(row_num, customer=new_value)
+            success = await sheets_async.update_sale(sale_id, customer=new_value)
         elif field == 'note':
-            success = sheets.update_sale(row_num, note=new_value)
+            success = await sheets_async.update_sale(sale_id, note=new_value)
         else:
             success = False
         
         if success:
             await update.message.reply_text(
-                f"✅ *Đã cập nhật row {row_num}!*",
+                f"✅ *Đã cập nhật ID {sale_id}!*",
                 parse_mode='Markdown',
                 reply_markup=get_sales_keyboard()
             )
         else:
             await update.message.reply_text(
-                f"❌ Không thể cập nhật row {row_num}.",
+                f"❌ Không thể cập nhật ID {sale_id}.",
                 parse_mode='Markdown',
                 reply_markup=get_sales_keyboard()
             )
@@ -731,13 +731,17 @@ async def ban_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if len(context.args) >= 4:
         customer = ' '.join(context.args[3:])
     
-    product = sheets.find_product_by_sku(sku)
+    product = await sheets_async.find_product_by_sku(sku)
+    if not product:
+        # Không khớp SKU → thử tìm theo tên sản phẩm
+        product = await sheets_async.find_product_by_name(context.args[0])
     if not product:
         await update.message.reply_text(f"❌ Không tìm thấy `{sku}`.", parse_mode='Markdown')
         return
+    sku = product['sku']
     
     try:
-        result = sheets.add_sale(sku=sku, quantity=qty, price=price, cost=product['cost'], customer=customer)
+        result = await sheets_async.add_sale(sku=sku, quantity=qty, price=price, cost=product['cost'], customer=customer)
         profit_emoji = "📈" if result['profit'] >= 0 else "📉"
         
         await update.message.reply_text(
@@ -754,7 +758,7 @@ async def ban_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def dsbh_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /dsbh command"""
     try:
-        sales = sheets.get_recent_sales(limit=10)
+        sales = await sheets_async.get_recent_sales(limit=10)
         
         if not sales:
             text = "🛒 *LỊCH SỬ BÁN HÀNG*\n\n📭 Chưa có giao dịch nào."
@@ -763,7 +767,7 @@ async def dsbh_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             for s in sales:
                 profit = float(s['profit']) if s['profit'] else 0
                 profit_emoji = "📈" if profit >= 0 else "📉"
-                text += f"🏷 *{s['sku']}* - Row {s['row']}\n"
+                text += f"🏷 *{s['sku']}* - ID {s['id']}\n"
                 text += f"   📅 {s['date']} | Qty: {s['quantity']}\n"
                 text += f"   {profit_emoji} Profit: {format_currency(profit)}\n\n"
         
@@ -775,7 +779,7 @@ async def dsbh_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def laithang_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /laithang command"""
     try:
-        summary = sheets.get_month_sales_summary()
+        summary = await sheets_async.get_month_sales_summary()
         month_name = get_month_name(summary['month'])
         
         text = f"💹 *LỢI NHUẬN {month_name.upper()}/{summary['year']}*\n\n"
@@ -794,18 +798,18 @@ async def xoabh_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /xoabh command"""
     if not context.args:
         await update.message.reply_text(
-            "📝 Cách dùng: `/xoabh [row]`\nVí dụ: `/xoabh 5`",
+            "📝 Cách dùng: `/xoabh [ID]`\nVí dụ: `/xoabh 5`",
             parse_mode='Markdown'
         )
         return
     
     try:
-        row_num = int(context.args[0])
-        success = sheets.delete_sale(row_num)
+        sale_id = int(context.args[0])
+        success = await sheets_async.delete_sale(sale_id)
         
         if success:
-            await update.message.reply_text(f"✅ Đã xóa row {row_num}.", parse_mode='Markdown')
+            await update.message.reply_text(f"✅ Đã xóa ID {sale_id}.", parse_mode='Markdown')
         else:
-            await update.message.reply_text(f"❌ Không thể xóa row {row_num}.", parse_mode='Markdown')
+            await update.message.reply_text(f"❌ Không thể xóa ID {sale_id}.", parse_mode='Markdown')
     except Exception as e:
         await update.message.reply_text(f"❌ Lỗi: `{str(e)}`", parse_mode='Markdown')
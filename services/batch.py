@@ -0,0 +1,63 @@
+"""
+Write Batch - Gom nhiều lệnh ghi ô/range thành 1 request batch_update
+Mỗi update_cell là 1 HTTP request → dễ vượt quota/phút của Google Sheets.
+"""
+
+from typing import Any, List
+
+from gspread.utils import rowcol_to_a1
+
+
+class WriteBatch:
+    """
+    Gom lệnh ghi cho 1 worksheet, gửi 1 lần bằng batch_update.
+
+    Dùng:
+        with WriteBatch(sheet) as batch:
+            batch.update_cell(5, 5, 'paid')
+            batch.update_cell(5, 6, '17/10/2026')
+        # → 1 request khi thoát khỏi with (không gửi nếu có exception)
+    """
+
+    def __init__(self, sheet, value_input_option: str = 'USER_ENTERED'):
+        self.sheet = sheet
+        self.value_input_option = value_input_option
+        self._updates = []
+
+    def __len__(self) -> int:
+        return len(self._updates)
+
+    def update_cell(self, row: int, col: int, value: Any):
+        """Thêm lệnh ghi 1 ô (giống sheet.update_cell)"""
+        self._updates.append({
+            'range': rowcol_to_a1(row, col),
+            'values': [[value]],
+        })
+
+    def update_range(self, row: int, col: int, values: List[List[Any]]):
+        """Thêm lệnh ghi 1 vùng, bắt đầu từ ô (row, col)"""
+        if not values:
+            return
+        end_row = row + len(values) - 1
+        end_col = col + max(len(v) for v in values) - 1
+        self._updates.append({
+            'range': f"{rowcol_to_a1(row, col)}:{rowcol_to_a1(end_row, end_col)}",
+            'values': values,
+        })
+
+    def commit(self) -> int:
+        """Gửi tất cả lệnh ghi trong 1 request. Trả về số lệnh đã gửi"""
+        count = len(self._updates)
+        if count:
+            # Mặc định USER_ENTERED: giống update_cell (số/ngày được Sheets parse)
+            self.sheet.batch_update(self._updates, value_input_option=self.value_input_option)
+            self._updates = []
+        return count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        return False
@@ -0,0 +1,155 @@
+"""
+Record Cache - Cache bản ghi worksheet trong bộ nhớ (TTL + invalidate khi ghi)
+"""
+
+import sys
+import time
+import threading
+from typing import Callable, Dict, List, Optional
+
+
+def _record_bytes(record: Dict) -> int:
+    """Ước lượng dung lượng 1 record (dict + key/value)"""
+    total = sys.getsizeof(record)
+    for key, value in record.items():
+        total += sys.getsizeof(key) + sys.getsizeof(value)
+    return total
+
+
+def _estimate_bytes(records: List[Dict]) -> int:
+    """Ước lượng dung lượng bộ nhớ của list records (ColumnStore tự tính: nbytes())"""
+    if hasattr(records, 'nbytes'):
+        return records.nbytes()
+    return sys.getsizeof(records) + sum(_record_bytes(r) for r in records)
+
+
+def _resize(records: List[Dict], size: int) -> int:
+    """Dung lượng sau write-through: size đã cộng/trừ record, ColumnStore tính lại nbytes()"""
+    return records.nbytes() if hasattr(records, 'nbytes') else size
+
+
+class RecordCache:
+    """
+    Cache records theo tên worksheet.
+    - Mỗi worksheet có TTL riêng tính từ lúc tải
+    - Các hàm ghi (add/update/delete/mark) gọi invalidate() để xóa cache,
+      hoặc append/update/delete để sửa trực tiếp record đang cache (write-through)
+    - ttl <= 0: tắt cache, luôn đọc lại từ Sheets
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries = {}  # sheet_name -> (loaded_at, records, size_bytes)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, sheet_name: str, loader: Callable[[], List[Dict]]) -> List[Dict]:
+        """Lấy records từ cache, gọi loader() nếu chưa có hoặc đã hết hạn"""
+        if self.ttl > 0:
+            with self._lock:
+                entry = self._entries.get(sheet_name)
+                if entry and time.monotonic() - entry[0] < self.ttl:
+                    self.hits += 1
+                    return entry[1]
+
+        with self._lock:
+            self.misses += 1
+
+        records = loader()
+
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[sheet_name] = (time.monotonic(), records, _estimate_bytes(records))
+
+        return records
+
+    def put(self, sheet_name: str, records: List[Dict]):
+        """Lưu records đã tải sẵn (vd. nhiều sheet trong 1 request), tính là miss"""
+        with self._lock:
+            self.misses += 1
+            if self.ttl > 0:
+                self._entries[sheet_name] = (time.monotonic(), records, _estimate_bytes(records))
+
+    def lookup(self, sheet_name: str) -> Optional[List[Dict]]:
+        """Get records nếu đang cache và còn hạn (tính là hit), None nếu không có"""
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                self.hits += 1
+                return entry[1]
+        return None
+
+    def is_fresh(self, sheet_name: str) -> bool:
+        """Sheet đang có cache còn hạn (không tính hit/miss)"""
+        if self.ttl <= 0:
+            return False
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            return bool(entry) and time.monotonic() - entry[0] < self.ttl
+
+    def peek(self, sheet_name: str) -> Optional[List[Dict]]:
+        """Get records đang cache (kể cả hết hạn) mà không tải lại, None nếu chưa có"""
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            return entry[1] if entry else None
+
+    def append(self, sheet_name: str, record: Dict):
+        """Write-through: thêm record vào cuối cache (bỏ qua nếu chưa cache)"""
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            if entry:
+                entry[1].append(record)
+                self._entries[sheet_name] = (entry[0], entry[1], _resize(entry[1], entry[2] + _record_bytes(record)))
+
+    def update(self, sheet_name: str, index: int, fields: Dict):
+        """Write-through: sửa record thứ index (0 = dòng 2 trên sheet), ghi lại vào records"""
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            if entry and 0 <= index < len(entry[1]):
+                record = entry[1][index]
+                size = entry[2] - _record_bytes(record)
+                record.update(fields)
+                entry[1][index] = record  # ColumnStore: record là bản tạo từ các cột
+                self._entries[sheet_name] = (entry[0], entry[1], _resize(entry[1], size + _record_bytes(record)))
+
+    def delete(self, sheet_name: str, index: int):
+        """Write-through: xóa record thứ index, các record sau dồn lên 1 dòng"""
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            if entry and 0 <= index < len(entry[1]):
+                record = entry[1].pop(index)
+                self._entries[sheet_name] = (entry[0], entry[1], _resize(entry[1], entry[2] - _record_bytes(record)))
+
+    def invalidate(self, sheet_name: Optional[str] = None):
+        """Xóa cache của 1 worksheet (hoặc tất cả nếu sheet_name=None)"""
+        with self._lock:
+            if sheet_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(sheet_name, None)
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        """Thống kê cache: hits, misses, bytes đang giữ"""
+        with self._lock:
+            now = time.monotonic()
+            sheets = {
+                name: {
+                    'rows': len(records),
+                    'bytes': size,
+                    'age': round(now - loaded_at, 1),
+                }
+                for name, (loaded_at, records, size) in self._entries.items()
+            }
+            return {
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'bytes': sum(s['bytes'] for s in sheets.values()),
+                'sheets': sheets,
+            }
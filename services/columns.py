@@ -0,0 +1,357 @@
+"""
+Column Store - Records Sales/Expenses lưu theo cột có kiểu (thay cho list object trong cache)
+Mỗi cột số (Qty, Price, Cost, Profit, Amount, ID) là 1 array('d') + 1 byte kiểu ô/dòng
+(số nguyên, số thực, ô trống, chữ), cột chữ là list: Date, SKU/Category... lặp lại nhiều
+được intern (các dòng dùng chung 1 chuỗi).
+Cache giữ ColumnStore như 1 list records (store[i], len, duyệt, append, store[i] = record, pop),
+object model (Sale/Expense) chỉ được tạo khi đọc tới dòng đó → không giữ 2 bản dữ liệu.
+Tổng theo ngày và theo (tháng, SKU/Category) được giữ sẵn: build 1 lần lúc tải từ các cột
+(NumPy nếu có cài, không thì array thuần), thêm/sửa/xóa dòng cộng/trừ đúng ô tổng của dòng đó
+→ báo cáo tháng O(ngày + nhóm), không duyệt lại các dòng.
+"""
+
+import sys
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+from services.records import parse_date_key, to_number
+
+try:
+    import numpy as np
+except ImportError:  # NumPy không bắt buộc
+    np = None
+
+# Field không có cột trên sheet (object không gán field đó, giống record tải bằng ColumnMap)
+_MISSING = object()
+
+# Kiểu của 1 ô trong cột số
+_INT, _FLOAT, _EMPTY, _TEXT, _UNSET = range(5)
+
+# Số nguyên lớn hơn không lưu chính xác được trong float (ID, số tiền đều nhỏ hơn nhiều)
+_MAX_EXACT_INT = 2 ** 53
+
+
+def _number(value):
+    """Tổng dạng float → int nếu là số nguyên (giống giá trị đọc từ sheet)"""
+    return int(value) if isinstance(value, float) and value.is_integer() else value
+
+
+class ColumnStore:
+    """
+    Records của 1 sheet, dòng thứ i = row i + 2, dùng như list records.
+    - store[i] → object model tạo từ các cột; store[i] = record, append, extend, pop → ghi vào cột
+    - Cột được tạo khi có record mang field đó (sheet thiếu cột → không có field, như ColumnMap)
+    - month(): tổng theo ngày và theo nhóm của 1 tháng, đọc từ tổng giữ sẵn
+    """
+
+    def __init__(self, model: Type, number_fields: Iterable[str], group_field: str,
+                 totals: Dict[str, str], default_group: str = '', interned: Iterable[str] = ()):
+        self.model = model
+        self.number_fields = set(number_fields)
+        self.group_field = group_field
+        self.totals = totals  # tên tổng trong báo cáo -> field của record
+        self.default_group = default_group
+        self.interned = {'date', group_field, *interned}
+        self._size = 0
+        self._numbers = {}  # field -> (array('d') giá trị, bytearray kiểu ô)
+        self._texts = {}  # field -> list giá trị
+        self._others = {}  # (field, index) -> ô chữ trong cột số
+        self._unseen = list(model.COLUMNS.values())  # field có cột trên sheet nhưng store chưa có cột
+        self._strings = {}  # chuỗi đã intern
+        self._text_bytes = 0  # dung lượng các chuỗi (chuỗi intern tính 1 lần)
+        self._dates = {}  # chuỗi Date -> (year, month, day) hoặc None
+        self._by_day = {}  # (year, month, day) -> [count, tổng...]
+        self._by_month = {}  # (year, month) -> {nhóm: [count, tổng...]}
+        self._lock = threading.RLock()
+
+    # ==================== LIST API ====================
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index):
+        with self._lock:
+            if isinstance(index, slice):
+                return [self._read(i) for i in range(*index.indices(self._size))]
+            return self._read(self._index(index))
+
+    def __setitem__(self, index: int, record):
+        """Ghi lại cả dòng index từ record (sau khi sửa ô)"""
+        with self._lock:
+            index = self._index(index)
+            self._count(self._read(index), -1)
+            self._write(index, record)
+            self._count(self._read(index), 1)
+
+    def __delitem__(self, index: int):
+        self.pop(index)
+
+    def __iter__(self):
+        index = 0
+        while True:
+            with self._lock:
+                if index >= self._size:
+                    return
+                record = self._read(index)
+            yield record
+            index += 1
+
+    def __repr__(self) -> str:
+        return f"ColumnStore({self.model.__name__}, {self._size} dòng)"
+
+    def append(self, record):
+        with self._lock:
+            self._write(self._size, record)
+            self._count(self._read(self._size - 1), 1)
+
+    def extend(self, records: Iterable):
+        """Thêm nhiều dòng (lúc tải sheet): ghi vào cột rồi mới cộng tổng 1 lượt"""
+        with self._lock:
+            start = self._size
+            for record in records:
+                self._write(self._size, record)
+            if start == 0:
+                self._build_totals()
+            else:
+                for index in range(start, self._size):
+                    self._count(self._read(index), 1)
+
+    def pop(self, index: int = -1):
+        """Bỏ dòng index (các dòng dưới dồn lên, giống delete_rows), return record của dòng đó"""
+        with self._lock:
+            index = self._index(index)
+            record = self._read(index)
+            self._count(record, -1)
+            for values, kinds in self._numbers.values():
+                del values[index]
+                del kinds[index]
+            for field, column in self._texts.items():
+                self._release(field, column[index])
+                del column[index]
+            if self._others:
+                self._others = {
+                    (field, i - 1 if i > index else i): value
+                    for (field, i), value in self._others.items() if i != index
+                }
+            self._size -= 1
+            return record
+
+    def rebuild(self):
+        """Build lại tổng theo ngày/nhóm từ đầu (từ các cột)"""
+        with self._lock:
+            self._build_totals()
+
+    # ==================== CỘT ====================
+
+    def _index(self, index: int) -> int:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('ColumnStore index out of range')
+        return index
+
+    def _add_columns(self, record):
+        """Cột mới cho field record có mà store chưa có cột (các dòng đã có không có field này)"""
+        if not self._unseen:
+            return
+        for field in self._unseen:
+            if getattr(record, field, _MISSING) is _MISSING:
+                continue
+            if field in self.number_fields:
+                self._numbers[field] = (array('d', bytes(8 * self._size)), bytearray([_UNSET]) * self._size)
+            else:
+                self._texts[field] = [_MISSING] * self._size
+        self._unseen = [f for f in self._unseen if f not in self._numbers and f not in self._texts]
+
+    def _write(self, index: int, record):
+        """Ghi record (object model) vào dòng index (index = số dòng → thêm dòng mới ở cuối)"""
+        self._add_columns(record)
+        adding = index == self._size
+        others = self._others
+        for field, (values, kinds) in self._numbers.items():
+            value = getattr(record, field, _MISSING)
+            number = 0.0
+            if type(value) is int and -_MAX_EXACT_INT < value < _MAX_EXACT_INT:
+                kind, number = _INT, value
+            elif type(value) is float:
+                kind, number = _FLOAT, value
+            elif value is _MISSING:
+                kind = _UNSET
+            elif value == '':
+                kind = _EMPTY
+            else:
+                kind, number = _TEXT, float(to_number(value))
+                others[(field, index)] = value
+            if adding:
+                values.append(number)
+                kinds.append(kind)
+                continue
+            if kind != _TEXT and others:
+                others.pop((field, index), None)
+            values[index] = number
+            kinds[index] = kind
+        strings = self._strings
+        for field, column in self._texts.items():
+            value = getattr(record, field, _MISSING)
+            if type(value) is str and value:
+                if field not in self.interned:
+                    self._text_bytes += sys.getsizeof(value)
+                elif value in strings:
+                    value = strings[value]
+                else:
+                    strings[value] = value  # Giữ tới khi tạo store mới (tải lại sheet)
+                    self._text_bytes += sys.getsizeof(value)
+            if adding:
+                column.append(value)
+            else:
+                self._release(field, column[index])
+                column[index] = value
+        if adding:
+            self._size += 1
+
+    def _release(self, field: str, value):
+        """Ô chữ sắp bị ghi đè/xóa: trừ dung lượng chuỗi không intern"""
+        if field not in self.interned and type(value) is str and value:
+            self._text_bytes -= sys.getsizeof(value)
+
+    def _read(self, index: int):
+        """Dòng index → object model (field không có cột/không có giá trị → không gán)"""
+        record = self.model()
+        for field, (values, kinds) in self._numbers.items():
+            kind = kinds[index]
+            if kind == _INT:
+                setattr(record, field, int(values[index]))
+            elif kind == _FLOAT:
+                setattr(record, field, values[index])
+            elif kind == _EMPTY:
+                setattr(record, field, '')
+            elif kind == _TEXT:
+                setattr(record, field, self._others[(field, index)])
+        for field, column in self._texts.items():
+            value = column[index]
+            if value is not _MISSING:
+                setattr(record, field, value)
+        return record
+
+    # ==================== TỔNG THEO NGÀY/NHÓM ====================
+
+    def _date_key(self, value) -> Optional[Tuple[int, int, int]]:
+        text = str(value).strip()
+        if text not in self._dates:
+            self._dates[text] = parse_date_key(text)
+        return self._dates[text]
+
+    def _group(self, value) -> str:
+        return str(value or self.default_group)
+
+    def _count(self, record, sign: int):
+        """Cộng (sign=1) hoặc trừ (sign=-1) 1 dòng vào tổng của ngày và của (tháng, nhóm)"""
+        key = self._date_key(record.get('date', ''))
+        if key is None:
+            return  # Dòng trống/đã xóa/Date không hợp lệ
+        amounts = [to_number(record.get(field, 0) or 0) for field in self.totals.values()]
+        self._add(self._by_day, key, amounts, sign)
+        groups = self._by_month.setdefault(key[:2], {})
+        self._add(groups, self._group(record.get(self.group_field, '')), amounts, sign)
+        if not groups:
+            del self._by_month[key[:2]]
+
+    @staticmethod
+    def _add(buckets: Dict, key, amounts: List, sign: int):
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = [0] * (len(amounts) + 1)
+        bucket[0] += sign
+        for i, amount in enumerate(amounts, start=1):
+            bucket[i] += sign * amount
+        if bucket[0] <= 0:
+            del buckets[key]
+
+    def _build_totals(self):
+        """Build lại tổng theo ngày/nhóm từ các cột (group-by bằng NumPy nếu có cài)"""
+        self._by_day, self._by_month = {}, {}
+        dates = self._texts.get('date')
+        if dates is None:
+            return
+        groups = self._texts.get(self.group_field, [_MISSING] * self._size)
+        empty = array('d', bytes(8 * self._size))
+        columns = [self._numbers[f][0] if f in self._numbers else empty for f in self.totals.values()]
+
+        # Mã của từng ô tổng: ngày và (tháng, nhóm); dòng không có ngày hợp lệ → bỏ qua
+        day_keys, group_keys = {}, {}
+        rows, day_codes, group_codes = [], [], []
+        for index, (value, group) in enumerate(zip(dates, groups)):
+            key = self._date_key('' if value is _MISSING else value)
+            if key is None:
+                continue
+            group_key = (key[:2], self._group('' if group is _MISSING else group))
+            rows.append(index)
+            day_codes.append(day_keys.setdefault(key, len(day_keys)))
+            group_codes.append(group_keys.setdefault(group_key, len(group_keys)))
+        if not rows:
+            return
+
+        if np is not None:
+            sums = self._sum_numpy(rows, columns, day_codes, len(day_keys), group_codes, len(group_keys))
+        else:
+            sums = self._sum_array(rows, columns, day_codes, len(day_keys), group_codes, len(group_keys))
+        by_day, by_group = sums
+        self._by_day = {key: by_day[code] for key, code in day_keys.items()}
+        for (month, group), code in group_keys.items():
+            self._by_month.setdefault(month, {})[group] = by_group[code]
+
+    @staticmethod
+    def _sum_numpy(rows, columns, day_codes, days, group_codes, groups):
+        """[count, tổng...] của từng mã ngày và mã nhóm (bincount trên cả cột)"""
+        rows = np.array(rows, dtype=np.int64)
+        values = [np.frombuffer(column, dtype=np.float64)[rows] for column in columns]
+        result = []
+        for codes, size in ((day_codes, days), (group_codes, groups)):
+            codes = np.array(codes, dtype=np.int64)
+            sums = [np.bincount(codes, minlength=size).tolist()]
+            sums += [np.bincount(codes, weights=column, minlength=size).tolist() for column in values]
+            result.append([[_number(s[code]) for s in sums] for code in range(size)])
+        return result
+
+    @staticmethod
+    def _sum_array(rows, columns, day_codes, days, group_codes, groups):
+        """Như _sum_numpy, cộng từng dòng trên array thuần"""
+        result = []
+        for codes, size in ((day_codes, days), (group_codes, groups)):
+            buckets = [[0] * (len(columns) + 1) for _ in range(size)]
+            for index, code in zip(rows, codes):
+                bucket = buckets[code]
+                bucket[0] += 1
+                for i, column in enumerate(columns, start=1):
+                    bucket[i] += column[index]
+            result.append([[_number(value) for value in bucket] for bucket in buckets])
+        return result
+
+    def month(self, year: int, month: int) -> Dict[str, Dict]:
+        """
+        Tổng của 1 tháng: {'days': {day: {'count', tổng...}}, 'groups': {nhóm: {'count', tổng...}}}
+        """
+        with self._lock:
+            days = {
+                day: list(self._by_day[(year, month, day)])
+                for day in range(1, 32) if (year, month, day) in self._by_day
+            }
+            groups = {group: list(bucket) for group, bucket in self._by_month.get((year, month), {}).items()}
+        names = ['count', *self.totals]
+        return {
+            'days': {day: dict(zip(names, map(_number, bucket))) for day, bucket in days.items()},
+            'groups': {group: dict(zip(names, map(_number, bucket))) for group, bucket in groups.items()},
+        }
+
+    # ==================== STATS ====================
+
+    def nbytes(self) -> int:
+        """Bộ nhớ ước lượng: các cột + chuỗi + tổng theo ngày/nhóm"""
+        with self._lock:
+            size = sum(values.itemsize * len(values) + len(kinds) for values, kinds in self._numbers.values())
+            size += sum(sys.getsizeof(column) for column in self._texts.values())
+            size += sys.getsizeof(self._strings) + self._text_bytes
+            size += sys.getsizeof(self._others) + sum(sys.getsizeof(v) for v in self._others.values())
+            buckets = len(self._by_day) + sum(len(groups) for groups in self._by_month.values())
+            return size + buckets * (len(self.totals) + 1) * 32
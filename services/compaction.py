@@ -0,0 +1,75 @@
+"""
+Compaction - Dọn các dòng đã xóa mềm (SOFT_DELETE) vào giờ ít dùng
+Xóa mềm chỉ ghi 1 ô nên nhanh; các dòng đánh dấu vẫn nằm trên sheet đến khi
+thread nền gọi compact() mỗi ngày lúc `hour` giờ (xóa hẳn trong 1 request).
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class Compactor:
+    """
+    Lịch chạy compact() 1 lần/ngày (daemon thread, bắt đầu khi gọi start()).
+    compact() trả về {sheet_name: số dòng đã xóa}.
+    """
+
+    def __init__(self, compact: Callable[[], Dict[str, int]], hour: int, timezone):
+        self._compact = compact
+        self.hour = hour
+        self.timezone = timezone
+        self._stop = threading.Event()
+        self.runs = 0
+        self.rows_removed = 0
+        self.last_run = None
+        self.last_error = None
+        self._thread = None
+
+    def start(self):
+        """Bắt đầu thread lịch (gọi nhiều lần không sao)"""
+        if self._thread is None and not self._stop.is_set():
+            self._thread = threading.Thread(target=self._run, name="sheets-compaction", daemon=True)
+            self._thread.start()
+
+    def seconds_until_next_run(self) -> float:
+        now = datetime.now(self.timezone)
+        next_run = now.replace(hour=self.hour, minute=0, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    def run_now(self) -> Dict[str, int]:
+        """Dọn ngay (thread nền hoặc gọi tay)"""
+        removed = self._compact()
+        self.runs += 1
+        self.rows_removed += sum(removed.values())
+        self.last_run = time.time()
+        if removed:
+            logger.info(f"Compaction: đã xóa hẳn {removed}")
+        return removed
+
+    def _run(self):
+        while not self._stop.wait(self.seconds_until_next_run()):
+            try:
+                self.run_now()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"Compaction failed: {e}")
+
+    def close(self):
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        return {
+            'hour': self.hour,
+            'runs': self.runs,
+            'rows_removed': self.rows_removed,
+            'last_run': self.last_run,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,379 @@
+"""
+Fake Sheets - Google Sheets giả trong bộ nhớ (benchmark, test không cần mạng/tài khoản)
+Cùng API với gspread Spreadsheet/Worksheet mà services/sheets.py dùng:
+get_all_records, get_all_values, get, row_values, cell, append_row(s), update_cell,
+batch_update, delete_rows, values_batch_get, worksheets...
+Mỗi thao tác = 1 "request" qua FakeClient.request(method, endpoint) như client thật
+→ metrics + rate limiter bọc được y hệt; request có thể chậm (latency) hoặc lỗi 429.
+Chọn bằng SHEETS_CLIENT=fake (xem config.py).
+"""
+
+import json
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import quote
+
+import gspread
+import requests
+from gspread.cell import Cell
+from gspread.utils import a1_range_to_grid_range, numericise, rowcol_to_a1
+
+SPREADSHEETS_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+
+# Số dòng lưới của tab mới (giống Google Sheets)
+DEFAULT_GRID_ROWS = 1000
+
+
+def _cell(value) -> str:
+    """Giá trị ghi vào → chuỗi hiển thị khi đọc lại (FORMATTED_VALUE)"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    return str(value)
+
+
+def _trim(rows: List[List[str]]) -> List[List[str]]:
+    """Bỏ ô trống cuối mỗi dòng và dòng trống cuối (API không trả về)"""
+    rows = [row[:max((i + 1 for i, value in enumerate(row) if value != ''), default=0)] for row in rows]
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+def _split_range(range_name: str):
+    """"'Sales'!A2:K" → ('Sales', 'A2:K'); 'Sales' → ('Sales', None)"""
+    title, sep, cells = range_name.rpartition('!')
+    if not sep:
+        return range_name.strip("'").replace("''", "'"), None
+    if title.startswith("'") and title.endswith("'"):
+        title = title[1:-1].replace("''", "'")
+    return title, cells
+
+
+def _entered(value, value_input_option):
+    """USER_ENTERED: "'0123" → "0123" như khi gõ tay (dấu ' chỉ để Sheets không tự đổi kiểu)"""
+    if value_input_option == 'USER_ENTERED' and isinstance(value, str) and value.startswith("'"):
+        return value[1:]
+    return value
+
+
+def api_error(code: int, message: str, status: str) -> gspread.exceptions.APIError:
+    """APIError giống response lỗi của Google"""
+    response = requests.Response()
+    response.status_code = code
+    response._content = json.dumps(
+        {'error': {'code': code, 'message': message, 'status': status}}
+    ).encode()
+    return gspread.exceptions.APIError(response)
+
+
+def quota_error(message: str = "Quota exceeded (fake)") -> gspread.exceptions.APIError:
+    """APIError 429 giống Google trả về khi vượt quota"""
+    return api_error(429, message, 'RESOURCE_EXHAUSTED')
+
+
+def invalid_argument(message: str) -> gspread.exceptions.APIError:
+    """APIError 400 (range sai, tab không tồn tại, request không hỗ trợ...)"""
+    return api_error(400, message, 'INVALID_ARGUMENT')
+
+
+class FakeResponse:
+    """Response của 1 request giả: result = giá trị trả cho gspread API, content = bytes JSON"""
+
+    status_code = 200
+
+    def __init__(self, result):
+        self.result = result
+
+    @property
+    def content(self) -> bytes:
+        return json.dumps(self.result, ensure_ascii=False, default=str).encode()
+
+    def json(self):
+        return self.result
+
+
+class FakeClient:
+    """
+    Thay cho gspread.Client. Mọi thao tác đi qua request() → chờ latency,
+    có thể ném 429 (quota_error_rate hoặc fail_next) rồi mới chạy.
+    """
+
+    def __init__(self, data: Dict[str, List[List]] = None, latency: float = 0.0,
+                 jitter: float = 0.0, quota_error_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.quota_error_rate = quota_error_rate
+        self.spreadsheet = FakeSpreadsheet(self, data or {})
+        self._fail_next = 0
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.quota_errors = 0
+
+    def fail_next(self, count: int = 1):
+        """count request tiếp theo trả về 429"""
+        with self._lock:
+            self._fail_next += count
+
+    def request(self, method: str, endpoint: str, apply: Callable = None, **kwargs) -> FakeResponse:
+        delay = self.latency + random.uniform(0, self.jitter) if self.jitter else self.latency
+        if delay > 0:
+            time.sleep(delay)
+        with self._lock:
+            self.requests += 1
+            fail = self._fail_next > 0 or random.random() < self.quota_error_rate
+            if fail:
+                self._fail_next = max(0, self._fail_next - 1)
+                self.quota_errors += 1
+        if fail:
+            raise quota_error()
+        with self.spreadsheet.lock:
+            return FakeResponse(apply() if apply is not None else None)
+
+    def open_by_key(self, key: str) -> 'FakeSpreadsheet':
+        return self.spreadsheet
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'latency': self.latency,
+                'quota_error_rate': self.quota_error_rate,
+                'requests': self.requests,
+                'quota_errors': self.quota_errors,
+            }
+
+
+class FakeSpreadsheet:
+    """Thay cho gspread.Spreadsheet: các tab giữ dạng list dòng (list chuỗi)"""
+
+    id = 'fake'
+    # Loại request spreadsheets.batchUpdate hỗ trợ
+    _BATCH_REQUESTS = ('deleteDimension', 'addSheet', 'deleteSheet', 'updateSheetProperties')
+
+    def __init__(self, client: FakeClient, data: Dict[str, List[List]]):
+        self.client = client
+        self.lock = threading.RLock()
+        self._tabs = {}  # title -> FakeWorksheet
+        self._next_id = 0
+        for title, rows in data.items():
+            self._add(title, rows)
+
+    def _add(self, title: str, rows: List[List], grid_rows: int = DEFAULT_GRID_ROWS) -> 'FakeWorksheet':
+        sheet = FakeWorksheet(self, title, self._next_id, rows, grid_rows)
+        self._tabs[title] = sheet
+        self._next_id += 1
+        return sheet
+
+    def _request(self, method: str, path: str, apply: Callable = None):
+        return self.client.request(method, f"{SPREADSHEETS_URL}/{self.id}{path}", apply=apply).result
+
+    def _values(self, range_name: str) -> List[List[str]]:
+        title, cells = _split_range(range_name)
+        sheet = self._tabs.get(title)
+        if sheet is None:
+            # Google không báo "không có tab" mà báo không parse được range
+            raise invalid_argument(f"Unable to parse range: {range_name}")
+        return sheet._read(cells)
+
+    def worksheet_by_title(self, title: str) -> 'FakeWorksheet':
+        """Tab theo tên (không tính là request)"""
+        sheet = self._tabs.get(title)
+        if sheet is None:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return sheet
+
+    # ==================== SPREADSHEET API ====================
+
+    def worksheets(self) -> List['FakeWorksheet']:
+        return self._request('GET', '', lambda: list(self._tabs.values()))
+
+    def worksheet(self, title: str) -> 'FakeWorksheet':
+        return self._request('GET', '', lambda: self.worksheet_by_title(title))
+
+    def add_worksheet(self, title: str, rows: int = DEFAULT_GRID_ROWS, cols: int = 26) -> 'FakeWorksheet':
+        return self._request('POST', ':batchUpdate', lambda: self._add(title, [], int(rows)))
+
+    def values_batch_get(self, ranges: List[str], params: Dict = None) -> Dict:
+        def apply():
+            return {
+                'spreadsheetId': self.id,
+                'valueRanges': [{'range': r, 'values': self._values(r)} for r in ranges],
+            }
+        return self._request('GET', '/values:batchGet', apply)
+
+    def batch_update(self, body: Dict) -> Dict:
+        """
+        Các request spreadsheets.batchUpdate mà bot/gspread gửi: deleteDimension (ROWS),
+        addSheet, deleteSheet, updateSheetProperties (title). Loại khác → APIError 400
+        như request không hợp lệ, không tab nào bị đổi (API chạy cả batch hoặc không gì).
+        """
+        batch = body.get('requests', [])
+        for i, request in enumerate(batch):
+            kind = next(iter(request), '')
+            if kind not in self._BATCH_REQUESTS:
+                raise invalid_argument(f"Invalid requests[{i}]: {kind!r} không được Fake Sheets hỗ trợ")
+
+        def apply():
+            by_id = {sheet.id: sheet for sheet in self._tabs.values()}
+            for i, request in enumerate(batch):
+                for kind, params in request.items():
+                    grid = params.get('range', params.get('properties', params))
+                    if kind != 'addSheet' and grid.get('sheetId') not in by_id:
+                        raise invalid_argument(f"Invalid requests[{i}].{kind}: No grid with id: {grid.get('sheetId')}")
+            replies = [{} for _ in batch]
+            # Xóa dòng từ dưới lên: index của request sau không bị lệch bởi request trước
+            deletes = [params['range'] for request in batch for kind, params in request.items()
+                       if kind == 'deleteDimension']
+            for grid in sorted(deletes, key=lambda g: -g['startIndex']):
+                by_id[grid['sheetId']]._delete(grid['startIndex'], grid['endIndex'])
+            for i, request in enumerate(batch):
+                for kind, params in request.items():
+                    if kind == 'addSheet':
+                        properties = params.get('properties', {})
+                        grid = properties.get('gridProperties', {})
+                        sheet = self._add(properties['title'], [], int(grid.get('rowCount', DEFAULT_GRID_ROWS)))
+                        replies[i] = {'addSheet': {'properties': {'sheetId': sheet.id, 'title': sheet.title}}}
+                    elif kind == 'deleteSheet':
+                        del self._tabs[by_id[params['sheetId']].title]
+                    elif kind == 'updateSheetProperties' and 'title' in params['properties']:
+                        sheet = by_id[params['properties']['sheetId']]
+                        del self._tabs[sheet.title]
+                        sheet.title = params['properties']['title']
+                        self._tabs[sheet.title] = sheet
+            return {'spreadsheetId': self.id, 'replies': replies}
+        return self._request('POST', ':batchUpdate', apply)
+
+
+class FakeWorksheet:
+    """Thay cho gspread.Worksheet"""
+
+    def __init__(self, spreadsheet: FakeSpreadsheet, title: str, sheet_id: int,
+                 rows: List[List], grid_rows: int = DEFAULT_GRID_ROWS):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = sheet_id
+        self._rows = [[_cell(value) for value in row] for row in rows]
+        self._grid_rows = max(grid_rows, len(self._rows))
+
+    def __repr__(self) -> str:
+        return f"<FakeWorksheet {self.title!r} id:{self.id}>"
+
+    @property
+    def row_count(self) -> int:
+        return self._grid_rows
+
+    @property
+    def col_count(self) -> int:
+        return max((len(row) for row in self._rows), default=26)
+
+    def _request(self, method: str, cells: str, action: str = '', apply: Callable = None):
+        range_name = f"'{self.title}'!{cells}" if cells else self.title
+
+        def checked():
+            if self.spreadsheet._tabs.get(self.title) is not self:
+                raise invalid_argument(f"Unable to parse range: {range_name}")
+            return apply()
+        return self.spreadsheet._request(method, f"/values/{quote(range_name, safe='')}{action}", checked)
+
+    # ==================== STORAGE ====================
+
+    def _read(self, cells: Optional[str]) -> List[List[str]]:
+        """Giá trị của range A1 (None = cả tab), đã bỏ ô/dòng trống cuối"""
+        if not cells:
+            return _trim(self._rows)
+        grid = a1_range_to_grid_range(cells)
+        top = grid.get('startRowIndex', 0)
+        bottom = grid.get('endRowIndex', len(self._rows))
+        left = grid.get('startColumnIndex', 0)
+        right = grid.get('endColumnIndex')
+        return _trim([row[left:right] for row in self._rows[top:bottom]])
+
+    def _write(self, row: int, col: int, value):
+        while len(self._rows) < row:
+            self._rows.append([])
+        cells = self._rows[row - 1]
+        while len(cells) < col:
+            cells.append('')
+        cells[col - 1] = _cell(value)
+        self._grid_rows = max(self._grid_rows, len(self._rows))
+
+    def _append(self, rows: List[List]) -> Dict:
+        """Thêm sau dòng có dữ liệu cuối cùng (giống values.append)"""
+        last = len(_trim(self._rows))
+        del self._rows[last:]
+        self._rows.extend([_cell(value) for value in row] for row in rows)
+        self._grid_rows = max(self._grid_rows, len(self._rows))
+        end = rowcol_to_a1(len(self._rows), max((len(row) for row in rows), default=1))
+        return {'updates': {'updatedRange': f"'{self.title}'!A{last + 1}:{end}", 'updatedRows': len(rows)}}
+
+    def _delete(self, start: int, end: int):
+        """Xóa dòng [start, end) (index từ 0), lưới co lại tương ứng"""
+        del self._rows[start:end]
+        self._grid_rows = max(len(self._rows), self._grid_rows - (end - start))
+
+    # ==================== WORKSHEET API ====================
+
+    def get_all_values(self, **kwargs) -> List[List[str]]:
+        def apply():
+            rows = _trim(self._rows)
+            width = max((len(row) for row in rows), default=0)
+            return [row + [''] * (width - len(row)) for row in rows]
+        return self._request('GET', '', apply=apply)
+
+    def get_all_records(self, head: int = 1, default_blank='', empty2zero: bool = False, **kwargs) -> List[Dict]:
+        values = self.get_all_values()
+        if len(values) < head:
+            return []
+        header = values[head - 1]
+        if len(set(header)) != len(header):
+            raise gspread.exceptions.GSpreadException("the header row in the worksheet is not unique")
+        return [
+            dict(zip(header, (numericise(value, empty2zero, default_blank) for value in row)))
+            for row in values[head:]
+        ]
+
+    def get(self, range_name: str = None, **kwargs) -> List[List[str]]:
+        return self._request('GET', range_name or '', apply=lambda: self._read(range_name))
+
+    def row_values(self, row: int, **kwargs) -> List[str]:
+        return self._request('GET', f"{row}:{row}", apply=lambda: (self._read(f"{row}:{row}") or [[]])[0])
+
+    def cell(self, row: int, col: int, **kwargs) -> Cell:
+        a1 = rowcol_to_a1(row, col)
+        values = self._request('GET', a1, apply=lambda: self._read(a1))
+        return Cell(row, col, values[0][0] if values and values[0] else '')
+
+    def append_row(self, values: List, value_input_option: str = 'RAW', **kwargs) -> Dict:
+        return self.append_rows([values], value_input_option=value_input_option)
+
+    def append_rows(self, values: List[List], value_input_option: str = 'RAW', **kwargs) -> Dict:
+        rows = [[_entered(value, value_input_option) for value in row] for row in values]
+        return self._request('POST', 'A1', ':append', apply=lambda: self._append(rows))
+
+    def update_cell(self, row: int, col: int, value) -> Dict:
+        # gspread update_cell luôn gửi USER_ENTERED
+        def apply():
+            self._write(row, col, _entered(value, 'USER_ENTERED'))
+            return {'updatedCells': 1}
+        return self._request('PUT', rowcol_to_a1(row, col), apply=apply)
+
+    def batch_update(self, data: List[Dict], value_input_option: str = 'RAW', **kwargs) -> Dict:
+        def apply():
+            for update in data:
+                _, cells = _split_range(update['range'])
+                grid = a1_range_to_grid_range(cells or update['range'])
+                top, left = grid.get('startRowIndex', 0), grid.get('startColumnIndex', 0)
+                for i, row in enumerate(update['values']):
+                    for j, value in enumerate(row):
+                        self._write(top + i + 1, left + j + 1, _entered(value, value_input_option))
+            return {'totalUpdatedCells': sum(len(row) for update in data for row in update['values'])}
+        return self.spreadsheet._request('POST', '/values:batchUpdate', apply)
+
+    def delete_rows(self, start_index: int, end_index: int = None) -> Dict:
+        end_index = end_index or start_index
+        return self.spreadsheet.batch_update({'requests': [{'deleteDimension': {'range': {
+            'sheetId': self.id, 'dimension': 'ROWS', 'startIndex': start_index - 1, 'endIndex': end_index,
+        }}}]})
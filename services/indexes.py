@@ -0,0 +1,447 @@
+"""
+In-memory Indexes - Tra cứu nhanh trên records đã cache
+"""
+
+import bisect
+import heapq
+import threading
+import time
+import unicodedata
+from collections import Counter
+from itertools import chain
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def fold_text(text) -> str:
+    """Chuẩn hóa text để tìm kiếm: bỏ dấu tiếng Việt, đ → d, chữ thường, gộp khoảng trắng"""
+    text = unicodedata.normalize('NFD', str(text))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    return ' '.join(text.casefold().split())
+
+
+def _trigrams(folded: str) -> set:
+    """Trigram theo từng từ, có đệm 2 bên ("  ao", " ao", "ao ") để ưu tiên khớp đầu từ"""
+    grams = set()
+    for word in folded.split():
+        padded = f"  {word} "
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+def _query_trigrams(folded: str) -> set:
+    """
+    Trigram của câu tìm kiếm:
+    - Từ đầu (>= 3 ký tự) không đệm đầu → khớp cả giữa từ ("hun" trong "thun")
+    - Từ cuối không đệm cuối → tìm theo prefix khi đang gõ dở
+    """
+    words = folded.split()
+    grams = set()
+    for i, word in enumerate(words):
+        padded = word if i == 0 and len(word) >= 3 else '  ' + word
+        if i < len(words) - 1:
+            padded += ' '
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+def _sku_key(sku) -> str:
+    """Chuẩn hóa SKU để so sánh không phân biệt hoa/thường"""
+    return str(sku).strip().casefold()
+
+
+class SkuIndex:
+    """
+    Index SKU → Product, tra cứu O(1).
+    - Build 1 lần từ records Products đã cache (sync)
+    - Build lại khi cache tải records mới (list records khác object cũ)
+    - add/update/remove sửa index tại chỗ, không cần tải lại sheet
+    """
+
+    def __init__(self):
+        self._by_sku = {}
+        self._source = None
+        self._lock = threading.Lock()
+
+    def sync(self, records: List[Dict], to_product: Callable[[int, Dict], Dict]):
+        """Build lại index nếu records khác lần build trước"""
+        with self._lock:
+            if records is self._source:
+                return
+            by_sku = {}
+            for row_num, record in enumerate(records, start=2):  # row 1 là header
+                product = to_product(row_num, record)
+                # SKU trùng → giữ dòng đầu tiên (giống cách dò tuyến tính cũ)
+                by_sku.setdefault(_sku_key(product['sku']), product)
+            self._by_sku = by_sku
+            self._source = records
+
+    def get(self, sku: str) -> Optional[Dict]:
+        with self._lock:
+            product = self._by_sku.get(_sku_key(sku))
+            return product.copy() if product else None
+
+    def add(self, product: Dict):
+        with self._lock:
+            self._by_sku.setdefault(_sku_key(product['sku']), product.copy())
+
+    def update(self, sku: str, fields: Dict):
+        with self._lock:
+            product = self._by_sku.get(_sku_key(sku))
+            if product:
+                product.update(fields)
+
+    def remove(self, sku: str):
+        """Xóa SKU, các sản phẩm ở dòng dưới dồn lên 1 dòng"""
+        with self._lock:
+            product = self._by_sku.pop(_sku_key(sku), None)
+            if not product:
+                return
+            for p in self._by_sku.values():
+                if p['row'] > product['row']:
+                    p['row'] -= 1
+
+    def __len__(self) -> int:
+        return len(self._by_sku)
+
+
+class NameIndex:
+    """
+    Index tên sản phẩm (đã bỏ dấu) → tìm kiếm xếp hạng top-K.
+    - Chỉ lưu SKU + tên đã chuẩn hóa; product đầy đủ lấy từ SkuIndex
+    - Thứ tự kết quả: trùng khớp → bắt đầu bằng query (list tên đã sort + bisect)
+      → chứa query (giao posting trigram) → gần đúng (đếm trigram khớp)
+    - Mỗi bước dừng ngay khi đủ limit kết quả, không chấm điểm toàn bộ catalog
+    """
+
+    # Bỏ qua trigram quá phổ biến khi tìm gần đúng (ít giá trị phân biệt, tốn thời gian)
+    FUZZY_MAX_POSTING = 2000
+
+    def __init__(self):
+        self._names = {}     # id -> (sku_key, folded name)
+        self._ids = {}       # sku_key -> id
+        self._sorted = []    # [(folded name, id)] đã sort, cho tìm theo prefix
+        self._postings = {}  # trigram -> set(id)
+        self._next_id = 0
+        self._source = None
+        self._lock = threading.Lock()
+
+    def sync(self, records: List[Dict], to_product: Callable[[int, Dict], Dict]):
+        """Build lại index nếu records khác lần build trước"""
+        with self._lock:
+            if records is self._source:
+                return
+            self._names, self._ids, self._sorted, self._postings = {}, {}, [], {}
+            for row_num, record in enumerate(records, start=2):
+                product = to_product(row_num, record)
+                self._add(product['sku'], product['name'], keep_sorted=False)
+            self._sorted.sort()
+            self._source = records
+
+    def _add(self, sku, name, keep_sorted: bool = True):
+        key = _sku_key(sku)
+        if key in self._ids:
+            return
+        item_id = self._next_id
+        self._next_id += 1
+        folded = fold_text(name)
+        self._names[item_id] = (key, folded)
+        self._ids[key] = item_id
+        if keep_sorted:
+            bisect.insort(self._sorted, (folded, item_id))
+        else:
+            self._sorted.append((folded, item_id))
+        for gram in _trigrams(folded):
+            self._postings.setdefault(gram, set()).add(item_id)
+
+    def _remove(self, sku):
+        item_id = self._ids.pop(_sku_key(sku), None)
+        if item_id is None:
+            return
+        _, folded = self._names.pop(item_id)
+        pos = bisect.bisect_left(self._sorted, (folded, item_id))
+        if pos < len(self._sorted) and self._sorted[pos][1] == item_id:
+            del self._sorted[pos]
+        for gram in _trigrams(folded):
+            ids = self._postings.get(gram)
+            if ids:
+                ids.discard(item_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def add(self, sku, name):
+        with self._lock:
+            self._add(sku, name)
+
+    def update(self, sku, name):
+        with self._lock:
+            self._remove(sku)
+            self._add(sku, name)
+
+    def remove(self, sku):
+        with self._lock:
+            self._remove(sku)
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> List[str]:
+        """
+        Trả về tối đa limit SKU (đã chuẩn hóa) xếp hạng theo độ khớp.
+        fuzzy=False: chỉ lấy kết quả chứa nguyên chuỗi query (giống tìm substring cũ).
+        """
+        folded = fold_text(query)
+        if not folded or limit <= 0:
+            return []
+
+        with self._lock:
+            found = []
+            seen = set()
+
+            # 1-2. Trùng khớp + bắt đầu bằng query (tên trùng đứng đầu khoảng bisect)
+            pos = bisect.bisect_left(self._sorted, (folded,))
+            while pos < len(self._sorted) and len(found) < limit:
+                name, item_id = self._sorted[pos]
+                if not name.startswith(folded):
+                    break
+                found.append(item_id)
+                seen.add(item_id)
+                pos += 1
+
+            # 3. Chứa query: ứng viên phải có đủ mọi trigram của query
+            grams = _query_trigrams(folded)
+            postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+            reordered = []  # đủ trigram nhưng không liền chuỗi (vd. đảo thứ tự từ)
+            if len(found) < limit and postings and postings[0]:
+                # Duyệt posting nhỏ nhất, kiểm tra các posting còn lại (dừng sớm khi đủ)
+                for item_id in postings[0]:
+                    if item_id in seen or not all(item_id in ids for ids in postings[1:]):
+                        continue
+                    if folded in self._names[item_id][1]:
+                        found.append(item_id)
+                        seen.add(item_id)
+                        if len(found) >= limit:
+                            break
+                    elif fuzzy:
+                        reordered.append(item_id)
+
+            # 4. Gần đúng
+            if fuzzy and len(found) < limit:
+                found.extend(reordered[:limit - len(found)])
+                seen.update(reordered)
+            if fuzzy and len(found) < limit:
+                counts = Counter(chain.from_iterable(
+                    ids for ids in postings if len(ids) <= self.FUZZY_MAX_POSTING
+                ))
+                best = heapq.nlargest(
+                    limit, ((n, i) for i, n in counts.items() if i not in seen)
+                )
+                found.extend(i for _, i in best[:limit - len(found)])
+
+            return [self._names[i][0] for i in found]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+class DateIndex:
+    """
+    Index ngày (chuỗi 'dd/mm/yyyy' trong cột Date) → list row number.
+    Tra 1 ngày là O(1) dù sheet có hàng trăm nghìn dòng.
+    - Build từ records đã cache (sync), build lại khi cache tải records mới
+    - add() khi ghi dòng mới, remove() khi xóa dòng (các dòng dưới dồn lên)
+    """
+
+    def __init__(self, column: str = 'Date'):
+        self.column = column
+        self._rows = {}  # date -> [row_num]
+        self._source = None
+        self._lock = threading.Lock()
+
+    def sync(self, records: List[Dict]):
+        """Build lại index nếu records khác lần build trước"""
+        with self._lock:
+            if records is self._source:
+                return
+            rows = {}
+            for row_num, record in enumerate(records, start=2):  # row 1 là header
+                rows.setdefault(str(record.get(self.column, '')), []).append(row_num)
+            self._rows = rows
+            self._source = records
+
+    def rows(self, date: str) -> List[int]:
+        with self._lock:
+            return list(self._rows.get(date, ()))
+
+    def add(self, date: str, row_num: int):
+        with self._lock:
+            bisect.insort(self._rows.setdefault(date, []), row_num)
+
+    def remove(self, row_num: int):
+        """Xóa 1 dòng, các dòng phía dưới giảm row number đi 1"""
+        with self._lock:
+            for date, rows in list(self._rows.items()):
+                shifted = [r - 1 if r > row_num else r for r in rows if r != row_num]
+                if shifted:
+                    self._rows[date] = shifted
+                else:
+                    del self._rows[date]
+
+    def discard(self, row_num: int):
+        """Bỏ 1 dòng khỏi index (dòng đánh dấu xóa), các dòng khác giữ nguyên row number"""
+        with self._lock:
+            for date, rows in list(self._rows.items()):
+                if row_num in rows:
+                    rows.remove(row_num)
+                    if not rows:
+                        del self._rows[date]
+
+    def dates(self) -> List[str]:
+        with self._lock:
+            return list(self._rows)
+
+
+class RowIdIndex:
+    """
+    Index ID (cột ID, ghi lúc thêm dòng) → row number hiện tại.
+    ID không đổi khi xóa dòng phía trên; index chỉ dồn row number (remove),
+    không cần tải lại sheet.
+    """
+
+    def __init__(self, column: str = 'ID'):
+        self.column = column
+        self._rows = {}      # id -> row_num
+        self.missing = []    # row number của các dòng có dữ liệu nhưng chưa có ID
+        self.max_id = 0
+        self._source = None
+        self._lock = threading.Lock()
+
+    def sync(self, records: List[Dict]):
+        """Build lại index nếu records khác lần build trước"""
+        with self._lock:
+            if records is self._source:
+                return
+            rows, missing = {}, []
+            for row_num, record in enumerate(records, start=2):  # row 1 là header
+                row_id = record.get(self.column, '')
+                if isinstance(row_id, int):
+                    rows.setdefault(row_id, row_num)
+                elif any(str(v).strip() for v in record.values()):
+                    missing.append(row_num)
+            self._rows = rows
+            self.missing = missing
+            self.max_id = max(self.max_id, max(rows, default=0))
+            self._source = records
+
+    def row(self, row_id: int) -> Optional[int]:
+        with self._lock:
+            return self._rows.get(row_id)
+
+    def add(self, row_id: int, row_num: int):
+        with self._lock:
+            self._rows[row_id] = row_num
+            self.max_id = max(self.max_id, row_id)
+
+    def remove(self, row_num: int):
+        """Xóa 1 dòng, các dòng phía dưới giảm row number đi 1"""
+        with self._lock:
+            self._rows = {
+                row_id: r - 1 if r > row_num else r
+                for row_id, r in self._rows.items() if r != row_num
+            }
+            self.missing = [r - 1 if r > row_num else r for r in self.missing if r != row_num]
+
+    def discard(self, row_num: int):
+        """Bỏ 1 dòng khỏi index (dòng đánh dấu xóa), các dòng khác giữ nguyên row number"""
+        with self._lock:
+            self._rows = {row_id: r for row_id, r in self._rows.items() if r != row_num}
+
+
+class DayLocator:
+    """
+    Cột Day (ISO 'yyyy-mm-dd') theo thứ tự dòng → khoảng row number của 1 ngày/tháng.
+    Dòng được ghi theo thứ tự thời gian nên cột tăng dần → tìm bằng bisect, O(log n).
+    - Dòng trống lấy Day của dòng phía trên (giữ thứ tự tăng dần)
+    - Cột không tăng dần (ghi bù ngày cũ, sửa tay) → sorted = False, không dùng được
+    - Sheet có thể bị sửa tay sau khi tải → quá TTL (is_fresh) thì đối chiếu lại (matches)
+    """
+
+    def __init__(self):
+        self._days = []  # _days[i] = Day của row i + 2
+        self.loaded = False
+        self.sorted = True
+        self.loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, days: List[str]):
+        with self._lock:
+            self._days = []
+            self.sorted = True
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+            for day in days:
+                self._append(day)
+
+    def reset(self):
+        with self._lock:
+            self._days = []
+            self.loaded = False
+            self.sorted = True
+
+    def is_fresh(self, ttl: float) -> bool:
+        """Đã tải/đối chiếu với sheet trong ttl giây gần đây (ttl <= 0 → luôn phải đối chiếu)"""
+        return self.loaded and ttl > 0 and time.monotonic() - self.loaded_at < ttl
+
+    def matches(self, days: List[str]) -> bool:
+        """
+        Cột Day vừa đọc lại từ sheet giống cột đang giữ (dòng trống tính như load()).
+        Khớp → đánh dấu vừa đối chiếu; lệch (dòng thêm/xóa/sửa tay) → caller load lại.
+        """
+        filled, last = [], ''
+        for day in days:
+            last = str(day).strip() or last
+            filled.append(last)
+        with self._lock:
+            if filled != self._days:
+                return False
+            self.loaded_at = time.monotonic()
+            return True
+
+    def _append(self, day: str):
+        last = self._days[-1] if self._days else ''
+        day = str(day).strip() or last
+        if day < last:
+            self.sorted = False
+        self._days.append(day)
+
+    def append(self, day: str):
+        """Dòng mới ở cuối sheet (bỏ qua nếu chưa load)"""
+        with self._lock:
+            if self.loaded:
+                self._append(day)
+
+    def remove(self, row_num: int):
+        """Xóa 1 dòng, các dòng phía dưới giảm row number đi 1"""
+        with self._lock:
+            if self.loaded and 0 <= row_num - 2 < len(self._days):
+                del self._days[row_num - 2]
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded and self.sorted
+
+    def span(self, first_day: str, last_day: str) -> Optional[Tuple[int, int]]:
+        """(row đầu, row cuối) của các dòng có first_day <= Day <= last_day, None nếu không có"""
+        with self._lock:
+            start = bisect.bisect_left(self._days, first_day)
+            end = bisect.bisect_right(self._days, last_day)
+            if start >= end:
+                return None
+            return start + 2, end + 1
+
+    def count(self, first_day: str, last_day: str) -> int:
+        """Số dòng có first_day <= Day <= last_day (cột không tăng dần thì đếm tuần tự)"""
+        with self._lock:
+            if self.sorted:
+                return max(0, bisect.bisect_right(self._days, last_day) - bisect.bisect_left(self._days, first_day))
+            return sum(1 for day in self._days if first_day <= day <= last_day)
@@ -0,0 +1,210 @@
+"""
+Metrics - Đo từng request ra ngoài (Google Sheets API, PayOS)
+Mỗi request ghi: số lần, lỗi, độ trễ (histogram), bytes response; gắn tag
+hàm service đã gọi và handler Telegram đã kích hoạt.
+- Xem trong process: query(api=..., handler=...) / stats()
+- Ghi ra file khi cần: dump() → JSON (mặc định config.METRICS_PATH)
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import config
+
+# Cận trên các bucket độ trễ (giây), bucket cuối = lớn hơn
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local = threading.local()
+
+
+# ==================== TAGS ====================
+
+
+@contextmanager
+def tagged(service: str = None, handler: str = None):
+    """Gắn tag cho mọi request trong khối này (thread hiện tại)"""
+    previous = (getattr(_local, 'service', None), getattr(_local, 'handler', None))
+    _local.service = service or previous[0]
+    _local.handler = handler or previous[1]
+    try:
+        yield
+    finally:
+        _local.service, _local.handler = previous
+
+
+def caller_handler() -> str:
+    """Tên handler Telegram (hàm trong package handlers) đang gọi xuống, '' nếu không có"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_globals.get('__name__', '').startswith('handlers.'):
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return ''
+
+
+def current_tags(service: str = None) -> Tuple[str, str]:
+    """(service, handler) của request đang chạy: tag đã gắn → service truyền vào/tên thread"""
+    return (
+        getattr(_local, 'service', None) or service or threading.current_thread().name,
+        getattr(_local, 'handler', None) or caller_handler(),
+    )
+
+
+# ==================== REGISTRY ====================
+
+
+class Metrics:
+    """Series theo (api, operation, service, handler)"""
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def record(self, api: str, operation: str, seconds: float, size: int = 0,
+               error: bool = False, service: str = '', handler: str = ''):
+        key = (api, operation, service, handler)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    'count': 0, 'errors': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'bytes': 0,
+                    'histogram': [0] * (len(LATENCY_BUCKETS) + 1),
+                }
+            series['count'] += 1
+            series['errors'] += int(error)
+            series['seconds'] += seconds
+            series['max_seconds'] = max(series['max_seconds'], seconds)
+            series['bytes'] += size
+            series['histogram'][_bucket(seconds)] += 1
+
+    def query(self, api: str = None, operation: str = None,
+              service: str = None, handler: str = None) -> List[Dict]:
+        """Các series khớp bộ lọc (None = không lọc), nhiều request nhất trước"""
+        wanted = (api, operation, service, handler)
+        with self._lock:
+            rows = [
+                _row(key, series) for key, series in self._series.items()
+                if all(w is None or w == k for w, k in zip(wanted, key))
+            ]
+        return sorted(rows, key=lambda r: -r['count'])
+
+    def stats(self) -> Dict:
+        """Tổng theo api"""
+        totals = {}
+        for row in self.query():
+            api = totals.setdefault(row['api'], {'count': 0, 'errors': 0, 'seconds': 0.0, 'bytes': 0})
+            for field in api:
+                api[field] += row[field]
+        return totals
+
+    def dump(self, path: str = None) -> str:
+        """Ghi toàn bộ series ra file JSON, return đường dẫn"""
+        path = path or config.METRICS_PATH
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        data = {
+            'started': self.started,
+            'dumped': time.time(),
+            'latency_buckets': list(LATENCY_BUCKETS),
+            'series': self.query(),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self.started = time.time()
+
+
+def _bucket(seconds: float) -> int:
+    for i, bound in enumerate(LATENCY_BUCKETS):
+        if seconds <= bound:
+            return i
+    return len(LATENCY_BUCKETS)
+
+
+def _row(key: Tuple, series: Dict) -> Dict:
+    api, operation, service, handler = key
+    return {
+        'api': api, 'operation': operation, 'service': service, 'handler': handler,
+        **series,
+        'histogram': list(series['histogram']),
+        'avg_ms': round(series['seconds'] / series['count'] * 1000, 1),
+    }
+
+
+registry = Metrics()
+
+
+# ==================== INSTRUMENTATION ====================
+
+
+@contextmanager
+def measure(api: str, operation: str, service: str = None):
+    """
+    Đo 1 request: with measure('payos', 'payment-requests.get') as sample: ...
+    Gán sample['bytes'] = kích thước response, sample['error'] = True nếu lỗi không raise.
+    METRICS_ENABLED=false → chỉ chạy khối lệnh, không đo/ghi gì.
+    """
+    sample = {'bytes': 0, 'error': False}
+    if not config.METRICS_ENABLED:
+        yield sample
+        return
+    start = time.perf_counter()
+    try:
+        yield sample
+    except Exception:
+        sample['error'] = True
+        raise
+    finally:
+        registry.record(
+            api, operation, time.perf_counter() - start, sample['bytes'], sample['error'],
+            *current_tags(service)
+        )
+
+
+def _sheets_operation(method: str, endpoint: str) -> str:
+    """Endpoint Sheets API → tên thao tác (values.get, values.append, batchUpdate, metadata...)"""
+    path = endpoint.split('?')[0]
+    last = path.rsplit('/', 1)[-1]
+    in_values = '/values' in path
+    name, colon, action = last.rpartition(':')
+    if colon and action.isalpha() and action[0].islower():  # ...:append, ...:batchGet (không phải A1:Z)
+        return f"values.{action}" if in_values or name == 'values' else action
+    if in_values:
+        return 'values.get' if method.upper() == 'GET' else 'values.update'
+    return 'metadata' if method.upper() == 'GET' else method.lower()
+
+
+def wrap_sheets_http(request: Callable) -> Callable:
+    """Bọc client.request(method, endpoint, ...) của gspread để đo mọi request Sheets"""
+    @functools.wraps(request)
+    def measured(method, endpoint, *args, **kwargs):
+        with measure('sheets', _sheets_operation(str(method), str(endpoint))) as sample:
+            response = request(method, endpoint, *args, **kwargs)
+            sample['bytes'] = len(getattr(response, 'content', b'') or b'')
+            return response
+    return measured
+
+
+def query(api: str = None, operation: str = None, service: str = None,
+          handler: str = None) -> List[Dict]:
+    return registry.query(api, operation, service, handler)
+
+
+def stats() -> Dict:
+    return registry.stats()
+
+
+def dump(path: Optional[str] = None) -> str:
+    return registry.dump(path)
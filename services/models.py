@@ -0,0 +1,141 @@
+"""
+Models - Kiểu dữ liệu trả về của service: Product, Sale, Expense, Debt
+Mỗi dòng là 1 object __slots__ (không có __dict__) → nhẹ hơn dict nhiều trên sheet lớn.
+Vẫn đọc được như dict (x['sku'], x.get('note'), 'id' in x, dict(x)) để handler
+và context.user_data dùng như cũ. Field không được gán = key không có trong dict.
+Cache giữ luôn các object này (ColumnMap tạo 1 lần lúc tải sheet; Sales/Expenses giữ dạng cột
+trong ColumnStore, object tạo khi đọc tới dòng đó); code trong sheets.py
+đọc/ghi bằng tên cột trên sheet (x['Qty'] = x['quantity']), caller nhận bản sao at(row).
+"""
+
+from typing import Dict
+
+
+class Record:
+    """Base: truy cập kiểu dict trên các field __slots__ đã gán"""
+
+    __slots__ = ()
+    # Tên cột trên sheet → field (cột không có ở đây không được tải vào cache)
+    COLUMNS: Dict[str, str] = {}
+    # Giá trị trả về cho caller khi sheet thiếu cột của field đó
+    DEFAULTS: Dict = {}
+    # Mutable như dict → không hash được (cố ý, giống dict)
+    __hash__ = None
+
+    def __init__(self, **fields):
+        for key, value in fields.items():
+            setattr(self, key, value)  # Field ngoài __slots__ → AttributeError
+
+    @classmethod
+    def from_columns(cls, row: Dict):
+        """Dict theo tên cột trên sheet → object (bỏ cột không có field)"""
+        return cls(**{cls.COLUMNS[name]: value for name, value in row.items() if name in cls.COLUMNS})
+
+    def _field(self, key):
+        return self.COLUMNS.get(key, key) if isinstance(key, str) else key
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, self._field(key))
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value):
+        setattr(self, self._field(key), value)
+
+    def __contains__(self, key) -> bool:
+        key = self._field(key)
+        return isinstance(key, str) and key in self.__slots__ and hasattr(self, key)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def get(self, key: str, default=None):
+        return getattr(self, self._field(key), default) if isinstance(key, str) else default
+
+    def keys(self):
+        return [key for key in self.__slots__ if hasattr(self, key)]
+
+    def values(self):
+        return [getattr(self, key) for key in self.keys()]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.keys()]
+
+    def update(self, fields: Dict):
+        for key, value in fields.items():
+            self[key] = value
+
+    def copy(self):
+        return type(self)(**dict(self.items()))
+
+    def at(self, row_num: int):
+        """Bản sao trả cho caller (object trong cache dùng chung): gắn row, field thiếu cột → mặc định"""
+        item = type(self)(**{**self.DEFAULTS, **dict(self.items())})
+        item.row = row_num
+        return item
+
+    def to_dict(self) -> Dict:
+        return dict(self.items())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{key}={value!r}" for key, value in self.items())
+        return f"{type(self).__name__}({fields})"
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state: Dict):
+        self.update(state)
+
+
+class Product(Record):
+    __slots__ = ('row', 'sku', 'name', 'cost')
+    COLUMNS = {'SKU': 'sku', 'Name': 'name', 'Cost': 'cost'}
+    DEFAULTS = {'sku': '', 'name': '', 'cost': 0}
+
+
+class Sale(Record):
+    __slots__ = (
+        'id', 'row', 'date', 'sku', 'quantity', 'price', 'cost', 'total_cost',
+        'profit', 'revenue', 'customer', 'note'
+    )
+    COLUMNS = {
+        'ID': 'id', 'Date': 'date', 'SKU': 'sku', 'Qty': 'quantity', 'Price': 'price',
+        'Cost': 'cost', 'Profit': 'profit', 'Customer': 'customer', 'Note': 'note',
+    }
+    DEFAULTS = {
+        'id': '', 'date': '', 'sku': '', 'quantity': 0, 'price': 0, 'cost': 0, 'profit': 0,
+        'customer': '', 'note': '',
+    }
+
+
+class Expense(Record):
+    __slots__ = ('id', 'row', 'date', 'amount', 'description', 'category')
+    COLUMNS = {
+        'ID': 'id', 'Date': 'date', 'Amount': 'amount', 'Description': 'description', 'Category': 'category',
+    }
+    DEFAULTS = {'id': '', 'date': '', 'amount': 0, 'description': '', 'category': ''}
+
+
+class Debt(Record):
+    __slots__ = ('id', 'row', 'date', 'customer', 'amount', 'note', 'status', 'paid_date', 'telegram_id')
+    COLUMNS = {
+        'ID': 'id', 'Date': 'date', 'Customer': 'customer', 'Amount': 'amount', 'Note': 'note',
+        'Status': 'status', 'PaidDate': 'paid_date', 'TelegramID': 'telegram_id',
+    }
+    DEFAULTS = {
+        'id': '', 'date': '', 'customer': '', 'amount': 0, 'note': '', 'status': 'pending',
+        'paid_date': '', 'telegram_id': '',
+    }
+
+    def at(self, row_num: int):
+        debt = super().at(row_num)
+        debt.amount = debt.amount or 0
+        debt.telegram_id = str(debt.telegram_id).strip()
+        return debt
@@ -0,0 +1,366 @@
+"""
+Write-behind Outbox - Hàng đợi ghi dòng mới xuống Google Sheets ở nền
+add_sale/add_expense/add_debt ghi dòng vào journal trên đĩa rồi trả lời ngay;
+thread nền gom các dòng theo worksheet và gửi bằng append_rows (1 request/nhóm).
+- Journal (JSON lines) giữ các dòng chưa gửi → bot khởi động lại vẫn gửi tiếp
+- Gửi lỗi tạm thời (429, 5xx, mạng) → thử lại với backoff (1s, 2s, 4s... tối đa max_backoff)
+- Lỗi gửi lại cũng không qua (400...) → chuyển dòng sang file dead-letter, log lỗi
+- Dòng có thể đã lên sheet (đọc lại từ journal, lần gửi trước lỗi giữa chừng)
+  → bỏ qua nếu ID của dòng đã có trên sheet, không append 2 lần
+- close(): gửi nốt các dòng còn lại trước khi bot dừng
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Số lần đọc lại khi có lần gửi xen giữa, sau đó tạm giữ thread gửi để đọc
+READ_ATTEMPTS = 3
+
+
+def _is_permanent(error: Exception) -> bool:
+    """Lỗi 4xx (range/dữ liệu sai, không có quyền...) trừ 408/429 → gửi lại cũng không qua"""
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status is not None and 400 <= status < 500 and status not in (408, 429)
+
+
+class Outbox:
+    """
+    Outbox các dòng chờ append theo worksheet.
+    append_rows(sheet_name, rows, value_input_option) là hàm gửi thật (gspread).
+    existing_ids(sheet_name) → tập ID đang có trên sheet, dùng trước khi gửi lại dòng
+    chưa chắc đã lên sheet (None = không kiểm tra).
+    Bên đọc sheet dùng read(): không giữ lock trong lúc gửi/đọc, chỉ đọc lại nếu có
+    lần gửi xen giữa → 1 dòng không bị đếm 2 lần (vừa trên sheet vừa trong hàng đợi).
+    enqueue() không chờ gì → vẫn trả lời ngay khi đang gửi.
+    """
+
+    def __init__(self, path: str, append_rows: Callable, batch_delay: float = 1.0,
+                 max_backoff: float = 60.0, existing_ids: Optional[Callable[[str], Set]] = None,
+                 dead_letter_path: Optional[str] = None):
+        self.path = path
+        self.dead_letter_path = dead_letter_path or os.path.splitext(path)[0] + '.failed.jsonl'
+        self._append_rows = append_rows
+        self._existing_ids = existing_ids
+        self.batch_delay = batch_delay
+        self.max_backoff = max_backoff
+        self._send_lock = threading.Lock()  # chỉ 1 luồng gửi tại 1 thời điểm
+        self._entries_lock = threading.Lock()  # giữ _entries + file journal
+        # _sending/_version/_holds: lần gửi đang chạy, số lần bắt đầu/kết thúc gửi, bên đọc đang giữ
+        self._state = threading.Condition(threading.Lock())
+        self._sending = False
+        self._version = 0
+        self._holds = 0
+        self._wakeup = threading.Condition(threading.Lock())
+        self._entries = []  # [{'id', 'sheet', 'row', 'option', 'row_id'}] theo thứ tự ghi
+        self._unconfirmed = set()  # id entry có thể đã lên sheet → kiểm tra ID trước khi gửi
+        self._next_id = 1
+        self._stopping = False
+        self._thread = None
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.duplicates_skipped = 0
+        self.dead_letters = 0
+        self.last_error = None
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._load()
+        if self._entries:
+            self._ensure_thread()
+
+    # ==================== JOURNAL ====================
+
+    def _load(self):
+        """Đọc các dòng chưa gửi từ journal (bỏ qua dòng cuối ghi dở nếu có)"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self._entries.append(entry)
+        if self._entries:
+            self._next_id = max(e['id'] for e in self._entries) + 1
+            # Có thể đã gửi xong nhưng chưa kịp ghi lại journal trước khi bot dừng
+            self._unconfirmed.update(e['id'] for e in self._entries)
+            logger.info(f"Outbox: {len(self._entries)} dòng chưa gửi từ lần chạy trước")
+
+    def _append_journal(self, entry: Dict):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rewrite_journal(self):
+        """Ghi lại journal chỉ còn các dòng chưa gửi (ghi file tạm rồi thay thế)"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self._entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _dead_letter(self, entries: List[Dict], error: Exception):
+        """Chuyển các dòng gửi không được sang file dead-letter, bỏ khỏi hàng đợi"""
+        ids = {e['id'] for e in entries}
+        with self._entries_lock:
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps({**entry, 'error': str(error)}, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries = [e for e in self._entries if e['id'] not in ids]
+            self._rewrite_journal()
+        self._unconfirmed.difference_update(ids)
+        self.dead_letters += len(entries)
+        logger.error(
+            f"Outbox: {len(entries)} dòng {entries[0]['sheet']} bị từ chối, chuyển sang "
+            f"{self.dead_letter_path}: {error}"
+        )
+
+    # ==================== QUEUE ====================
+
+    def enqueue(self, sheet_name: str, row: List, value_input_option: str = 'RAW', row_id=None):
+        """Ghi dòng vào journal (bền trên đĩa) và báo thread nền gửi. row_id: giá trị cột ID của dòng"""
+        with self._entries_lock:
+            entry = {'id': self._next_id, 'sheet': sheet_name, 'row': row, 'option': value_input_option,
+                     'row_id': row_id}
+            self._next_id += 1
+            self._append_journal(entry)
+            self._entries.append(entry)
+        self._ensure_thread()
+        with self._wakeup:
+            self._wakeup.notify()
+
+    def pending(self, sheet_name: Optional[str] = None) -> List[List]:
+        """Các dòng chưa gửi (của 1 sheet hoặc tất cả), theo thứ tự ghi"""
+        with self._entries_lock:
+            return [e['row'] for e in self._entries if sheet_name is None or e['sheet'] == sheet_name]
+
+    def _pending_by(self, sheet_names: Iterable[str]) -> Dict[str, List[List]]:
+        with self._entries_lock:
+            return {name: [e['row'] for e in self._entries if e['sheet'] == name] for name in sheet_names}
+
+    def read(self, fetch: Callable, sheet_names: Iterable[str]) -> Tuple[object, Dict[str, List[List]]]:
+        """
+        (fetch(), {sheet_name: dòng chưa gửi}) nhất quán với nhau: không có lần gửi nào
+        bắt đầu/kết thúc trong lúc fetch → mỗi dòng hoặc đã có trên sheet hoặc còn trong hàng đợi.
+        Không giữ lock trong lúc fetch: các bên đọc chạy song song, thread gửi không phải chờ;
+        chỉ chờ lần gửi đang chạy (nếu có) xong. Gửi xen giữa → đọc lại, quá READ_ATTEMPTS lần
+        thì tạm giữ thread gửi (chưa bắt đầu lần gửi mới) trong lúc đọc.
+        """
+        for _ in range(READ_ATTEMPTS):
+            with self._state:
+                while self._sending:
+                    self._state.wait()
+                version = self._version
+            result = fetch()
+            with self._state:
+                if self._version == version:
+                    return result, self._pending_by(sheet_names)
+
+        with self._state:
+            while self._sending:
+                self._state.wait()
+            self._holds += 1
+        try:
+            result = fetch()
+            return result, self._pending_by(sheet_names)
+        finally:
+            with self._state:
+                self._holds -= 1
+                self._state.notify_all()
+
+    def __len__(self) -> int:
+        with self._entries_lock:
+            return len(self._entries)
+
+    # ==================== FLUSH ====================
+
+    def flush(self, sheet_name: Optional[str] = None) -> int:
+        """
+        Gửi ngay các dòng đang chờ (của 1 sheet hoặc tất cả).
+        Mỗi nhóm liên tiếp cùng sheet + value_input_option = 1 request append_rows.
+        Lỗi không gửi lại được → nhóm được gửi từng dòng, dòng vẫn lỗi vào dead-letter.
+        Return số dòng đã gửi; lỗi tạm thời → raise, các dòng chưa gửi được giữ lại.
+        """
+        with self._send_lock:
+            sent = 0
+            while True:
+                with self._entries_lock:
+                    batch = self._next_batch(sheet_name)
+                if not batch:
+                    break
+                batch = self._skip_sent(batch)
+                if not batch:
+                    continue
+                try:
+                    self._send(batch)
+                    sent += len(batch)
+                except Exception as e:
+                    if not _is_permanent(e):
+                        raise
+                    if len(batch) == 1:
+                        self._dead_letter(batch, e)
+                        continue
+                    # 1 dòng sai làm hỏng cả request → gửi từng dòng, chỉ bỏ đúng dòng sai
+                    for entry in batch:
+                        try:
+                            self._send([entry])
+                            sent += 1
+                        except Exception as single_error:
+                            if not _is_permanent(single_error):
+                                raise
+                            self._dead_letter([entry], single_error)
+            return sent
+
+    @contextmanager
+    def _sending_window(self):
+        """Khoảng dòng có thể lên sheet/rời hàng đợi: bên đọc chờ hoặc đọc lại (xem read())"""
+        with self._state:
+            while self._holds:
+                self._state.wait()
+            self._sending = True
+            self._version += 1
+        try:
+            yield
+        finally:
+            with self._state:
+                self._sending = False
+                self._version += 1
+                self._state.notify_all()
+
+    def _send(self, batch: List[Dict]):
+        """1 request append_rows cho batch; xong thì bỏ batch khỏi hàng đợi + journal"""
+        first = batch[0]
+        with self._sending_window():
+            try:
+                self._append_rows(first['sheet'], [e['row'] for e in batch], first['option'])
+            except Exception as e:
+                if not _is_permanent(e):
+                    # Timeout/lỗi mạng: request có thể đã được ghi → kiểm tra ID trước khi gửi lại
+                    self._unconfirmed.update(entry['id'] for entry in batch)
+                raise
+            self._remove(batch)
+        self.flushed += len(batch)
+        self.batches += 1
+
+    def _remove(self, entries: List[Dict]):
+        ids = {e['id'] for e in entries}
+        with self._entries_lock:
+            self._entries = [e for e in self._entries if e['id'] not in ids]
+            self._rewrite_journal()
+        self._unconfirmed.difference_update(ids)
+
+    def _skip_sent(self, batch: List[Dict]) -> List[Dict]:
+        """Bỏ các dòng chưa chắc đã gửi mà ID đã có trên sheet (gửi rồi, journal chưa kịp cập nhật)"""
+        unconfirmed = [e for e in batch if e['id'] in self._unconfirmed and e.get('row_id') is not None]
+        if not unconfirmed or self._existing_ids is None:
+            return batch
+        existing = self._existing_ids(batch[0]['sheet'])
+        duplicates = [e for e in unconfirmed if e['row_id'] in existing]
+        self._unconfirmed.difference_update(e['id'] for e in unconfirmed)
+        if not duplicates:
+            return batch
+        # Dòng đã nằm trên sheet: bỏ khỏi hàng đợi như 1 lần gửi (bên đọc không đếm 2 lần)
+        with self._sending_window():
+            self._remove(duplicates)
+        self.duplicates_skipped += len(duplicates)
+        logger.info(f"Outbox: bỏ {len(duplicates)} dòng {batch[0]['sheet']} đã có trên sheet")
+        skipped = {e['id'] for e in duplicates}
+        return [e for e in batch if e['id'] not in skipped]
+
+    def _next_batch(self, sheet_name: Optional[str]) -> List[Dict]:
+        """Nhóm dòng liên tiếp đầu tiên cùng sheet + option (giữ thứ tự trong từng sheet)"""
+        entries = [e for e in self._entries if sheet_name is None or e['sheet'] == sheet_name]
+        if not entries:
+            return []
+        first = entries[0]
+        batch = []
+        for e in entries:
+            if e['sheet'] != first['sheet']:
+                continue
+            if e['option'] != first['option']:
+                break
+            batch.append(e)
+        return batch
+
+    def _ensure_thread(self):
+        with self._wakeup:
+            if self._thread is None and not self._stopping:
+                self._thread = threading.Thread(target=self._run, name="sheets-outbox", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        failures = 0
+        while True:
+            with self._wakeup:
+                while not self._stopping and not self._entries:
+                    self._wakeup.wait()
+                if self._stopping:
+                    return
+                # Chờ thêm 1 chút để gom nhiều dòng vào 1 request (hoặc chờ backoff sau lỗi)
+                delay = self.batch_delay if not failures else min(self.max_backoff, 2 ** (failures - 1))
+                wake_at = time.monotonic() + delay
+                while not self._stopping and time.monotonic() < wake_at:
+                    self._wakeup.wait(wake_at - time.monotonic())
+                if self._stopping:
+                    return
+            try:
+                self.flush()
+                failures = 0
+                self.last_error = None
+            except Exception as e:
+                failures += 1
+                self.failures += 1
+                self.last_error = str(e)
+                logger.warning(f"Outbox flush failed ({failures}): {e}")
+
+    def close(self, timeout: float = 30.0):
+        """Dừng thread nền và gửi nốt các dòng còn lại (thử lại đến hết timeout)"""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+        deadline = time.monotonic() + timeout
+        delay = 1.0
+        while len(self):
+            try:
+                self.flush()
+            except Exception as e:
+                self.last_error = str(e)
+                if time.monotonic() + delay > deadline:
+                    logger.error(f"Outbox: còn {len(self)} dòng chưa gửi (giữ trong journal): {e}")
+                    return
+                time.sleep(delay)
+                delay = min(self.max_backoff, delay * 2)
+
+    def stats(self) -> Dict:
+        with self._entries_lock:
+            by_sheet = {}
+            for e in self._entries:
+                by_sheet[e['sheet']] = by_sheet.get(e['sheet'], 0) + 1
+            return {
+                'pending': len(self._entries),
+                'pending_by_sheet': by_sheet,
+                'flushed': self.flushed,
+                'batches': self.batches,
+                'failures': self.failures,
+                'duplicates_skipped': self.duplicates_skipped,
+                'dead_letters': self.dead_letters,
+                'last_error': self.last_error,
+            }
@@ -10,6 +10,8 @@ import time
 import requests
 import logging
 
+from services import metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -102,12 +104,15 @@ class PayOSService:
         # 🔐 TÍNH SIGNATURE SAU KHI CÓ PAYLOAD
         payload["signature"] = self._create_signature(payload)
 
-        response = requests.post(
-            url,
-            json=payload,
-            headers=self._get_headers(),
-            timeout=15,
-        )
+        with metrics.measure("payos", "payment-requests.create", service="create_payment_link") as sample:
+            response = requests.post(
+                url,
+                json=payload,
+                headers=self._get_headers(),
+                timeout=15,
+            )
+            sample["bytes"] = len(response.content)
+            sample["error"] = response.status_code >= 400
 
         try:
             return response.json()
@@ -130,11 +135,14 @@ class PayOSService:
         """
         url = f"{self.BASE_URL}/v2/payment-requests/{order_code}"
 
-        response = requests.get(
-            url,
-            headers=self._get_headers(),
-            timeout=15,
-        )
+        with metrics.measure("payos", "payment-requests.get", service="check_payment_status") as sample:
+            response = requests.get(
+                url,
+                headers=self._get_headers(),
+                timeout=15,
+            )
+            sample["bytes"] = len(response.content)
+            sample["error"] = response.status_code >= 400
 
         try:
             return response.json()
@@ -0,0 +1,171 @@
+"""
+Rate Limiter - Token bucket trước mọi request Google Sheets API
+Google giới hạn số request đọc và ghi mỗi phút (vượt → 429, handler báo "❌ Lỗi").
+- 2 bucket riêng: đọc (GET) và ghi (POST/PUT), nạp lại đều theo quota/phút
+- Hết token → chờ; request của người dùng (handler) được cấp token trước
+  request nền (đồng bộ bản sao, outbox, compaction)
+- Gặp 429 → tạm dừng bucket đó (backoff 1s, 2s, 4s... + jitter) rồi thử lại
+"""
+
+import functools
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+import gspread
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_local = threading.local()
+
+
+@contextmanager
+def interactive():
+    """Đánh dấu request trong khối này là của người dùng (ưu tiên hơn việc nền)"""
+    previous = current_priority()
+    _local.priority = INTERACTIVE
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def current_priority() -> int:
+    return getattr(_local, 'priority', BACKGROUND)
+
+
+def _is_quota_error(error: Exception) -> bool:
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None) == 429
+
+
+class TokenBucket:
+    """
+    Bucket per_minute token, nạp lại per_minute/60 token mỗi giây.
+    Người chờ xếp hàng theo (priority, thứ tự đến): chỉ người đầu hàng được lấy token.
+    """
+
+    def __init__(self, name: str, per_minute: int):
+        self.name = name
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        self._queue = []  # heap [(priority, seq)]
+        self._seq = itertools.count()
+        self.acquired = 0
+        self.waited = 0.0
+        self.pauses = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: int = BACKGROUND):
+        """Lấy 1 token (chờ nếu hết token, đang backoff hoặc có người ưu tiên hơn đang chờ)"""
+        start = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    ready = now >= self._paused_until and self._tokens >= 1
+                    if ready and self._queue[0] == ticket:
+                        self._tokens -= 1
+                        break
+                    delay = max(self._paused_until - now, (1 - self._tokens) / self.rate, 0.01)
+                    self._cond.wait(delay)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+            self.acquired += 1
+            self.waited += time.monotonic() - start
+
+    def pause(self, seconds: float):
+        """Sau 429: không cấp token trong seconds giây, nạp lại từ 0"""
+        with self._cond:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = now
+            self.pauses += 1
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                'per_minute': int(self.capacity),
+                'tokens': round(self._tokens, 2),
+                'queue_depth': len(self._queue),
+                'interactive_waiting': sum(1 for p, _ in self._queue if p == INTERACTIVE),
+                'acquired': self.acquired,
+                'waited_seconds': round(self.waited, 3),
+                'pauses': self.pauses,
+            }
+
+
+class RateLimiter:
+    """
+    Bucket 'read' + 'write'. wrap_http() bọc hàm request của gspread client
+    → mọi request (Worksheet, Spreadsheet, metadata) đều đi qua limiter.
+    """
+
+    def __init__(self, reads_per_minute: int, writes_per_minute: int,
+                 max_retries: int = 5, max_backoff: float = 64.0):
+        self.buckets = {
+            'read': TokenBucket('read', reads_per_minute),
+            'write': TokenBucket('write', writes_per_minute),
+        }
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.retries = 0
+
+    def call(self, kind: str, func: Callable, *args, **kwargs):
+        """Gọi func sau khi lấy token của bucket kind, 429 → backoff và thử lại"""
+        bucket = self.buckets[kind]
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire(current_priority())
+            try:
+                return func(*args, **kwargs)
+            except gspread.exceptions.APIError as e:
+                if not _is_quota_error(e) or attempt == self.max_retries:
+                    raise
+                delay = min(self.max_backoff, 2 ** attempt) + random.uniform(0, 1)
+                logger.warning(f"Sheets quota ({kind}): 429, thử lại sau {delay:.1f}s")
+                bucket.pause(delay)
+                self.retries += 1
+
+    def wrap_http(self, request: Callable) -> Callable:
+        """Bọc client.request(method, endpoint, ...): GET → bucket đọc, còn lại → bucket ghi"""
+        @functools.wraps(request)
+        def limited(method, *args, **kwargs):
+            kind = 'read' if str(method).upper() == 'GET' else 'write'
+            return self.call(kind, request, method, *args, **kwargs)
+        return limited
+
+    def queue_depth(self) -> Dict[str, int]:
+        """Số request đang chờ token theo bucket"""
+        return {kind: bucket.queue_depth() for kind, bucket in self.buckets.items()}
+
+    def stats(self) -> Dict:
+        return {
+            'retries': self.retries,
+            **{kind: bucket.stats() for kind, bucket in self.buckets.items()},
+        }
@@ -0,0 +1,114 @@
+"""
+Record Loader - Chuyển dữ liệu thô (get_all_values) thành records có kiểu
+Chỉ 1 lần get_all_values cho mỗi lần tải sheet (không đọc lại khi header lỗi),
+ép kiểu cột số 1 lần lúc tải thay vì float(...)/int(...) rải rác ở hàm đọc.
+Dòng đã đánh dấu xóa (cột deleted_column có giá trị) được tải thành record rỗng:
+giữ đúng vị trí row number, mọi hàm đọc bỏ qua như dòng trống.
+Kèm các hàm parse ngày/số của 1 ô dùng chung cho sheets, bản sao SQLite và báo cáo.
+"""
+
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+import config
+
+
+def get_local_date() -> str:
+    """Get today's date in Vietnam timezone"""
+    return datetime.now(config.VN_TIMEZONE).strftime('%d/%m/%Y')
+
+
+def parse_date_key(value) -> Optional[Tuple[int, int, int]]:
+    """'dd/mm/yyyy' → (year, month, day), None nếu không hợp lệ"""
+    try:
+        day, month, year = (int(p) for p in str(value).strip().split('/'))
+        date(year, month, day)  # Kiểm tra ngày hợp lệ
+        return year, month, day
+    except (ValueError, TypeError):
+        return None
+
+
+def iso_day(value) -> str:
+    """'dd/mm/yyyy' → 'yyyy-mm-dd' (sort theo chuỗi = sort theo ngày), '' nếu không hợp lệ"""
+    key = parse_date_key(value)
+    return f"{key[0]:04d}-{key[1]:02d}-{key[2]:02d}" if key else ''
+
+
+def to_number(value) -> float:
+    """Giá trị số của 1 ô (ô trống/không phải số → 0)"""
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(str(value).replace(',', ''))
+    except ValueError:
+        return 0
+
+
+def parse_number(value):
+    """
+    Ô số → int/float ('1,200' → 1200, '2.5' → 2.5).
+    Ô trống giữ nguyên '' (phân biệt dòng trống với giá trị 0), chữ giữ nguyên chuỗi.
+    """
+    if isinstance(value, (int, float)):
+        return value
+    text = str(value).strip().replace(',', '')
+    if not text:
+        return ''
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return value
+
+
+def is_blank(record: Dict) -> bool:
+    """Record của dòng trống (hoặc dòng đã đánh dấu xóa)"""
+    return not any(str(v).strip() for v in record.values())
+
+
+class ColumnMap:
+    """
+    Map header → vị trí cột của 1 sheet (build 1 lần, dùng lại cho mọi lần tải).
+    - Bỏ qua cột header rỗng; header trùng → lấy cột sau cùng
+    - number_columns: các cột ép sang số lúc tải, cột còn lại giữ chuỗi
+    - deleted_column: ô cột này có giá trị → dòng đã xóa mềm, tải thành record rỗng
+    - model: class trong services.models (COLUMNS: tên cột → field) → record là object
+      của class đó thay vì dict, chỉ giữ các cột có field
+    """
+
+    def __init__(self, header: List[str], number_columns: Iterable[str] = (),
+                 deleted_column: Optional[str] = None, model: Optional[Type] = None):
+        self.header = list(header)
+        columns = {h: i for i, h in enumerate(self.header) if str(h).strip()}
+        number_columns = set(number_columns)
+        fields = model.COLUMNS if model is not None else {name: name for name in columns}
+        self._columns = [
+            (fields[name], i, name in number_columns) for name, i in columns.items() if name in fields
+        ]
+        self._deleted = columns.get(deleted_column) if deleted_column else None
+        self._model = model
+
+    def __len__(self) -> int:
+        return len(self.header)
+
+    def matches(self, header: List[str]) -> bool:
+        return self.header == list(header)
+
+    def record(self, row: List) -> Dict:
+        """1 dòng (list giá trị) → record (dict hoặc object model) đã ép kiểu"""
+        size = len(row)
+        if self._deleted is not None and self._deleted < size and str(row[self._deleted]).strip():
+            record = {name: '' for name, _, _ in self._columns}
+            return record if self._model is None else self._model(**record)
+        record = {}
+        for name, i, is_number in self._columns:
+            value = row[i] if i < size else ''
+            record[name] = parse_number(value) if is_number else value
+        return record if self._model is None else self._model(**record)
+
+    def records(self, rows: List[List]) -> List[Dict]:
+        return [self.record(row) for row in rows]
+
@@ -0,0 +1,243 @@
+"""
+Sheets Replica - Bản sao SQLite của Google Sheets để đọc nhanh
+Google Sheets vẫn là dữ liệu gốc (người dùng sửa trực tiếp trên sheet được).
+- Đọc (get_*, báo cáo): từ SQLite local, id của dòng = row number trên sheet
+- Ghi: gọi services/sheets.py trước, rồi đồng bộ lại tab vừa ghi vào SQLite
+- Thread nền tải lại cả 4 tab (1 request) mỗi REPLICA_SYNC_INTERVAL giây,
+  chỉ ghi các dòng thay đổi (so sánh từng dòng với bản sao)
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List
+
+import config
+from services import sheets, storage
+from services.indexes import _sku_key
+from services.records import iso_day, to_number
+from services.sqlite_store import SqliteStore
+
+logger = logging.getLogger(__name__)
+
+
+def _text(value) -> str:
+    return str(value).strip()
+
+
+def _ref(value):
+    """Cột ID trên sheet → ref (None nếu dòng chưa có ID)"""
+    return value if isinstance(value, int) else None
+
+
+def _product_values(r: Dict) -> tuple:
+    sku = _text(r.get('SKU', ''))
+    return (sku, _sku_key(sku), _text(r.get('Name', '')), to_number(r.get('Cost', 0)))
+
+
+def _sale_values(r: Dict) -> tuple:
+    return (
+        _text(r.get('Date', '')), iso_day(r.get('Date', '')), _text(r.get('SKU', '')),
+        int(to_number(r.get('Qty', 0))), to_number(r.get('Price', 0)), to_number(r.get('Cost', 0)),
+        to_number(r.get('Profit', 0)), _text(r.get('Customer', '')), _text(r.get('Note', '')),
+        _ref(r.get('ID'))
+    )
+
+
+def _expense_values(r: Dict) -> tuple:
+    return (
+        _text(r.get('Date', '')), iso_day(r.get('Date', '')), to_number(r.get('Amount', 0)),
+        _text(r.get('Description', '')), _text(r.get('Category', '')), _ref(r.get('ID'))
+    )
+
+
+def _debt_values(r: Dict) -> tuple:
+    customer = _text(r.get('Customer', ''))
+    return (
+        _text(r.get('Date', '')), customer, customer.lower(), to_number(r.get('Amount', 0)),
+        _text(r.get('Note', '')), _text(r.get('Status', 'pending')),
+        _text(r.get('PaidDate', '')), _text(r.get('TelegramID', '')), _ref(r.get('ID'))
+    )
+
+
+# sheet → (bảng SQLite, các cột, hàm chuyển record → giá trị cột)
+TABLES = {
+    config.SHEET_PRODUCTS: ('products', ['sku', 'sku_key', 'name', 'cost'], _product_values),
+    config.SHEET_SALES: (
+        'sales', ['date', 'day', 'sku', 'qty', 'price', 'cost', 'profit', 'customer', 'note', 'ref'],
+        _sale_values
+    ),
+    config.SHEET_EXPENSES: (
+        'expenses', ['date', 'day', 'amount', 'description', 'category', 'ref'], _expense_values
+    ),
+    config.SHEET_DEBTS: (
+        'debts', [
+            'date', 'customer', 'customer_key', 'amount', 'note', 'status', 'paid_date', 'telegram_id', 'ref'
+        ],
+        _debt_values
+    ),
+}
+
+
+class SheetsReplica:
+    """
+    Backend 'replica': đọc từ SQLite, ghi vào Google Sheets rồi đồng bộ lại.
+    Có đủ các hàm trong storage.OPERATIONS (hàm đọc chuyển thẳng cho SqliteStore).
+    """
+
+    def __init__(self, path: str, interval: float):
+        self.store = SqliteStore(path)
+        self.interval = interval
+        self._rows = {}  # sheet_name -> {row_num: values} đang có trong SQLite
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.syncs = 0
+        self.rows_changed = 0
+        self.last_sync = None
+        self.last_error = None
+
+        for sheet_name, (table, columns, _) in TABLES.items():
+            self._rows[sheet_name] = self.store.table_rows(table, columns)
+
+        self.sync()
+        if interval > 0:
+            self._thread = threading.Thread(target=self._run, name="sheets-replica", daemon=True)
+            self._thread.start()
+
+    # ==================== SYNC ====================
+
+    def _apply(self, sheet_name: str, records: List[Dict]) -> int:
+        """So sánh records với bản sao, chỉ ghi dòng thêm/sửa/xóa. Return số dòng thay đổi"""
+        table, columns, to_values = TABLES[sheet_name]
+        current = self._rows[sheet_name]
+        desired = {}
+        seen_skus = set()
+        for row_num, record in enumerate(records, start=2):  # row 1 là header
+            if not any(_text(v) for v in record.values()):
+                continue  # Dòng trống
+            values = to_values(record)
+            if table == 'products':
+                # SKU trùng → giữ dòng đầu tiên (giống bản Sheets)
+                if values[1] in seen_skus:
+                    continue
+                seen_skus.add(values[1])
+            desired[row_num] = values
+
+        deleted = [row_num for row_num in current if row_num not in desired]
+        changed = {
+            row_num: values for row_num, values in desired.items()
+            if current.get(row_num) != values
+        }
+        if deleted or changed:
+            self.store.replace_rows(table, columns, deleted, changed)
+            self._rows[sheet_name] = desired
+        return len(deleted) + len(changed)
+
+    def sync(self, *sheet_names: str) -> int:
+        """Tải lại các tab từ Google Sheets (mặc định cả 4 tab, 1 request) và đồng bộ"""
+        sheet_names = sheet_names or tuple(TABLES)
+        with self._sync_lock:
+            loaded = sheets.reload_sheets(*sheet_names)
+            changed = sum(self._apply(name, records) for name, records in loaded.items())
+            self.syncs += 1
+            self.rows_changed += changed
+            self.last_sync = time.time()
+            return changed
+
+    def _sync_written(self, sheet_name: str):
+        """Đồng bộ 1 tab sau khi ghi (records lấy từ cache write-through, thường không gọi API)"""
+        with self._sync_lock:
+            self.rows_changed += self._apply(sheet_name, sheets.get_sheet_records(sheet_name))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sync()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"Replica sync failed: {e}")
+
+    def close(self):
+        """Dừng thread đồng bộ, gửi nốt outbox của Sheets và đóng SQLite"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        sheets.close()
+        self.store.close()
+
+    # ==================== CACHE ====================
+
+    def get_cache_stats(self) -> Dict:
+        """Thống kê cache Sheets + tình trạng đồng bộ bản sao"""
+        stats = sheets.get_cache_stats()
+        stats['replica'] = {
+            'path': self.store.path,
+            'interval': self.interval,
+            'syncs': self.syncs,
+            'rows_changed': self.rows_changed,
+            'last_sync': self.last_sync,
+            'last_error': self.last_error,
+            'rows': {name: len(rows) for name, rows in self._rows.items()},
+        }
+        return stats
+
+    def invalidate_cache(self, sheet_name: str = None):
+        """Xóa cache Sheets (bản sao được làm mới ở lần đồng bộ kế tiếp)"""
+        sheets.invalidate_cache(sheet_name)
+        self.store.invalidate_cache(sheet_name)
+
+    # ==================== WRITES (Sheets → bản sao) ====================
+
+    def _write(self, sheet_name: str, operation: str, *args, **kwargs):
+        result = getattr(sheets, operation)(*args, **kwargs)
+        self._sync_written(sheet_name)
+        return result
+
+    def add_product(self, *args, **kwargs):
+        return self._write(config.SHEET_PRODUCTS, 'add_product', *args, **kwargs)
+
+    def update_product(self, *args, **kwargs):
+        return self._write(config.SHEET_PRODUCTS, 'update_product', *args, **kwargs)
+
+    def delete_product(self, *args, **kwargs):
+        return self._write(config.SHEET_PRODUCTS, 'delete_product', *args, **kwargs)
+
+    def add_sale(self, *args, **kwargs):
+        return self._write(config.SHEET_SALES, 'add_sale', *args, **kwargs)
+
+    def delete_sale(self, *args, **kwargs):
+        return self._write(config.SHEET_SALES, 'delete_sale', *args, **kwargs)
+
+    def update_sale(self, *args, **kwargs):
+        return self._write(config.SHEET_SALES, 'update_sale', *args, **kwargs)
+
+    def add_expense(self, *args, **kwargs):
+        return self._write(config.SHEET_EXPENSES, 'add_expense', *args, **kwargs)
+
+    def delete_expense(self, *args, **kwargs):
+        return self._write(config.SHEET_EXPENSES, 'delete_expense', *args, **kwargs)
+
+    def add_debt(self, *args, **kwargs):
+        return self._write(config.SHEET_DEBTS, 'add_debt', *args, **kwargs)
+
+    def mark_debt_paid(self, *args, **kwargs):
+        return self._write(config.SHEET_DEBTS, 'mark_debt_paid', *args, **kwargs)
+
+    def mark_customer_debts_paid(self, *args, **kwargs):
+        return self._write(config.SHEET_DEBTS, 'mark_customer_debts_paid', *args, **kwargs)
+
+    def delete_debt(self, *args, **kwargs):
+        return self._write(config.SHEET_DEBTS, 'delete_debt', *args, **kwargs)
+
+    def set_customer_telegram_id(self, *args, **kwargs):
+        return self._write(config.SHEET_DEBTS, 'set_customer_telegram_id', *args, **kwargs)
+
+    # ==================== READS (bản sao) ====================
+
+    def __getattr__(self, name: str):
+        # Các hàm đọc còn lại trong OPERATIONS → SqliteStore
+        if name in storage.OPERATIONS:
+            return getattr(self.store, name)
+        raise AttributeError(name)
@@ -0,0 +1,81 @@
+"""
+ID Sequences - Cấp ID mới cho dòng Sales/Expenses/Debts không cần tải cả sheet
+ID cuối cùng đã cấp của mỗi sheet được giữ trong bộ nhớ và lưu ra file JSON.
+Lần cấp đầu tiên của 1 sheet trong process: lấy max(giá trị đã lưu, ID lớn nhất
+đang có trên sheet) → chỉ đọc cột ID 1 lần, và ID của dòng lớn nhất đã bị xóa
+không bị cấp lại sau khi bot khởi động lại (miễn file còn trên đĩa).
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class IdSequences:
+    """
+    {sheet_name: ID cuối cùng đã cấp}, lưu trong 1 file JSON.
+    seed(sheet_name) → ID lớn nhất hiện có trên sheet (đọc cột ID), chỉ gọi 1 lần/sheet.
+    """
+
+    def __init__(self, path: str, seed: Callable[[str], int]):
+        self.path = path
+        self._seed = seed
+        self._last = {}
+        self._seeded = set()
+        self._lock = threading.Lock()
+        self.seeds = 0
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self._last = {name: int(value) for name, value in json.load(f).items()}
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"IdSequences: bỏ qua file lỗi {self.path}: {e}")
+            self._last = {}
+
+    def _save(self):
+        """Ghi file tạm rồi thay thế (không để file dở dang nếu bot dừng giữa chừng)"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._last, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def next_id(self, sheet_name: str) -> int:
+        """Cấp ID mới: lớn hơn mọi ID đã cấp/đã thấy trên sheet"""
+        with self._lock:
+            if sheet_name not in self._seeded:
+                self._last[sheet_name] = max(self._last.get(sheet_name, 0), self._seed(sheet_name))
+                self._seeded.add(sheet_name)
+                self.seeds += 1
+            self._last[sheet_name] += 1
+            self._save()
+            return self._last[sheet_name]
+
+    def last(self, sheet_name: str) -> int:
+        """ID cuối cùng đã cấp/đã thấy (0 = chưa có)"""
+        with self._lock:
+            return self._last.get(sheet_name, 0)
+
+    def observe(self, sheet_name: str, row_id: int):
+        """ID vừa thấy trên sheet (tải cả sheet) → không cấp lại ID này"""
+        with self._lock:
+            if row_id > self._last.get(sheet_name, 0):
+                self._last[sheet_name] = row_id
+                self._save()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'path': self.path, 'last': dict(self._last), 'seeds': self.seeds}
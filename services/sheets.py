@@ -4,13 +4,78 @@ Google Sheets Service - Read/Write data from Google Sheets
 
 import os
 import json
+import threading
+from contextlib import contextmanager, nullcontext
+from itertools import islice
 import gspread
+from gspread.utils import rowcol_to_a1
 from google.oauth2.service_account import Credentials
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator, Tuple
 
 import config
+from services.cache import RecordCache
+from services.batch import WriteBatch
+from services.worksheets import WorksheetRegistry, WorksheetHandle
+from services.indexes import SkuIndex, NameIndex, DateIndex, RowIdIndex, DayLocator, _sku_key
+from services.columns import ColumnStore
+from services.records import ColumnMap, is_blank, get_local_date, iso_day, parse_date_key
+from services.models import Debt, Expense, Product, Sale
+from services.outbox import Outbox
+from services.compaction import Compactor
+from services.snapshots import MonthSnapshots
+from services.sequences import IdSequences
+from services import metrics
+from services.ratelimit import RateLimiter
+from services.singleflight import SingleFlight
+
+
+# Header các sheet (thứ tự cột khi ghi dòng mới)
+PRODUCTS_HEADERS = ['SKU', 'Name', 'Cost']
+SALES_HEADERS = ['Date', 'SKU', 'Qty', 'Price', 'Cost', 'Profit', 'Customer', 'Note', 'ID', 'Deleted', 'Day']
+EXPENSES_HEADERS = ['Date', 'Amount', 'Description', 'Category', 'ID', 'Deleted', 'Day']
+DEBTS_HEADERS = [
+    'Date', 'Customer', 'Amount', 'Note', 'Status', 'PaidDate', 'TelegramID', 'ID', 'Deleted', 'Day'
+]
 
+# Cột đánh dấu xóa mềm (thời điểm xóa); dòng có giá trị ở cột này được đọc như dòng trống
+DELETED_COLUMN = 'Deleted'
+
+# Ngày dạng ISO 'yyyy-mm-dd' (sort theo chuỗi = theo ngày) → tìm khoảng dòng bằng bisect
+DAY_COLUMN = 'Day'
+
+# Sheet có cột ID cố định (ghi lúc thêm dòng) + cột Deleted + cột Day → header
+ID_SHEETS = {
+    config.SHEET_SALES: SALES_HEADERS,
+    config.SHEET_EXPENSES: EXPENSES_HEADERS,
+    config.SHEET_DEBTS: DEBTS_HEADERS,
+}
+
+# Cột số của từng sheet (ép kiểu 1 lần lúc tải)
+NUMBER_COLUMNS = {
+    config.SHEET_PRODUCTS: ('Cost',),
+    config.SHEET_SALES: ('Qty', 'Price', 'Cost', 'Profit', 'ID'),
+    config.SHEET_EXPENSES: ('Amount', 'ID'),
+    config.SHEET_DEBTS: ('Amount', 'ID'),
+}
+
+# Kiểu object của từng sheet: dòng chuyển thành object 1 lần lúc tải vào cache
+MODELS = {
+    config.SHEET_PRODUCTS: Product,
+    config.SHEET_SALES: Sale,
+    config.SHEET_EXPENSES: Expense,
+    config.SHEET_DEBTS: Debt,
+}
+
+# Sheet cache dạng ColumnStore (cột có kiểu, object tạo khi đọc) thay vì list object:
+# field nhóm của báo cáo tháng, tổng theo ngày/nhóm (tên → field), chuỗi lặp nhiều cần intern
+COLUMN_SHEETS = {
+    config.SHEET_SALES: dict(
+        group_field='sku', totals={'revenue': 'price', 'profit': 'profit', 'quantity': 'quantity'},
+        interned=('customer',),
+    ),
+    config.SHEET_EXPENSES: dict(group_field='category', totals={'amount': 'amount'}, default_group='Other'),
+}
 
 # Google Sheets Scopes
 SCOPES = [
@@ -21,166 +86,1184 @@ SCOPES = [
 # Global client
 _client = None
 _spreadsheet = None
+_client_lock = threading.Lock()
+
+# Cache records theo worksheet
+_cache = RecordCache(config.SHEETS_CACHE_TTL)
+
+# Index SKU → product và index tìm theo tên (build từ records Products đã cache)
+_sku_index = SkuIndex()
+_name_index = NameIndex()
+
+# Header → cột của từng sheet (cache riêng, dùng cho tải cả sheet và đọc theo range)
+_columns = {}
+
+# Index ngày → row number cho Sales và Expenses
+_date_indexes = {}
+
+# Index ID → row number (Sales, Expenses, Debts)
+_id_indexes = {name: RowIdIndex() for name in ID_SHEETS}
+
+# ID cuối cùng đã cấp của từng sheet (thêm dòng không cần tải cả sheet để tìm ID lớn nhất)
+_id_sequences = IdSequences(config.ID_SEQUENCE_PATH, lambda name: _max_sheet_id(name))
+
+# Cột Day của từng sheet → khoảng row number của 1 ngày/tháng (đọc theo range, không tải cả sheet)
+_day_locators = {name: DayLocator() for name in ID_SHEETS}
+_day_lock = threading.Lock()  # thêm dòng / tải cột Day không xen nhau (row number khớp)
+_day_reads = threading.local()  # khoảng ngày đã đọc trước trong _prefetch_days (theo thread)
+
+# Báo cáo của các tháng đã kết thúc (None = luôn tính lại)
+_snapshots = MonthSnapshots(config.SNAPSHOT_PATH, config.SNAPSHOT_TTL) if config.SNAPSHOT_ENABLED else None
+
+# Đọc trùng (worksheet, range) cùng lúc → 1 request, các caller dùng chung kết quả
+_flights = SingleFlight()
+
+# Token bucket đọc/ghi trước mọi request Sheets API (None = không giới hạn)
+_limiter = RateLimiter(
+    config.SHEETS_READS_PER_MINUTE, config.SHEETS_WRITES_PER_MINUTE, config.SHEETS_MAX_RETRIES
+) if config.SHEETS_READS_PER_MINUTE > 0 and config.SHEETS_WRITES_PER_MINUTE > 0 else None
+
+
+def _create_google_client() -> gspread.Client:
+    # Ưu tiên đọc từ env variable (cho Render/cloud)
+    google_creds_json = os.getenv('GOOGLE_CREDENTIALS')
+    
+    if google_creds_json:
+        # Đọc credentials từ env variable
+        creds_dict = json.loads(google_creds_json)
+        creds = Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
+    else:
+        # Đọc từ file (cho local development)
+        creds = Credentials.from_service_account_file(
+            config.CREDENTIALS_FILE, 
+            scopes=SCOPES
+        )
+    
+    return gspread.authorize(creds)
+
+
+def _create_fake_client():
+    """Sheets giả trong bộ nhớ (SHEETS_CLIENT=fake): dữ liệu từ FAKE_SHEETS_DATA hoặc chỉ header"""
+    from services.fake_sheets import FakeClient
+    if config.FAKE_SHEETS_DATA:
+        with open(config.FAKE_SHEETS_DATA, encoding='utf-8') as f:
+            data = json.load(f)
+    else:
+        data = {config.SHEET_PRODUCTS: [PRODUCTS_HEADERS]}
+        data.update({name: [headers] for name, headers in ID_SHEETS.items()})
+    return FakeClient(
+        data,
+        latency=config.FAKE_SHEETS_LATENCY,
+        quota_error_rate=config.FAKE_SHEETS_QUOTA_ERROR_RATE,
+    )
 
 
 def get_client():
     """Get Google Sheets client (singleton)"""
     global _client, _spreadsheet
     
-    if _client is None:
-        # Ưu tiên đọc từ env variable (cho Render/cloud)
-        google_creds_json = os.getenv('GOOGLE_CREDENTIALS')
-        
-        if google_creds_json:
-            # Đọc credentials từ env variable
-            creds_dict = json.loads(google_creds_json)
-            creds = Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
-        else:
-            # Đọc từ file (cho local development)
-            creds = Credentials.from_service_account_file(
-                config.CREDENTIALS_FILE, 
-                scopes=SCOPES
-            )
-        
-        _client = gspread.authorize(creds)
-        _spreadsheet = _client.open_by_key(config.SHEET_ID)
+    # Lock: nhiều worker thread (sheets_async) có thể gọi cùng lúc
+    with _client_lock:
+        if _client is None:
+            if config.SHEETS_CLIENT == 'fake':
+                _client = _create_fake_client()
+            else:
+                _client = _create_google_client()
+            # Mọi request của client đi qua metrics + limiter (gspread 6: http_client, gspread 5: client)
+            http = getattr(_client, 'http_client', _client)
+            if config.METRICS_ENABLED:
+                # Bọc trong limiter → độ trễ đo không tính thời gian chờ token
+                http.request = metrics.wrap_sheets_http(http.request)
+            if _limiter is not None:
+                http.request = _limiter.wrap_http(http.request)
+            _spreadsheet = _client.open_by_key(config.SHEET_ID)
+            if _compactor is not None:
+                _compactor.start()
     
     return _spreadsheet
 
 
+# Cache handle Worksheet (tránh fetch metadata mỗi lần gọi worksheet())
+_worksheets = WorksheetRegistry(get_client)
+
+
+def get_worksheet(sheet_name: str) -> WorksheetHandle:
+    """Get worksheet theo tên tab (handle được cache, không tải lại metadata)"""
+    return WorksheetHandle(_worksheets, sheet_name)
+
+
+def _append_rows(sheet_name: str, rows: List[List], value_input_option: str):
+    """Gửi nhiều dòng mới trong 1 request (outbox gọi ở thread nền)"""
+    get_worksheet(sheet_name).append_rows(rows, value_input_option=value_input_option)
+
+
+def _sheet_ids(sheet_name: str) -> set:
+    """Các ID đang có trên sheet (đọc riêng cột ID, outbox dùng trước khi gửi lại 1 dòng)"""
+    col = _column_letter(ID_SHEETS[sheet_name].index('ID') + 1)
+    values = get_worksheet(sheet_name).get(f"{col}2:{col}")
+    return {int(row[0]) for row in values if row and str(row[0]).strip().isdigit()}
+
+
+# Outbox ghi dòng mới ở nền (None = ghi trực tiếp như cũ)
+_outbox = Outbox(
+    config.OUTBOX_PATH, _append_rows, config.OUTBOX_BATCH_DELAY, existing_ids=_sheet_ids
+) if config.OUTBOX_ENABLED else None
+
+
+def _append_row(sheet_name: str, row: List, value_input_option: str = 'RAW', record: Dict = None):
+    """
+    Thêm 1 dòng: vào outbox (trả về ngay) hoặc append_row trực tiếp nếu tắt outbox.
+    record → write-through vào cache/index trong cùng _day_lock (row number khớp với cột Day).
+    """
+    with _day_lock:
+        if _outbox is not None:
+            row_id = row[ID_SHEETS[sheet_name].index('ID')]
+            _outbox.enqueue(sheet_name, row, value_input_option, row_id=row_id)
+        else:
+            get_worksheet(sheet_name).append_row(row, value_input_option=value_input_option)
+        locator = _day_locators.get(sheet_name)
+        if locator is not None:
+            locator.append(iso_day(row[0]))  # Cột đầu là Date
+        if record is not None:
+            _append_dated_record(sheet_name, record)
+
+
+def _flush_pending(sheet_name: str):
+    """Gửi hết dòng đang chờ của sheet trước khi sửa/xóa theo row number"""
+    if _outbox is not None:
+        _outbox.flush(sheet_name)
+
+
+def _read_with_pending(read, *sheet_names: str) -> Tuple[object, Dict[str, List[List]]]:
+    """
+    (read(), {sheet_name: dòng trong outbox chưa lên sheet}) lấy nhất quán với nhau
+    (dòng chờ dạng chuỗi như get_all_values trả về). Không chặn thread gửi của outbox.
+    """
+    if _outbox is None:
+        return read(), {name: [] for name in sheet_names}
+    result, pending = _outbox.read(read, sheet_names)
+    return result, {name: [[str(v) for v in row] for row in rows] for name, rows in pending.items()}
+
+
+def close():
+    """Gửi nốt các dòng trong outbox, dừng lịch dọn dòng đã xóa (gọi khi bot dừng)"""
+    if _compactor is not None:
+        _compactor.close()
+    if _outbox is not None:
+        _outbox.close()
+
+
+def _column_letter(col: int) -> str:
+    """Số cột → chữ cột A1 (1 → 'A', 27 → 'AA')"""
+    return rowcol_to_a1(1, col).rstrip('0123456789')
+
+
 def get_local_now() -> str:
     """Get current time in Vietnam timezone"""
     return datetime.now(config.VN_TIMEZONE).strftime('%d/%m/%Y %H:%M')
 
 
-def get_local_date() -> str:
-    """Get today's date in Vietnam timezone"""
-    return datetime.now(config.VN_TIMEZONE).strftime('%d/%m/%Y')
+def safe_get_records(sheet, number_columns=()) -> List[Dict]:
+    """Get all records an toàn - xử lý header trùng/rỗng (1 lần get_all_values)"""
+    all_values = sheet.get_all_values()
+    if not all_values:
+        return []
+    return ColumnMap(all_values[0], number_columns).records(all_values[1:])
 
 
-def safe_get_records(sheet) -> List[Dict]:
-    """Get all records an toàn - xử lý header trùng/rỗng"""
-    try:
-        return sheet.get_all_records()
-    except Exception:
-        # Fallback: đọc thủ công khi header có vấn đề
-        all_values = sheet.get_all_values()
-        if not all_values or len(all_values) < 2:
-            return []
-        
-        headers = all_values[0]
-        # Lọc bỏ header rỗng, chỉ giữ cột có header
-        valid_cols = [i for i, h in enumerate(headers) if h.strip()]
-        clean_headers = [headers[i] for i in valid_cols]
-        
-        records = []
-        for row in all_values[1:]:
-            record = {}
-            for idx, col_idx in enumerate(valid_cols):
-                if col_idx < len(row):
-                    record[clean_headers[idx]] = row[col_idx]
-                else:
-                    record[clean_headers[idx]] = ''
-            records.append(record)
+def _column_map(sheet_name: str, header: List[str]) -> ColumnMap:
+    """Get map header → cột của sheet, chỉ build lại khi header thay đổi"""
+    columns = _columns.get(sheet_name)
+    if columns is None or not columns.matches(header):
+        deleted_column = DELETED_COLUMN if sheet_name in ID_SHEETS else None
+        columns = _columns[sheet_name] = ColumnMap(
+            header, NUMBER_COLUMNS.get(sheet_name, ()), deleted_column, MODELS.get(sheet_name)
+        )
+    return columns
+
+
+def _new_store(sheet_name: str) -> ColumnStore:
+    """ColumnStore rỗng cho 1 sheet trong COLUMN_SHEETS"""
+    model = MODELS[sheet_name]
+    number_fields = [model.COLUMNS[name] for name in NUMBER_COLUMNS[sheet_name]]
+    return ColumnStore(model, number_fields, **COLUMN_SHEETS[sheet_name])
+
+
+def _to_records(sheet_name: str, all_values: List[List], pending: List[List]) -> List[Dict]:
+    """
+    Giá trị thô (header + dòng) + dòng outbox → records:
+    ColumnStore với sheet trong COLUMN_SHEETS, list object với sheet khác
+    """
+    if sheet_name in COLUMN_SHEETS:
+        records = _new_store(sheet_name)
+        if all_values:
+            records.extend(map(_column_map(sheet_name, all_values[0]).record, all_values[1:] + pending))
         return records
+    if not all_values:
+        return []
+    return _column_map(sheet_name, all_values[0]).records(all_values[1:] + pending)
+
+
+def _load_records(sheet_name: str) -> List[Dict]:
+    """
+    Tải toàn bộ sheet: 1 request get_all_values, ép kiểu theo NUMBER_COLUMNS.
+    Dòng còn trong outbox được nối vào cuối (đúng vị trí sau khi gửi lên sheet).
+    Sheet có cột ID: ghi ID cho các dòng chưa có trước khi trả về.
+    """
+    all_values, pending = _read_with_pending(get_worksheet(sheet_name).get_all_values, sheet_name)
+    records = _to_records(sheet_name, all_values, pending[sheet_name])
+    if sheet_name in ID_SHEETS:
+        _ensure_ids(sheet_name, records)
+    return records
+
+
+def _get_records(sheet_name: str) -> List[Dict]:
+    """Get records của worksheet qua cache (chỉ gọi Sheets khi cache miss)"""
+    return _cache.get(sheet_name, lambda: _flights.do((sheet_name, None), lambda: _load_records(sheet_name)))
+
+
+def _batch_load(sheet_names: List[str]) -> Dict[str, List[Dict]]:
+    """Tải nhiều sheet trong 1 request values_batch_get, return {sheet_name: records}"""
+    return _flights.do((tuple(sheet_names), None), lambda: _fetch_sheets(sheet_names))
+
+
+def _fetch_sheets(sheet_names: List[str]) -> Dict[str, List[Dict]]:
+    response, pending = _read_with_pending(
+        lambda: _worksheets.values_batch_get([(name, None) for name in sheet_names]), *sheet_names
+    )
+    loaded = {}
+    for name, value_range in zip(sheet_names, response.get('valueRanges', [])):
+        loaded[name] = _to_records(name, value_range.get('values', []), pending[name])
+        if name in ID_SHEETS:
+            _ensure_ids(name, loaded[name])
+    return loaded
+
+
+def _preload_records(*sheet_names: str):
+    """
+    Tải nhiều sheet trong 1 request values_batch_get và đưa vào cache.
+    Bỏ qua sheet đang có cache còn hạn và sheet đọc được theo khoảng dòng (cột Day tăng dần);
+    cache tắt (TTL = 0) thì không tải trước.
+    """
+    missing = [name for name in sheet_names if not _cache.is_fresh(name)]
+    unloaded = [name for name in missing if name in _day_locators and not _day_locators[name].loaded]
+    if unloaded:
+        _load_locators(*unloaded)
+    missing = [name for name in missing if not _range_reads_ready(name)]
+    if _cache.ttl <= 0 or not missing:
+        return
+    if len(missing) == 1:
+        _get_records(missing[0])
+        return
+    
+    for name, records in _batch_load(missing).items():
+        _cache.put(name, records)
+
+
+def reload_sheets(*sheet_names: str) -> Dict[str, List[Dict]]:
+    """
+    Tải lại nhiều sheet từ Google Sheets (bỏ qua cache, 1 request) và cập nhật cache.
+    Return {sheet_name: records}.
+    """
+    loaded = _batch_load(list(sheet_names))
+    for name, records in loaded.items():
+        _cache.put(name, records)
+    return loaded
+
+
+def get_sheet_records(sheet_name: str) -> List[Dict]:
+    """Get records thô của 1 sheet (qua cache), record thứ i là dòng i + 2"""
+    return _get_records(sheet_name)
+
+
+def _sync_date_index(sheet_name: str, records: List[Dict]) -> DateIndex:
+    """Đồng bộ date index với records đang cache"""
+    index = _date_indexes.setdefault(sheet_name, DateIndex())
+    index.sync(records)
+    return index
+
+
+def _get_dated_records(sheet_name: str):
+    """Get (records, date index) của 1 sheet có cột Date, index luôn khớp records"""
+    records = _get_records(sheet_name)
+    return records, _sync_date_index(sheet_name, records)
+
+
+def _records_on_date(sheet_name: str, date: str) -> List:
+    """
+    Get [(row_num, record)] của 1 ngày: cache còn hạn → date index,
+    chưa có cache → chỉ đọc khoảng dòng của ngày đó (cột Day)
+    """
+    if not _cache.is_fresh(sheet_name):
+        day = iso_day(date)
+        rows = _records_in_days(sheet_name, day, day) if day else None
+        if rows is not None and all(isinstance(r.get('ID'), int) for _, r in rows):
+            return rows
+        # Có dòng chưa có ID (sheet cũ, dòng thêm tay) → tải cả sheet (ghi ID lúc tải)
+    records, index = _get_dated_records(sheet_name)
+    return [(r, records[r - 2]) for r in index.rows(date) if r - 2 < len(records)]
+
+
+def _month_buckets(sheet_name: str, year: int, month: int) -> Dict:
+    """
+    Tổng theo ngày và theo nhóm của 1 tháng (ColumnStore.month): cache còn hạn → tổng giữ sẵn
+    của records đang cache, chưa có cache → chỉ đọc khoảng dòng của tháng (cột Day) rồi cộng.
+    """
+    if not _cache.is_fresh(sheet_name):
+        prefix = f"{year:04d}-{month:02d}"
+        rows = _records_in_days(sheet_name, f"{prefix}-01", f"{prefix}-31")
+        if rows is not None:
+            store = _new_store(sheet_name)
+            store.extend(record for _, record in rows)
+            return store.month(year, month)
+    return _get_records(sheet_name).month(year, month)
+
+
+def _is_closed_month(year: int, month: int) -> bool:
+    now = datetime.now(config.VN_TIMEZONE)
+    return (year, month) < (now.year, now.month)
+
+
+def _month_rows(sheet_name: str, year: int, month: int) -> Optional[int]:
+    """
+    Số dòng của 1 tháng theo cột Day (đối chiếu snapshot với sheet bị thêm/xóa dòng bằng tay).
+    Cột Day quá TTL → đọc lại cột Date/Day (1 request, rẻ hơn tải cả sheet). None = không đếm được.
+    """
+    locator = _day_locators.get(sheet_name)
+    if locator is None:
+        return None
+    if not locator.is_fresh(_cache.ttl):
+        _load_locators(sheet_name)
+    prefix = f"{year:04d}-{month:02d}"
+    return locator.count(f"{prefix}-01", f"{prefix}-31")
+
+
+def _get_snapshot(sheet_name: str, year: int, month: int) -> Optional[Dict]:
+    """Báo cáo đã lưu của 1 tháng đã kết thúc (None nếu chưa có/hết hạn/số dòng đã đổi/tháng hiện tại)"""
+    if _snapshots is None or not _is_closed_month(year, month):
+        return None
+    if not _snapshots.has(sheet_name, year, month):
+        return _snapshots.get(sheet_name, year, month)  # Chưa có/hết hạn → không cần đọc cột Day
+    return _snapshots.get(sheet_name, year, month, rows=_month_rows(sheet_name, year, month))
+
+
+def _save_snapshot(sheet_name: str, year: int, month: int, summary: Dict):
+    """Lưu báo cáo vừa tính (kèm số dòng của tháng) nếu tháng đã kết thúc"""
+    if _snapshots is not None and _is_closed_month(year, month):
+        _snapshots.put(sheet_name, year, month, summary, rows=_month_rows(sheet_name, year, month))
+
+
+def _invalidate_snapshot(sheet_name: str, date: str):
+    """Dòng của ngày date vừa bị sửa/xóa → xóa snapshot của đúng tháng đó"""
+    key = parse_date_key(date)
+    if _snapshots is not None and key is not None:
+        _snapshots.invalidate(sheet_name, key[0], key[1])
+
+
+def _append_dated_record(sheet_name: str, record: Dict):
+    """
+    Write-through sau append_row: thêm record vào cache (cộng vào tổng tháng) + date index + ID index.
+    Gọi trong _append_row (đang giữ _day_lock).
+    """
+    records = _cache.peek(sheet_name)
+    if records is None:
+        return  # Chưa cache → lần đọc sau sẽ tải lại cả dòng mới
+    index = _sync_date_index(sheet_name, records)
+    id_index = _id_indexes[sheet_name]
+    id_index.sync(records)
+    _cache.append(sheet_name, record)
+    index.add(record['Date'], len(records) + 1)
+    id_index.add(record['ID'], len(records) + 1)
+
+
+def _update_dated_record(sheet_name: str, row_num: int, fields: Dict):
+    """Write-through sau khi sửa ô: sửa record đang cache (tổng tháng theo, ngày không đổi)"""
+    records = _cache.peek(sheet_name)
+    if records is None or not 0 <= row_num - 2 < len(records):
+        return
+    _sync_date_index(sheet_name, records)
+    _cache.update(sheet_name, row_num - 2, fields)
+
+
+def _delete_dated_record(sheet_name: str, row_num: int):
+    """Write-through sau delete_rows: xóa record khỏi cache (trừ khỏi tổng tháng) + date index + ID index"""
+    records = _cache.peek(sheet_name)
+    if records is None or not 0 <= row_num - 2 < len(records):
+        return
+    index = _sync_date_index(sheet_name, records)
+    id_index = _id_indexes[sheet_name]
+    id_index.sync(records)
+    _cache.delete(sheet_name, row_num - 2)
+    index.remove(row_num)
+    id_index.remove(row_num)
+
+
+def _tombstone_record(sheet_name: str, row_num: int):
+    """Write-through sau khi đánh dấu xóa: record cache thành rỗng (trừ khỏi tổng tháng), bỏ khỏi index"""
+    records = _cache.peek(sheet_name)
+    if records is None or not 0 <= row_num - 2 < len(records):
+        return
+    id_index = _id_indexes[sheet_name]
+    id_index.sync(records)
+    record = records[row_num - 2]
+    if sheet_name in COLUMN_SHEETS:
+        _sync_date_index(sheet_name, records).discard(row_num)
+    id_index.discard(row_num)
+    _cache.update(sheet_name, row_num - 2, {k: '' for k in record})
+
+
+def _delete_row(sheet_name: str, row_id) -> bool:
+    """
+    Xóa dòng theo ID. SOFT_DELETE: chỉ ghi thời điểm xóa vào cột Deleted
+    (các dòng dưới không dồn lên, compact_deleted() xóa hẳn sau), ngược lại delete_rows.
+    Return False nếu không có ID.
+    """
+    _flush_pending(sheet_name)
+    try:
+        row_id = int(row_id)
+    except (TypeError, ValueError):
+        return False
+    located = _locate_rows(sheet_name, [row_id]).get(row_id)
+    if located is None:
+        return False
+    row_num, record = located
+    sheet = get_worksheet(sheet_name)
+    if _snapshots is not None and sheet_name in COLUMN_SHEETS:
+        _invalidate_snapshot(sheet_name, record.get('Date', ''))
+    if config.SOFT_DELETE:
+        col = ID_SHEETS[sheet_name].index(DELETED_COLUMN) + 1
+        new_header = DELETED_COLUMN not in _get_columns(sheet_name).header
+        with WriteBatch(sheet) as batch:
+            if new_header:
+                batch.update_cell(1, col, DELETED_COLUMN)
+            batch.update_cell(row_num, col, get_local_now())
+        if new_header:
+            _columns.pop(sheet_name, None)
+        _tombstone_record(sheet_name, row_num)
+    else:
+        sheet.delete_rows(row_num)
+        _day_locators[sheet_name].remove(row_num)
+        if sheet_name in COLUMN_SHEETS:
+            _delete_dated_record(sheet_name, row_num)
+        else:
+            _cache.invalidate(sheet_name)
+    return True
+
+
+def _max_sheet_id(sheet_name: str) -> int:
+    """ID lớn nhất trên sheet, kể cả dòng còn trong outbox (cache còn hạn → không gọi API)"""
+    records = _cache.lookup(sheet_name)
+    if records is not None:
+        return max((r.get('ID') for r in records if isinstance(r.get('ID'), int)), default=0)
+    col = ID_SHEETS[sheet_name].index('ID')
+    ids, pending = _read_with_pending(lambda: _sheet_ids(sheet_name), sheet_name)
+    ids |= {int(row[col]) for row in pending[sheet_name] if len(row) > col and str(row[col]).isdigit()}
+    return max(ids, default=0)
+
+
+def _locate_rows(sheet_name: str, row_ids: List[int]) -> Dict[int, Tuple[int, Dict]]:
+    """
+    ID → (row_num, record) của các dòng sắp bị sửa/xóa theo row number.
+    Row number lấy từ cache có thể cũ tới TTL giây (sheet bị thêm/xóa dòng bằng tay giữa chừng)
+    → đọc lại đúng các dòng đó trong 1 request trước khi ghi; ô ID không khớp → tải lại
+    sheet rồi tra lại. ID không còn trên sheet → không có trong kết quả.
+    """
+    cached = _cache.is_fresh(sheet_name)
+    records = _get_records(sheet_name)
+    index = _ensure_ids(sheet_name, records)
+    found = {}
+    for row_id in row_ids:
+        row_num = index.row(row_id)
+        if row_num is not None and row_num - 2 < len(records):
+            found[row_id] = (row_num, records[row_num - 2])
+    if not found or not cached:
+        return found  # records vừa tải từ sheet
+
+    columns = _get_columns(sheet_name)
+    last_col = _column_letter(len(columns))
+    response = _worksheets.values_batch_get(
+        [(sheet_name, f"A{row_num}:{last_col}{row_num}") for row_num, _ in found.values()]
+    )
+    stale = False
+    for (row_id, (row_num, _)), value_range in zip(list(found.items()), response.get('valueRanges', [])):
+        values = value_range.get('values', [])
+        record = columns.record(values[0] if values else [])
+        if record.get('ID') == row_id:
+            found[row_id] = (row_num, record)
+        else:
+            stale = True
+    if not stale:
+        return found
+
+    # Cache lệch với sheet → tải lại và tra lại theo records mới
+    invalidate_cache(sheet_name)
+    records = _get_records(sheet_name)
+    index = _ensure_ids(sheet_name, records)
+    found = {}
+    for row_id in row_ids:
+        row_num = index.row(row_id)
+        if row_num is not None and row_num - 2 < len(records):
+            found[row_id] = (row_num, records[row_num - 2])
+    return found
+
+
+def _get_id_index(sheet_name: str) -> RowIdIndex:
+    """Get index ID → row number (ghi ID cho các dòng chưa có trước khi dùng)"""
+    return _ensure_ids(sheet_name, _get_records(sheet_name))
+
+
+def _ensure_ids(sheet_name: str, records: List[Dict]) -> RowIdIndex:
+    """Đồng bộ index ID với records, ghi ID cho các dòng chưa có"""
+    index = _id_indexes[sheet_name]
+    index.sync(records)
+    if index.missing:
+        _assign_missing_ids(sheet_name, records, index)
+    _id_sequences.observe(sheet_name, index.max_id)
+    return index
+
+
+def _assign_missing_ids(sheet_name: str, records: List[Dict], index: RowIdIndex):
+    """
+    Ghi ID cho các dòng chưa có (dòng cũ trước khi có cột ID, dòng thêm tay trên sheet).
+    Lần đầu (sheet chưa có ID nào): ID = row number hiện tại → số quen thuộc với người dùng.
+    Gom tất cả vào 1 request batch_update.
+    """
+    col = ID_SHEETS[sheet_name].index('ID') + 1
+    first_migration = index.max_id == 0 and _id_sequences.last(sheet_name) == 0
+    new_header = 'ID' not in _get_columns(sheet_name).header
+    assigned = []
+    with WriteBatch(get_worksheet(sheet_name)) as batch:
+        if new_header:
+            batch.update_cell(1, col, 'ID')
+        for row_num in index.missing:
+            row_id = row_num if first_migration else _id_sequences.next_id(sheet_name)
+            batch.update_cell(row_num, col, row_id)
+            assigned.append((row_id, row_num))
+
+    cached = _cache.peek(sheet_name) is records
+    for row_id, row_num in assigned:
+        if cached:
+            _cache.update(sheet_name, row_num - 2, {'ID': row_id})
+        else:
+            # records đang tải hoặc không cache (TTL = 0); ColumnStore: ghi lại cả dòng
+            record = records[row_num - 2]
+            record['ID'] = row_id
+            records[row_num - 2] = record
+        index.add(row_id, row_num)
+    index.missing = []
+    if new_header:
+        _columns.pop(sheet_name, None)
+
+
+def _row_of(sheet_name: str, row_id) -> Optional[int]:
+    """Row number hiện tại của dòng có ID (None nếu không có)"""
+    try:
+        return _get_id_index(sheet_name).row(int(row_id))
+    except (TypeError, ValueError):
+        return None
+
+
+def rebuild_column_stores():
+    """Build lại tổng theo ngày/nhóm của Sales/Expenses đang cache từ các cột"""
+    for sheet_name in COLUMN_SHEETS:
+        records = _cache.peek(sheet_name)
+        if records is not None:
+            records.rebuild()
+
+
+def _get_columns(sheet_name: str) -> ColumnMap:
+    """Get map header → cột (đọc row 1 nếu sheet chưa được tải lần nào)"""
+    columns = _columns.get(sheet_name)
+    if columns is None:
+        header = _flights.do((sheet_name, '1:1'), lambda: get_worksheet(sheet_name).row_values(1))
+        columns = _column_map(sheet_name, header)
+    return columns
+
+
+def _read_tail(sheet_name: str, limit: int) -> List:
+    """
+    Đọc N dòng cuối bằng 1 range A1 (không tải cả sheet).
+    Dòng cuối lấy từ độ dài cột Day (locator); locator quá TTL → đọc lại cột Date/Day
+    trước (1 request) rồi mới đọc range cuối.
+    Return [(row_num, record)] theo thứ tự trên sheet (kể cả dòng còn trong outbox).
+    """
+    locator = _day_locators[sheet_name]
+    if not locator.is_fresh(_cache.ttl):
+        _load_locators(sheet_name)
+    columns = _get_columns(sheet_name)
+    last_col = _column_letter(len(columns))
+
+    def fetch():
+        # len(locator) = số dòng trên sheet + dòng outbox; range mở → vẫn đủ nếu sheet vừa thêm dòng
+        start = max(2, len(locator) + 2 - limit)
+        return start, get_worksheet(sheet_name).get(f"A{start}:{last_col}")
+
+    (start, values), pending = _read_with_pending(fetch, sheet_name)
+    pending = pending[sheet_name]
+
+    rows = list(enumerate(values, start=start))
+    # Dòng outbox nối ngay sau dòng có dữ liệu cuối cùng trên sheet
+    first_pending = start + len(values) if values else max(2, len(locator) + 2 - len(pending))
+    rows += list(enumerate(pending, start=first_pending))
+    rows = rows[-limit:] if limit > 0 else []
+    return [(row_num, columns.record(row)) for row_num, row in rows]
+
+
+def _day_column_ranges(sheet_name: str) -> List[Tuple[str, str]]:
+    """Range cột Date (từ dòng 2) + cột Day (kể cả header) của 1 sheet"""
+    date_col = _column_letter(ID_SHEETS[sheet_name].index('Date') + 1)
+    day_col = _column_letter(ID_SHEETS[sheet_name].index(DAY_COLUMN) + 1)
+    return [(sheet_name, f"{date_col}2:{date_col}"), (sheet_name, f"{day_col}1:{day_col}")]
+
+
+def _parse_day_columns(value_ranges: List[Dict], pending: List[List]) -> tuple:
+    """valueRanges của 2 range trên → (header Day, dates, days, số dòng trên sheet), nối dòng outbox"""
+    dates, days = (
+        [str(row[0]).strip() if row else '' for row in value_range.get('values', [])]
+        for value_range in value_ranges
+    )
+    header, days = (days[0] if days else ''), days[1:]
+    size = max(len(dates), len(days))
+    dates += [''] * (size - len(dates))
+    days += [''] * (size - len(days))
+    for row in pending:
+        dates.append(row[0])
+        days.append(iso_day(row[0]))
+    return header, dates, days, size
+
+
+def _read_day_columns(sheet_names: List[str]) -> Dict[str, tuple]:
+    """
+    Đọc cột Date + cột Day (kể cả header) của nhiều sheet trong 1 request.
+    Return {sheet_name: (header Day, dates, days, số dòng trên sheet)};
+    dates/days gồm cả dòng còn trong outbox (nối sau các dòng trên sheet).
+    """
+    ranges = [r for name in sheet_names for r in _day_column_ranges(name)]
+    response, pending = _read_with_pending(lambda: _worksheets.values_batch_get(ranges), *sheet_names)
+    value_ranges = response.get('valueRanges', [])
+    return {
+        name: _parse_day_columns(value_ranges[2 * i:2 * i + 2], pending[name])
+        for i, name in enumerate(sheet_names)
+    }
+
+
+def _fill_days(header: str, dates: List[str], days: List[str]) -> List[str]:
+    """Day của từng dòng: ô Day trên sheet; ô trống hoặc sheet chưa có cột Day → tính từ Date"""
+    if header != DAY_COLUMN:
+        days = [''] * len(dates)
+    return [day or iso_day(date) for date, day in zip(dates, days)]
+
+
+def _load_locators(*sheet_names: str):
+    """
+    Đọc cột Date/Day của các sheet (1 request) và tải khoảng ngày vào locator.
+    Chỉ đọc, không ghi lên sheet: dòng chưa có Day (sheet cũ, dòng gõ tay) lấy ngày từ Date
+    (ghi bù vào cột Day là việc của migration backfill_days).
+    """
+    with _day_lock:
+        for name, (header, dates, days, _) in _read_day_columns(list(sheet_names)).items():
+            _day_locators[name].load(_fill_days(header, dates, days))
+
+
+def _backfill_days(sheet_name: str, header: str, dates: List[str], days: List[str], size: int) -> int:
+    """Ghi Day cho các dòng trên sheet có Date nhưng chưa có Day (1 request). Return số dòng đã ghi"""
+    col = ID_SHEETS[sheet_name].index(DAY_COLUMN) + 1
+    runs = []  # [(row đầu, [day...])] các dòng liền nhau
+    for i in range(size):
+        day = '' if days[i] else iso_day(dates[i])
+        if not day:
+            continue
+        days[i] = day
+        row_num = i + 2
+        if runs and runs[-1][0] + len(runs[-1][1]) == row_num:
+            runs[-1][1].append(day)
+        else:
+            runs.append((row_num, [day]))
+    if not runs and header == DAY_COLUMN:
+        return 0
+
+    # RAW: giữ chuỗi 'yyyy-mm-dd' (USER_ENTERED sẽ đổi thành ngày theo locale)
+    with WriteBatch(get_worksheet(sheet_name), value_input_option='RAW') as batch:
+        if header != DAY_COLUMN:
+            batch.update_cell(1, col, DAY_COLUMN)
+        for row_num, run in runs:
+            batch.update_range(row_num, col, [[day] for day in run])
+    if header != DAY_COLUMN:
+        _columns.pop(sheet_name, None)
+    return sum(len(run) for _, run in runs)
+
+
+def backfill_days(*sheet_names: str) -> Dict[str, int]:
+    """
+    Migration cột Day (chạy lúc bot khởi động, không chạy trong các hàm đọc): đọc cột Date/Day
+    của các sheet (mặc định Sales, Expenses, Debts) trong 1 request, ghi Day còn thiếu
+    (1 request/sheet) và tải lại khoảng ngày cho các sheet này.
+    Return {sheet_name: số dòng đã ghi}.
+    """
+    sheet_names = sheet_names or tuple(ID_SHEETS)
+    written = {}
+    with _day_lock:
+        for name, (header, dates, days, size) in _read_day_columns(list(sheet_names)).items():
+            written[name] = _backfill_days(name, header, dates, days, size)
+            _day_locators[name].load(days)
+    return written
+
+
+def _range_reads_ready(sheet_name: str) -> bool:
+    """Sheet đọc được theo khoảng ngày (đã tải cột Day và cột tăng dần)"""
+    locator = _day_locators.get(sheet_name)
+    return locator is not None and locator.ready
+
+
+def _read_range(sheet_name: str, range_name: str) -> Tuple[List[List], List[List]]:
+    """
+    (sheet.get(range_name), dòng outbox) lấy cùng lúc.
+    Nhiều caller đọc cùng range cùng lúc → dùng chung 1 request.
+    """
+    def fetch():
+        values, pending = _read_with_pending(lambda: get_worksheet(sheet_name).get(range_name), sheet_name)
+        return values, pending[sheet_name]
+    return _flights.do((sheet_name, range_name), fetch)
+
+
+def _span_range(sheet_name: str, span: Tuple[int, int]) -> str:
+    start, end = span
+    return f"A{start}:{_column_letter(len(_get_columns(sheet_name)))}{end}"
+
+
+def _check_locator(sheet_name: str, value_ranges: List[Dict], pending: List[List]) -> bool:
+    """
+    Đối chiếu cột Date/Day vừa đọc với locator (cột Day đã tải quá TTL, sheet có thể đã bị
+    thêm/xóa dòng bằng tay). Lệch → tải lại locator, return False. Dòng chưa có Day lấy
+    ngày từ Date (không ghi lên sheet). Gọi khi đang giữ _day_lock.
+    """
+    locator = _day_locators[sheet_name]
+    header, dates, days, _ = _parse_day_columns(value_ranges, pending)
+    days = _fill_days(header, dates, days)
+    if not locator.matches(days):
+        locator.load(days)
+        return False
+    return True
+
+
+def _span_records(sheet_name: str, span: Tuple[int, int], values: List[List], pending: List[List]) -> List:
+    """Các dòng đọc được trong span + dòng outbox rơi vào span → [(row_num, record)], bỏ dòng trống/đã xóa"""
+    start, end = span
+    columns = _get_columns(sheet_name)
+    rows = list(enumerate(values, start=start))
+    # Dòng outbox nằm ngay sau các dòng trên sheet (chưa có trên sheet → không bị đọc 2 lần)
+    first_pending = len(_day_locators[sheet_name]) + 2 - len(pending)
+    rows += [
+        (row_num, row) for row_num, row in enumerate(pending, start=first_pending)
+        if start <= row_num <= end
+    ]
+    records = [(row_num, columns.record(row)) for row_num, row in rows]
+    return [(row_num, record) for row_num, record in records if not is_blank(record)]
+
+
+def _read_days(sheet_names: List[str], first_day: str, last_day: str) -> Dict[str, Optional[List]]:
+    """
+    {sheet_name: [(row_num, record)] các dòng có first_day <= Day <= last_day} của nhiều sheet,
+    mọi khoảng dòng (và cột Date/Day cần đối chiếu) đọc chung 1 request values_batch_get.
+    Giá trị None: cột Day không tăng dần hoặc sheet đã bị sửa tay → caller tải cả sheet như cũ.
+    """
+    unloaded = [name for name in sheet_names if not _day_locators[name].loaded]
+    if unloaded:
+        _load_locators(*unloaded)
+
+    result = {}
+    plans = []  # [(sheet_name, span, cần đối chiếu cột Day)]
+    for name in sheet_names:
+        locator = _day_locators[name]
+        if not locator.ready:
+            result[name] = None
+            continue
+        span = locator.span(first_day, last_day)
+        checked = not locator.is_fresh(_cache.ttl)
+        if span is None and not checked:
+            result[name] = []
+        else:
+            plans.append((name, span, checked))
+    if not plans:
+        return result
+
+    if len(plans) == 1 and not plans[0][2]:
+        # 1 khoảng dòng → dùng chung request với caller khác đang đọc cùng range
+        name, span, _ = plans[0]
+        values, pending = _read_range(name, _span_range(name, span))
+        result[name] = _span_records(name, span, values, pending)
+        return result
+
+    ranges = []
+    for name, span, checked in plans:
+        if checked:
+            ranges += _day_column_ranges(name)
+        if span is not None:
+            ranges.append((name, _span_range(name, span)))
+    names = [name for name, _, _ in plans]
+    with _day_lock if any(checked for _, _, checked in plans) else nullcontext():
+        response, pending = _read_with_pending(lambda: _worksheets.values_batch_get(ranges), *names)
+        value_ranges = iter(response.get('valueRanges', []))
+        for name, span, checked in plans:
+            ok = not checked or _check_locator(name, [next(value_ranges), next(value_ranges)], pending[name])
+            values = next(value_ranges).get('values', []) if span is not None else []
+            if not ok:
+                result[name] = None
+            else:
+                result[name] = _span_records(name, span, values, pending[name]) if span is not None else []
+    return result
+
+
+@contextmanager
+def _prefetch_days(sheet_names: List[str], first_day: str, last_day: str):
+    """
+    Đọc trước khoảng ngày của nhiều sheet trong 1 request (tổng quan ngày/tháng khi chưa có cache);
+    _records_in_days cùng khoảng ngày trong khối này (cùng thread) dùng lại kết quả.
+    """
+    previous = getattr(_day_reads, 'rows', None)
+    rows = _read_days(sheet_names, first_day, last_day) if sheet_names else {}
+    _day_reads.rows = {(name, first_day, last_day): result for name, result in rows.items()}
+    try:
+        yield
+    finally:
+        _day_reads.rows = previous
+
+
+def _records_in_days(sheet_name: str, first_day: str, last_day: str) -> Optional[List]:
+    """
+    Get [(row_num, record)] các dòng có first_day <= Day <= last_day (ISO), bỏ dòng trống/đã xóa.
+    Tìm khoảng dòng bằng bisect trên cột Day rồi chỉ đọc khoảng đó (1 request).
+    Cột Day tải quá TTL → đọc kèm cột Date/Day để đối chiếu (vẫn 1 request).
+    Return None nếu cột Day không tăng dần hoặc sheet đã bị sửa tay → caller tải cả sheet như cũ.
+    """
+    prefetched = getattr(_day_reads, 'rows', None) or {}
+    key = (sheet_name, first_day, last_day)
+    if key in prefetched:
+        return prefetched.pop(key)
+    return _read_days([sheet_name], first_day, last_day)[sheet_name]
+
+
+def _recent_records(sheet_name: str, limit: int) -> List:
+    """Get [(row_num, record)] của N dòng cuối có dữ liệu (bỏ dòng trống/đã xóa), mới nhất trước"""
+    records = _cache.lookup(sheet_name)
+    if records is None:
+        size = limit
+        while True:
+            rows = _flights.do((sheet_name, f"tail:{size}"), lambda: _read_tail(sheet_name, size))
+            live = [(i, r) for i, r in rows if not is_blank(r)]
+            # Đọc thêm lên trên nếu dòng trống/đã xóa chiếm chỗ và sheet còn dòng phía trên
+            if len(live) >= limit or len(rows) < size or not rows or rows[0][0] <= 2:
+                break
+            size *= 2
+        if sheet_name not in ID_SHEETS or all(isinstance(r.get('ID'), int) for _, r in live):
+            return live[::-1][:limit]
+        # Có dòng chưa có ID (sheet cũ, dòng thêm tay) → tải cả sheet 1 lần (ghi ID lúc tải)
+        records = _get_records(sheet_name)
+    recent = []
+    for i in range(len(records) - 1, -1, -1):
+        if len(recent) >= limit:
+            break
+        if not is_blank(records[i]):
+            recent.append((i + 2, records[i]))
+    return recent
+
+
+def _scan_records(sheet_name: str, chunk_size: int = None) -> Iterator[Tuple[int, Dict]]:
+    """
+    Duyệt (row_num, record) các dòng có dữ liệu, không dựng list kết quả.
+    Cache bật → duyệt records đang cache (tải 1 request nếu chưa có, như cũ);
+    cache tắt → đọc từng trang chunk_size dòng, bộ nhớ chỉ giữ 1 trang.
+    """
+    records = _cache.lookup(sheet_name)
+    if records is None and _cache.ttl > 0:
+        records = _get_records(sheet_name)
+    start = 2  # row 1 là header
+    if records is None:
+        for row_num, record in _scan_pages(sheet_name, chunk_size or config.SCAN_CHUNK_ROWS):
+            if sheet_name in ID_SHEETS and not isinstance(record.get('ID'), int):
+                # Dòng chưa có ID (sheet cũ, dòng thêm tay) → tải cả sheet 1 lần (ghi ID lúc tải),
+                # duyệt tiếp từ dòng này trên records vừa tải
+                records, start = _get_records(sheet_name), row_num
+                break
+            yield row_num, record
+        else:
+            return
+    for row_num, record in enumerate(islice(records, start - 2, None), start=start):
+        if not is_blank(record):
+            yield row_num, record
+
+
+def _scan_pages(sheet_name: str, chunk_size: int) -> Iterator[Tuple[int, Dict]]:
+    """
+    Đọc sheet theo trang A{start}:{cột cuối}{end} tới dòng có dữ liệu cuối, rồi các dòng outbox.
+    Request đầu đọc kèm cột A (→ dòng cuối) và lấy dòng outbox cùng lúc; mỗi request
+    values_batch_get đọc tối đa SCAN_BATCH_PAGES trang, bộ nhớ chỉ giữ các trang của 1 request.
+    """
+    columns = _get_columns(sheet_name)
+    last_column = _column_letter(len(columns))
+    group = max(1, config.SCAN_BATCH_PAGES)
+
+    def page_ranges(starts):
+        return [(sheet_name, f"A{start}:{last_column}{start + chunk_size - 1}") for start in starts]
+
+    first = list(range(2, 2 + group * chunk_size, chunk_size))
+    response, pending = _read_with_pending(
+        lambda: _worksheets.values_batch_get([(sheet_name, 'A2:A')] + page_ranges(first)), sheet_name
+    )
+    column, *pages = response.get('valueRanges', [])
+    # Cột A (Date) bỏ các dòng trống cuối → dòng có dữ liệu cuối cùng
+    last_row = len(column.get('values', [])) + 1
+    starts = [start for start in first if start <= last_row]
+    remaining = list(range(first[-1] + chunk_size, last_row + 1, chunk_size))
+    while True:
+        for start, page in zip(starts, pages):
+            yield from _live_rows(columns, page.get('values', []), start)
+        if not remaining:
+            break
+        starts, remaining = remaining[:group], remaining[group:]
+        pages = _worksheets.values_batch_get(page_ranges(starts)).get('valueRanges', [])
+    # Dòng outbox nằm ngay sau dòng cuối có dữ liệu
+    yield from _live_rows(columns, pending[sheet_name], last_row + 1)
+
+
+def _live_rows(columns: ColumnMap, rows: List[List], start: int) -> Iterator[Tuple[int, Dict]]:
+    for row_num, row in enumerate(rows, start=start):
+        record = columns.record(row)
+        if not is_blank(record):
+            yield row_num, record
+
+
+def invalidate_cache(sheet_name: str = None):
+    """Xóa cache records (1 worksheet hoặc tất cả)"""
+    _cache.invalidate(sheet_name)
+    if sheet_name is None:
+        _columns.clear()
+    else:
+        _columns.pop(sheet_name, None)
+    for name, locator in _day_locators.items():
+        if sheet_name is None or name == sheet_name:
+            locator.reset()
+
+
+def get_cache_stats() -> Dict:
+    """Thống kê cache: hits, misses, bytes, metadata fetch tiết kiệm được"""
+    stats = _cache.stats()
+    stats['worksheets'] = _worksheets.stats()
+    if _outbox is not None:
+        stats['outbox'] = _outbox.stats()
+    if _compactor is not None:
+        stats['compaction'] = _compactor.stats()
+    if _snapshots is not None:
+        stats['snapshots'] = _snapshots.stats()
+    stats['id_sequences'] = _id_sequences.stats()
+    stats['single_flight'] = _flights.stats()
+    if _limiter is not None:
+        stats['rate_limit'] = _limiter.stats()
+    if config.METRICS_ENABLED:
+        stats['metrics'] = metrics.stats()
+    if config.SHEETS_CLIENT == 'fake' and _client is not None:
+        stats['fake_sheets'] = _client.stats()
+    stats['column_stores'] = {
+        name: {'rows': len(store), 'bytes': store.nbytes()}
+        for name, store in ((name, _cache.peek(name)) for name in COLUMN_SHEETS) if store is not None
+    }
+    return stats
+
+
+def compact_deleted(*sheet_names: str) -> Dict[str, int]:
+    """
+    Xóa hẳn các dòng đã đánh dấu xóa (mặc định Sales, Expenses, Debts).
+    Đọc cột Deleted của các sheet trong 1 request, xóa tất cả trong 1 request batch_update
+    (từ dưới lên → row number các dòng chưa xóa không đổi giữa chừng).
+    Chạy vào giờ ít dùng: row number của các dòng phía dưới đổi sau khi xóa.
+    Return {sheet_name: số dòng đã xóa}.
+    """
+    sheet_names = sheet_names or tuple(ID_SHEETS)
+    ranges = {}
+    for name in sheet_names:
+        header = _get_columns(name).header
+        if DELETED_COLUMN in header:
+            col = _column_letter(header.index(DELETED_COLUMN) + 1)
+            ranges[name] = (name, f"{col}2:{col}")
+    if not ranges:
+        return {}
+
+    response = _worksheets.values_batch_get(list(ranges.values()))
+    removed = {}
+    requests = []
+    for name, value_range in zip(ranges, response.get('valueRanges', [])):
+        rows = [
+            row_num for row_num, values in enumerate(value_range.get('values', []), start=2)
+            if values and str(values[0]).strip()
+        ]
+        if not rows:
+            continue
+        removed[name] = len(rows)
+        # Gom dòng liền nhau thành 1 khoảng, xóa khoảng dưới cùng trước
+        runs = []
+        for row_num in rows:
+            if runs and runs[-1][1] == row_num - 1:
+                runs[-1][1] = row_num
+            else:
+                runs.append([row_num, row_num])
+        sheet_id = get_worksheet(name).id
+        for first, last in reversed(runs):
+            requests.append({'deleteDimension': {'range': {
+                'sheetId': sheet_id, 'dimension': 'ROWS', 'startIndex': first - 1, 'endIndex': last,
+            }}})
+
+    if requests:
+        get_client().batch_update({'requests': requests})
+        for name in removed:
+            _cache.invalidate(name)
+            _day_locators[name].reset()
+    return removed
+
+
+# Dọn dòng đã xóa mềm mỗi ngày lúc COMPACTION_HOUR (bắt đầu khi kết nối Sheets lần đầu)
+_compactor = Compactor(compact_deleted, config.COMPACTION_HOUR, config.VN_TIMEZONE) if config.SOFT_DELETE else None
 
 
 # ==================== PRODUCTS ====================
 
-def get_all_products() -> List[Dict]:
+
+def _product_at(row_num: int, record: Product) -> Product:
+    return record.at(row_num)
+
+
+def _get_sku_index() -> SkuIndex:
+    """Get index SKU → product (build lại nếu catalog vừa được tải lại)"""
+    _sku_index.sync(_get_records(config.SHEET_PRODUCTS), _product_at)
+    return _sku_index
+
+
+def _get_name_index() -> NameIndex:
+    """Get index tìm kiếm theo tên (build lại nếu catalog vừa được tải lại)"""
+    _name_index.sync(_get_records(config.SHEET_PRODUCTS), _product_at)
+    return _name_index
+
+
+def _locate_product(sku: str) -> Optional[Product]:
+    """
+    Product (kèm row) sắp bị sửa/xóa theo row number.
+    Row lấy từ index có thể cũ tới TTL giây (sheet bị thêm/xóa dòng bằng tay giữa chừng)
+    → đọc lại ô SKU của dòng đó trước khi ghi; không khớp → tải lại sheet rồi tra lại.
+    None nếu SKU không còn trên sheet.
+    """
+    cached = _cache.is_fresh(config.SHEET_PRODUCTS)
+    product = _get_sku_index().get(sku)
+    if product is None or not cached:
+        return product  # records vừa tải từ sheet
+
+    col = PRODUCTS_HEADERS.index('SKU') + 1
+    if _sku_key(get_worksheet(config.SHEET_PRODUCTS).cell(product['row'], col).value or '') == _sku_key(sku):
+        return product
+
+    # Cache lệch với sheet → tải lại và tra lại theo records mới
+    invalidate_cache(config.SHEET_PRODUCTS)
+    return _get_sku_index().get(sku)
+
+
+def get_all_products() -> List[Product]:
     """Get all products"""
-    sheet = get_client().worksheet(config.SHEET_PRODUCTS)
-    records = safe_get_records(sheet)
-    
-    products = []
-    for i, row in enumerate(records, start=2):  # start=2 because row 1 is header
-        products.append({
-            'row': i,
-            'sku': row.get('SKU', ''),
-            'name': row.get('Name', ''),
-            'cost': row.get('Cost', 0)
-        })
+    records = _get_records(config.SHEET_PRODUCTS)
     
-    return products
+    # start=2 because row 1 is header
+    return [row.at(i) for i, row in enumerate(records, start=2)]
 
 
-def find_product_by_sku(sku: str) -> Optional[Dict]:
-    """Find product by SKU"""
-    products = get_all_products()
-    
-    for p in products:
-        if p['sku'].lower() == sku.lower():
-            return p
-    
-    return None
+def find_product_by_sku(sku: str) -> Optional[Product]:
+    """Find product by SKU (O(1) qua index, không gọi API khi cache còn hạn)"""
+    return _get_sku_index().get(sku)
 
 
-def find_product_by_name(name: str) -> Optional[Dict]:
-    """Find product by name (fuzzy search)"""
-    products = get_all_products()
-    
-    # Exact match first
-    for p in products:
-        if p['name'].lower() == name.lower():
-            return p
-    
-    # Fuzzy match
-    for p in products:
-        if name.lower() in p['name'].lower():
-            return p
-    
-    return None
+def search_products(query: str, limit: int = 10, fuzzy: bool = True) -> List[Product]:
+    """
+    Search products by name (bỏ dấu, không phân biệt hoa/thường).
+    Trả về tối đa limit sản phẩm, khớp tốt nhất trước.
+    """
+    sku_index = _get_sku_index()
+    skus = _get_name_index().search(query, limit, fuzzy=fuzzy)
+    return [p for p in (sku_index.get(sku) for sku in skus) if p]
+
+
+def find_product_by_name(name: str) -> Optional[Product]:
+    """Find product by name (exact match first, then substring)"""
+    results = search_products(name, limit=1, fuzzy=False)
+    return results[0] if results else None
 
 
-def get_product(sku: str) -> Optional[Dict]:
+def get_product(sku: str) -> Optional[Product]:
     """Get product by SKU (alias for find_product_by_sku)"""
     return find_product_by_sku(sku)
 
 
 def add_product(sku: str, name: str, cost: float) -> bool:
     """Add new product"""
-    sheet = get_client().worksheet(config.SHEET_PRODUCTS)
+    index = _get_sku_index()
     
     # Check if SKU already exists
-    if find_product_by_sku(sku):
+    if index.get(sku):
         return False
     
+    row_num = len(_get_records(config.SHEET_PRODUCTS)) + 2
+    sheet = get_worksheet(config.SHEET_PRODUCTS)
     sheet.append_row([sku, name, cost])
+    
+    # Write-through: cập nhật cache + index, không tải lại sheet
+    record = Product(sku=sku, name=name, cost=cost)
+    _cache.append(config.SHEET_PRODUCTS, record)
+    index.add(record.at(row_num))
+    _get_name_index().add(sku, name)
     return True
 
 
 def update_product(sku: str, cost: float = None, name: str = None) -> bool:
     """Update product"""
-    product = find_product_by_sku(sku)
+    product = _locate_product(sku)
     if not product:
         return False
+    index = _get_sku_index()
     
-    sheet = get_client().worksheet(config.SHEET_PRODUCTS)
+    sheet = get_worksheet(config.SHEET_PRODUCTS)
     row = product['row']
     
-    if name:
-        sheet.update_cell(row, 2, name)
-    if cost is not None:
-        sheet.update_cell(row, 3, cost)
+    fields = {}
+    with WriteBatch(sheet) as batch:
+        if name:
+            batch.update_cell(row, 2, name)
+            fields['Name'] = name
+        if cost is not None:
+            batch.update_cell(row, 3, cost)
+            fields['Cost'] = cost
     
+    _cache.update(config.SHEET_PRODUCTS, row - 2, fields)
+    index.update(sku, {'name': name or product['name'], 'cost': product['cost'] if cost is None else cost})
+    if name:
+        _get_name_index().update(sku, name)
     return True
 
 
 def delete_product(sku: str) -> bool:
     """Delete product"""
-    product = find_product_by_sku(sku)
+    product = _locate_product(sku)
     if not product:
         return False
+    index = _get_sku_index()
     
-    sheet = get_client().worksheet(config.SHEET_PRODUCTS)
+    sheet = get_worksheet(config.SHEET_PRODUCTS)
     sheet.delete_rows(product['row'])
+    _cache.delete(config.SHEET_PRODUCTS, product['row'] - 2)
+    index.remove(sku)
+    _get_name_index().remove(sku)
     return True
 
 
 # ==================== SALES ====================
 
+
 def add_sale(sku: str, quantity: int, price: float, cost: float, 
-             customer: str = "", note: str = "") -> Dict:
+             customer: str = "", note: str = "") -> Sale:
     """
     Add sale transaction.
     
@@ -189,51 +1272,32 @@ def add_sale(sku: str, quantity: int, price: float, cost: float,
     - profit = price - (cost × quantity)
     - revenue = price (tổng tiền thu)
     """
-    sheet = get_client().worksheet(config.SHEET_SALES)
-    
     date = get_local_date()
     total_cost = cost * quantity  # Tổng giá gốc
     profit = price - total_cost   # Lợi nhuận = Tổng thu - Tổng gốc
+    sale_id = _id_sequences.next_id(config.SHEET_SALES)
     
-    row_data = [date, sku, quantity, price, cost, profit, customer, note]
-    sheet.append_row(row_data)
+    row_data = [date, sku, quantity, price, cost, profit, customer, note, sale_id, '', iso_day(date)]
+    _append_row(config.SHEET_SALES, row_data, record=Sale.from_columns(dict(zip(SALES_HEADERS, row_data))))
     
-    return {
-        'date': date,
-        'sku': sku,
-        'quantity': quantity,
-        'price': price,          # Tổng tiền thu
-        'cost': cost,            # Giá gốc/sp
-        'total_cost': total_cost,  # Tổng giá gốc
-        'profit': profit,
-        'revenue': price,        # Doanh thu = Tổng tiền thu
-        'customer': customer
-    }
-
-
-def get_today_sales() -> List[Dict]:
+    return Sale(
+        id=sale_id,
+        date=date,
+        sku=sku,
+        quantity=quantity,
+        price=price,          # Tổng tiền thu
+        cost=cost,            # Giá gốc/sp
+        total_cost=total_cost,  # Tổng giá gốc
+        profit=profit,
+        revenue=price,        # Doanh thu = Tổng tiền thu
+        customer=customer
+    )
+
+
+def get_today_sales() -> List[Sale]:
     """Get today's sales"""
-    sheet = get_client().worksheet(config.SHEET_SALES)
-    records = safe_get_records(sheet)
-    
     today = get_local_date()
-    sales = []
-    
-    for i, row in enumerate(records, start=2):
-        if row.get('Date', '') == today:
-            sales.append({
-                'row': i,
-                'date': row.get('Date', ''),
-                'sku': row.get('SKU', ''),
-                'quantity': row.get('Qty', 0),
-                'price': row.get('Price', 0),
-                'cost': row.get('Cost', 0),
-                'profit': row.get('Profit', 0),
-                'customer': row.get('Customer', ''),
-                'note': row.get('Note', '')
-            })
-    
-    return sales
+    return [row.at(i) for i, row in _records_on_date(config.SHEET_SALES, today)]
 
 
 def get_today_sales_summary() -> Dict:
@@ -259,52 +1323,47 @@ def get_month_sales_summary(month: int = None, year: int = None) -> Dict:
     if year is None:
         year = datetime.now(config.VN_TIMEZONE).year
     
-    sheet = get_client().worksheet(config.SHEET_SALES)
-    records = safe_get_records(sheet)
+    # Tháng đã kết thúc → báo cáo đã lưu
+    snapshot = _get_snapshot(config.SHEET_SALES, year, month)
+    if snapshot is not None:
+        return snapshot
+    
+    # Tổng theo ngày và theo SKU giữ sẵn trong ColumnStore, không duyệt lại từng dòng
+    buckets = _month_buckets(config.SHEET_SALES, year, month)
     
     total_revenue = 0
     total_profit = 0
     total_quantity = 0
     sale_count = 0
     by_day = {}  # Thêm thống kê theo ngày
+    by_sku = {}
     
-    for row in records:
-        date_str = row.get('Date', '')
-        if date_str:
-            try:
-                dt = datetime.strptime(date_str, '%d/%m/%Y')
-                if dt.month == month and dt.year == year:
-                    qty = row.get('Qty', 0) or 0
-                    price = row.get('Price', 0) or 0  # Price = Tổng tiền thu
-                    profit = row.get('Profit', 0) or 0
-                    day = dt.day
-                    
-                    total_revenue += price
-                    total_profit += profit
-                    total_quantity += qty
-                    sale_count += 1
-                    
-                    # Thống kê theo ngày
-                    if day not in by_day:
-                        by_day[day] = {'revenue': 0, 'profit': 0, 'count': 0}
-                    by_day[day]['revenue'] += price
-                    by_day[day]['profit'] += profit
-                    by_day[day]['count'] += 1
-            except ValueError:
-                pass
+    for day, totals in buckets['days'].items():
+        total_revenue += totals['revenue']  # Price = Tổng tiền thu
+        total_profit += totals['profit']
+        total_quantity += totals['quantity']
+        sale_count += totals['count']
+        by_day[day] = {'revenue': totals['revenue'], 'profit': totals['profit'], 'count': totals['count']}
     
-    return {
+    # Thống kê theo SKU
+    for sku, totals in buckets['groups'].items():
+        by_sku[sku] = {field: totals[field] for field in ('revenue', 'profit', 'quantity', 'count')}
+    
+    summary = {
         'month': month,
         'year': year,
         'sale_count': sale_count,
         'total_quantity': total_quantity,
         'total_revenue': total_revenue,
         'total_profit': total_profit,
-        'by_day': by_day
+        'by_day': by_day,
+        'by_sku': by_sku
     }
+    _save_snapshot(config.SHEET_SALES, year, month, summary)
+    return summary
 
 
-def get_sales_by_date(day: int, month: int = None, year: int = None) -> List[Dict]:
+def get_sales_by_date(day: int, month: int = None, year: int = None) -> List[Sale]:
     """Get sales details for a specific date"""
     if month is None:
         month = datetime.now(config.VN_TIMEZONE).month
@@ -313,95 +1372,65 @@ def get_sales_by_date(day: int, month: int = None, year: int = None) -> List[Dic
     
     target_date = f"{day:02d}/{month:02d}/{year}"
     
-    sheet = get_client().worksheet(config.SHEET_SALES)
-    records = safe_get_records(sheet)
-    
-    sales = []
-    for i, row in enumerate(records, start=2):
-        if row.get('Date', '') == target_date:
-            sales.append({
-                'row': i,
-                'date': row.get('Date', ''),
-                'sku': row.get('SKU', ''),
-                'quantity': row.get('Qty', 0),
-                'price': row.get('Price', 0),
-                'profit': row.get('Profit', 0),
-                'customer': row.get('Customer', ''),
-                'note': row.get('Note', '')
-            })
-    
-    return sales
-
-
-def get_recent_sales(limit: int = 10) -> List[Dict]:
-    """Get recent sales"""
-    sheet = get_client().worksheet(config.SHEET_SALES)
-    records = safe_get_records(sheet)
-    
-    sales = []
-    for i, row in enumerate(records, start=2):
-        sales.append({
-            'row': i,
-            'date': row.get('Date', ''),
-            'sku': row.get('SKU', ''),
-            'quantity': row.get('Qty', 0),
-            'price': row.get('Price', 0),
-            'profit': row.get('Profit', 0),
-            'customer': row.get('Customer', '')
-        })
-    
-    # Return last N transactions
-    return sales[-limit:][::-1] if sales else []
-
-
-def delete_sale(row_num: int) -> bool:
-    """Delete sale by row number"""
+    return [row.at(i) for i, row in _records_on_date(config.SHEET_SALES, target_date)]
+
+
+def get_recent_sales(limit: int = 10) -> List[Sale]:
+    """Get recent sales (chỉ đọc N dòng cuối nếu chưa có cache)"""
+    return [row.at(i) for i, row in _recent_records(config.SHEET_SALES, limit)]
+
+
+def delete_sale(sale_id: int) -> bool:
+    """Delete sale by ID (chỉ đánh dấu nếu bật SOFT_DELETE)"""
     try:
-        sheet = get_client().worksheet(config.SHEET_SALES)
-        sheet.delete_rows(row_num)
-        return True
+        return _delete_row(config.SHEET_SALES, sale_id)
     except Exception:
         return False
 
 
-def get_sale_by_row(row_num: int) -> Optional[Dict]:
+def get_sale_by_row(row_num: int) -> Optional[Sale]:
     """Get sale details by row number"""
     try:
-        sheet = get_client().worksheet(config.SHEET_SALES)
-        row_values = sheet.row_values(row_num)
+        # Đọc từ cache thay vì gọi row_values (row 1 là header)
+        records = _get_records(config.SHEET_SALES)
+        if row_num < 2 or row_num - 2 >= len(records):
+            return None
         
-        if not row_values or len(row_values) < 6:
+        row = records[row_num - 2]
+        if row.get('Profit', '') == '':
             return None
         
-        return {
-            'row': row_num,
-            'date': row_values[0] if len(row_values) > 0 else '',
-            'sku': row_values[1] if len(row_values) > 1 else '',
-            'quantity': int(row_values[2]) if len(row_values) > 2 and row_values[2] else 0,
-            'price': float(row_values[3]) if len(row_values) > 3 and row_values[3] else 0,
-            'cost': float(row_values[4]) if len(row_values) > 4 and row_values[4] else 0,
-            'profit': float(row_values[5]) if len(row_values) > 5 and row_values[5] else 0,
-            'customer': row_values[6] if len(row_values) > 6 else '',
-            'note': row_values[7] if len(row_values) > 7 else ''
-        }
+        sale = row.at(row_num)
+        for field in ('quantity', 'price', 'cost', 'profit'):
+            sale[field] = sale[field] or 0
+        return sale
     except Exception:
         return None
 
 
-def update_sale(row_num: int, quantity: int = None, price: float = None, 
+def get_sale(sale_id: int) -> Optional[Sale]:
+    """Get sale details by ID"""
+    row_num = _row_of(config.SHEET_SALES, sale_id)
+    return get_sale_by_row(row_num) if row_num is not None else None
+
+
+def update_sale(sale_id: int, quantity: int = None, price: float = None, 
                 customer: str = None, note: str = None) -> bool:
     """
-    Update sale by row number.
+    Update sale by ID.
     Only updates fields that are provided (not None).
     Recalculates profit if price or quantity changes.
     """
     try:
-        sheet = get_client().worksheet(config.SHEET_SALES)
+        _flush_pending(config.SHEET_SALES)
+        sheet = get_worksheet(config.SHEET_SALES)
         
-        # Get current values
-        current = get_sale_by_row(row_num)
-        if not current:
+        # Get current values (đọc lại dòng trên sheet, không tin row number trong cache)
+        located = _locate_rows(config.SHEET_SALES, [int(sale_id)]).get(int(sale_id))
+        if located is None:
             return False
+        row_num, record = located
+        current = record.at(row_num)
         
         # Update values
         new_qty = quantity if quantity is not None else current['quantity']
@@ -413,21 +1442,28 @@ def update_sale(row_num: int, quantity: int = None, price: float = None,
         cost = current['cost']
         new_profit = new_price - (cost * new_qty)
         
-        # Update cells
-        if quantity is not None:
-            sheet.update_cell(row_num, 3, new_qty)  # Column C = Qty
-        if price is not None:
-            sheet.update_cell(row_num, 4, new_price)  # Column D = Price
-            sheet.update_cell(row_num, 6, new_profit)  # Column F = Profit
-        if customer is not None:
-            sheet.update_cell(row_num, 7, new_customer)  # Column G = Customer
-        if note is not None:
-            sheet.update_cell(row_num, 8, new_note)  # Column H = Note
-        
-        # If quantity changed, also update profit
-        if quantity is not None and price is None:
-            sheet.update_cell(row_num, 6, new_profit)
+        # Update cells (gom thành 1 request batch_update)
+        fields = {}
+        with WriteBatch(sheet) as batch:
+            if quantity is not None:
+                batch.update_cell(row_num, 3, new_qty)  # Column C = Qty
+                fields['Qty'] = new_qty
+            if price is not None:
+                batch.update_cell(row_num, 4, new_price)  # Column D = Price
+                fields['Price'] = new_price
+            if quantity is not None or price is not None:
+                batch.update_cell(row_num, 6, new_profit)  # Column F = Profit
+                fields['Profit'] = new_profit
+            if customer is not None:
+                batch.update_cell(row_num, 7, new_customer)  # Column G = Customer
+                fields['Customer'] = new_customer
+            if note is not None:
+                batch.update_cell(row_num, 8, new_note)  # Column H = Note
+                fields['Note'] = new_note
         
+        # Write-through: sửa record đang cache (ngày không đổi → date index giữ nguyên)
+        _update_dated_record(config.SHEET_SALES, row_num, fields)
+        _invalidate_snapshot(config.SHEET_SALES, current['date'])
         return True
     except Exception:
         return False
@@ -435,41 +1471,29 @@ def update_sale(row_num: int, quantity: int = None, price: float = None,
 
 # ==================== EXPENSES ====================
 
-def add_expense(amount: float, description: str, category: str = "Living") -> Dict:
+
+def add_expense(amount: float, description: str, category: str = "Living") -> Expense:
     """Add expense"""
-    sheet = get_client().worksheet(config.SHEET_EXPENSES)
-    
     date = get_local_date()
-    row_data = [date, amount, description, category]
-    sheet.append_row(row_data)
+    expense_id = _id_sequences.next_id(config.SHEET_EXPENSES)
+    row_data = [date, amount, description, category, expense_id, '', iso_day(date)]
+    _append_row(
+        config.SHEET_EXPENSES, row_data, record=Expense.from_columns(dict(zip(EXPENSES_HEADERS, row_data)))
+    )
     
-    return {
-        'date': date,
-        'amount': amount,
-        'description': description,
-        'category': category
-    }
+    return Expense(
+        id=expense_id,
+        date=date,
+        amount=amount,
+        description=description,
+        category=category
+    )
 
 
-def get_today_expenses() -> List[Dict]:
+def get_today_expenses() -> List[Expense]:
     """Get today's expenses"""
-    sheet = get_client().worksheet(config.SHEET_EXPENSES)
-    records = safe_get_records(sheet)
-    
     today = get_local_date()
-    expenses = []
-    
-    for i, row in enumerate(records, start=2):
-        if row.get('Date', '') == today:
-            expenses.append({
-                'row': i,
-                'date': row.get('Date', ''),
-                'amount': row.get('Amount', 0),
-                'description': row.get('Description', ''),
-                'category': row.get('Category', '')
-            })
-    
-    return expenses
+    return [row.at(i) for i, row in _records_on_date(config.SHEET_EXPENSES, today)]
 
 
 def get_today_expense_summary() -> Dict:
@@ -498,32 +1522,25 @@ def get_month_expense_summary(month: int = None, year: int = None) -> Dict:
     if year is None:
         year = datetime.now(config.VN_TIMEZONE).year
     
-    sheet = get_client().worksheet(config.SHEET_EXPENSES)
-    records = safe_get_records(sheet)
+    # Tháng đã kết thúc → báo cáo đã lưu
+    snapshot = _get_snapshot(config.SHEET_EXPENSES, year, month)
+    if snapshot is not None:
+        return snapshot
+    
+    # Tổng theo ngày và theo loại giữ sẵn trong ColumnStore, không duyệt lại từng dòng
+    buckets = _month_buckets(config.SHEET_EXPENSES, year, month)
     
     total = 0
     count = 0
-    by_category = {}
     by_day = {}  # Thêm thống kê theo ngày
     
-    for row in records:
-        date_str = row.get('Date', '')
-        if date_str:
-            try:
-                dt = datetime.strptime(date_str, '%d/%m/%Y')
-                if dt.month == month and dt.year == year:
-                    amount = row.get('Amount', 0) or 0
-                    category = row.get('Category', 'Other') or 'Other'
-                    day = dt.day
-                    
-                    total += amount
-                    count += 1
-                    by_category[category] = by_category.get(category, 0) + amount
-                    by_day[day] = by_day.get(day, 0) + amount
-            except ValueError:
-                pass
+    for day, totals in buckets['days'].items():
+        total += totals['amount']
+        count += totals['count']
+        by_day[day] = totals['amount']
+    by_category = {category: totals['amount'] for category, totals in buckets['groups'].items()}
     
-    return {
+    summary = {
         'month': month,
         'year': year,
         'count': count,
@@ -531,9 +1548,11 @@ def get_month_expense_summary(month: int = None, year: int = None) -> Dict:
         'by_category': by_category,
         'by_day': by_day
     }
+    _save_snapshot(config.SHEET_EXPENSES, year, month, summary)
+    return summary
 
 
-def get_expenses_by_date(day: int, month: int = None, year: int = None) -> List[Dict]:
+def get_expenses_by_date(day: int, month: int = None, year: int = None) -> List[Expense]:
     """Get expense details for a specific date"""
     if month is None:
         month = datetime.now(config.VN_TIMEZONE).month
@@ -542,114 +1561,122 @@ def get_expenses_by_date(day: int, month: int = None, year: int = None) -> List[
     
     target_date = f"{day:02d}/{month:02d}/{year}"
     
-    sheet = get_client().worksheet(config.SHEET_EXPENSES)
-    records = safe_get_records(sheet)
-    
-    expenses = []
-    for i, row in enumerate(records, start=2):
-        if row.get('Date', '') == target_date:
-            expenses.append({
-                'row': i,
-                'date': row.get('Date', ''),
-                'amount': row.get('Amount', 0),
-                'description': row.get('Description', ''),
-                'category': row.get('Category', '')
-            })
-    
-    return expenses
+    return [row.at(i) for i, row in _records_on_date(config.SHEET_EXPENSES, target_date)]
 
 
-def get_recent_expenses(limit: int = 10) -> List[Dict]:
-    """Get recent expenses"""
-    sheet = get_client().worksheet(config.SHEET_EXPENSES)
-    records = safe_get_records(sheet)
-    
-    expenses = []
-    for i, row in enumerate(records, start=2):
-        expenses.append({
-            'row': i,
-            'date': row.get('Date', ''),
-            'amount': row.get('Amount', 0),
-            'description': row.get('Description', ''),
-            'category': row.get('Category', '')
-        })
-    
-    return expenses[-limit:][::-1] if expenses else []
+def get_recent_expenses(limit: int = 10) -> List[Expense]:
+    """Get recent expenses (chỉ đọc N dòng cuối nếu chưa có cache)"""
+    return [row.at(i) for i, row in _recent_records(config.SHEET_EXPENSES, limit)]
 
 
-def delete_expense(row_num: int) -> bool:
-    """Delete expense by row number"""
+def delete_expense(expense_id: int) -> bool:
+    """Delete expense by ID (chỉ đánh dấu nếu bật SOFT_DELETE)"""
     try:
-        sheet = get_client().worksheet(config.SHEET_EXPENSES)
-        sheet.delete_rows(row_num)
-        return True
+        return _delete_row(config.SHEET_EXPENSES, expense_id)
     except Exception:
         return False
 
 
+# ==================== DASHBOARD ====================
+
+
+def get_today_overview() -> Dict:
+    """
+    Tổng kết hôm nay (bán + chi) cho /homnay và nút Thống kê.
+    Sales + Expenses đọc chung 1 request thay vì 2 lần đọc tuần tự.
+    """
+    sheet_names = (config.SHEET_SALES, config.SHEET_EXPENSES)
+    _preload_records(*sheet_names)
+    today = iso_day(get_local_date())
+    # Sheet chưa có cache → khoảng dòng hôm nay của cả 2 sheet đọc chung 1 request
+    with _prefetch_days([name for name in sheet_names if not _cache.is_fresh(name)], today, today):
+        return {
+            'sales': get_today_sales_summary(),
+            'expenses': get_today_expense_summary()
+        }
+
+
+def get_month_overview(month: int = None, year: int = None) -> Dict:
+    """Tổng kết tháng (bán + chi) cho /thang và nút Thống kê, 1 request cho 2 sheet"""
+    now = datetime.now(config.VN_TIMEZONE)
+    month, year = month or now.month, year or now.year
+    # Tháng cũ đã có snapshot → không cần tải sheet đó
+    sheet_names = [
+        name for name in (config.SHEET_SALES, config.SHEET_EXPENSES)
+        if _snapshots is None or not _is_closed_month(year, month)
+        or not _snapshots.has(name, year, month)
+    ]
+    _preload_records(*sheet_names)
+    prefix = f"{year:04d}-{month:02d}"
+    # Sheet chưa có cache → khoảng dòng của tháng ở cả 2 sheet đọc chung 1 request
+    with _prefetch_days(
+        [name for name in sheet_names if not _cache.is_fresh(name)], f"{prefix}-01", f"{prefix}-31"
+    ):
+        return {
+            'sales': get_month_sales_summary(month, year),
+            'expenses': get_month_expense_summary(month, year)
+        }
+
+
 # ==================== DEBT MANAGEMENT ====================
 
-def add_debt(customer: str, amount: float, note: str = "", telegram_id: str = "") -> Dict:
+
+def add_debt(customer: str, amount: float, note: str = "", telegram_id: str = "") -> Debt:
     """Add new debt record"""
-    sheet = get_client().worksheet(config.SHEET_DEBTS)
     date = get_local_date()
+    debt_id = _id_sequences.next_id(config.SHEET_DEBTS)
     
-    # Columns: Date | Customer | Amount | Note | Status | PaidDate | TelegramID
-    row = [date, customer, amount, note, "pending", "", telegram_id]
-    sheet.append_row(row, value_input_option='USER_ENTERED')
+    # Columns: Date | Customer | Amount | Note | Status | PaidDate | TelegramID | ID | Deleted | Day
+    # Day có dấu ' để USER_ENTERED giữ nguyên chuỗi (không đổi thành ngày theo locale)
+    row = [date, customer, amount, note, "pending", "", telegram_id, debt_id, "", "'" + iso_day(date)]
+    _append_row(config.SHEET_DEBTS, row, value_input_option='USER_ENTERED')
+    _cache.invalidate(config.SHEET_DEBTS)
     
-    return {
-        'date': date,
-        'customer': customer,
-        'amount': amount,
-        'note': note,
-        'status': 'pending',
-        'telegram_id': telegram_id
-    }
+    return Debt(
+        id=debt_id,
+        date=date,
+        customer=customer,
+        amount=amount,
+        note=note,
+        status='pending',
+        telegram_id=telegram_id
+    )
+
+
+def scan_debts(status: str = None, customer: str = None) -> Iterator[Debt]:
+    """
+    Duyệt từng khoản nợ (lọc theo status/khách trước khi tạo Debt), không dựng list.
+    Các hàm lọc/tổng bên dưới đều chạy trên scan này.
+    """
+    customer_key = customer.lower() if customer is not None else None
+    for row_num, row in _scan_records(config.SHEET_DEBTS):
+        if status is not None and row.get('Status', 'pending') != status:
+            continue
+        if customer_key is not None and str(row.get('Customer', '')).lower() != customer_key:
+            continue
+        yield row.at(row_num)
 
 
-def get_all_debts(status: str = None) -> List[Dict]:
+def get_all_debts(status: str = None) -> List[Debt]:
     """Get all debts, optionally filter by status (pending/paid)"""
-    sheet = get_client().worksheet(config.SHEET_DEBTS)
-    records = safe_get_records(sheet)
-    
-    debts = []
-    for i, row in enumerate(records, start=2):
-        debt_status = row.get('Status', 'pending')
-        if status is None or debt_status == status:
-            debts.append({
-                'row': i,
-                'date': row.get('Date', ''),
-                'customer': row.get('Customer', ''),
-                'amount': float(row.get('Amount', 0) or 0),
-                'note': row.get('Note', ''),
-                'status': debt_status,
-                'paid_date': row.get('PaidDate', ''),
-                'telegram_id': str(row.get('TelegramID', '')).strip()
-            })
-    
-    return debts
-
-
-def get_debts_by_customer(customer: str) -> List[Dict]:
+    return list(scan_debts(status))
+
+
+def get_debts_by_customer(customer: str) -> List[Debt]:
     """Get all pending debts for a specific customer"""
-    all_debts = get_all_debts(status='pending')
-    return [d for d in all_debts if d['customer'].lower() == customer.lower()]
+    return list(scan_debts('pending', customer))
 
 
 def get_customer_total_debt(customer: str) -> float:
     """Get total pending debt for a customer"""
-    debts = get_debts_by_customer(customer)
-    return sum(d['amount'] for d in debts)
+    return sum(d['amount'] for d in scan_debts('pending', customer))
 
 
 def get_all_customers_with_debt() -> List[Dict]:
     """Get list of all customers with pending debt"""
-    debts = get_all_debts(status='pending')
-    
     # Group by customer
     customers = {}
-    for d in debts:
+    for d in scan_debts('pending'):
         name = d['customer']
         if name not in customers:
             customers[name] = {'customer': name, 'total': 0, 'count': 0, 'telegram_id': ''}
@@ -662,60 +1689,70 @@ def get_all_customers_with_debt() -> List[Dict]:
     return list(customers.values())
 
 
-def mark_debt_paid(row_num: int) -> bool:
-    """Mark a debt as paid"""
+def mark_debt_paid(debt_id: int) -> bool:
+    """Mark a debt as paid (theo ID)"""
     try:
-        sheet = get_client().worksheet(config.SHEET_DEBTS)
-        paid_date = get_local_date()
-        # Column E = Status, Column F = PaidDate
-        sheet.update_cell(row_num, 5, 'paid')
-        sheet.update_cell(row_num, 6, paid_date)
-        return True
-    except Exception:
+        return _mark_debts_paid([int(debt_id)]) == 1
+    except (TypeError, ValueError):
         return False
 
 
 def mark_customer_debts_paid(customer: str) -> int:
     """Mark all debts for a customer as paid, return count"""
     debts = get_debts_by_customer(customer)
-    count = 0
-    for d in debts:
-        if mark_debt_paid(d['row']):
-            count += 1
-    return count
+    return _mark_debts_paid([d['id'] for d in debts if isinstance(d['id'], int)])
+
+
+def _mark_debts_paid(debt_ids: List[int]) -> int:
+    """Mark nhiều khoản nợ (theo ID) là đã trả trong 1 request, return count"""
+    if not debt_ids:
+        return 0
+    try:
+        _flush_pending(config.SHEET_DEBTS)
+        rows = [row_num for row_num, _ in _locate_rows(config.SHEET_DEBTS, debt_ids).values()]
+        if not rows:
+            return 0
+        sheet = get_worksheet(config.SHEET_DEBTS)
+        paid_date = get_local_date()
+        with WriteBatch(sheet) as batch:
+            for row_num in rows:
+                # Column E = Status, Column F = PaidDate
+                batch.update_range(row_num, 5, [['paid', paid_date]])
+        _cache.invalidate(config.SHEET_DEBTS)
+        return len(rows)
+    except Exception:
+        return 0
 
 
 def get_debt_summary() -> Dict:
     """Get overall debt summary"""
-    debts = get_all_debts(status='pending')
-    
-    total_amount = sum(d['amount'] for d in debts)
-    customers = set(d['customer'] for d in debts)
+    total_amount = 0
+    debt_count = 0
+    customers = set()
+    for d in scan_debts('pending'):
+        total_amount += d['amount']
+        debt_count += 1
+        customers.add(d['customer'])
     
     return {
         'total_amount': total_amount,
-        'debt_count': len(debts),
+        'debt_count': debt_count,
         'customer_count': len(customers)
     }
 
 
-def delete_debt(row_num: int) -> bool:
-    """Delete debt by row number"""
+def delete_debt(debt_id: int) -> bool:
+    """Delete debt by ID (chỉ đánh dấu nếu bật SOFT_DELETE)"""
     try:
-        sheet = get_client().worksheet(config.SHEET_DEBTS)
-        sheet.delete_rows(row_num)
-        return True
+        return _delete_row(config.SHEET_DEBTS, debt_id)
     except Exception:
         return False
 
 
 def get_customer_telegram_id(customer: str) -> str:
     """Get Telegram ID for a customer from their debt records"""
-    debts = get_all_debts(status='pending')
-    for d in debts:
-        if d['customer'].lower() == customer.lower() and d.get('telegram_id'):
-            return d['telegram_id']
-    return ''
+    # Dừng ở khoản nợ đầu tiên có Telegram ID (không duyệt hết sheet)
+    return next((d['telegram_id'] for d in scan_debts('pending', customer) if d['telegram_id']), '')
 
 
 def set_customer_telegram_id(customer: str, telegram_id: str) -> int:
@@ -723,12 +1760,22 @@ def set_customer_telegram_id(customer: str, telegram_id: str) -> int:
     Set Telegram ID for all debt records of a customer.
     Returns number of rows updated.
     """
-    sheet = get_client().worksheet(config.SHEET_DEBTS)
-    debts = get_all_debts(status='pending')
-    count = 0
-    for d in debts:
-        if d['customer'].lower() == customer.lower():
+    _flush_pending(config.SHEET_DEBTS)
+    sheet = get_worksheet(config.SHEET_DEBTS)
+    debts = list(scan_debts('pending', customer))
+    if any(not isinstance(d['id'], int) for d in debts):
+        # Dòng nhập tay chưa có ID → ghi ID trước rồi quét lại
+        _get_id_index(config.SHEET_DEBTS)
+        debts = list(scan_debts('pending', customer))
+    debt_ids = [d['id'] for d in debts if isinstance(d['id'], int)]
+    rows = [row_num for row_num, _ in _locate_rows(config.SHEET_DEBTS, debt_ids).values()] if debt_ids else []
+    
+    with WriteBatch(sheet) as batch:
+        for row_num in rows:
             # Column G (7) = TelegramID
-            sheet.update_cell(d['row'], 7, telegram_id)
-            count += 1
+            batch.update_cell(row_num, 7, telegram_id)
+        count = len(batch)
+    
+    if count:
+        _cache.invalidate(config.SHEET_DEBTS)
     return count
@@ -0,0 +1,132 @@
+"""
+Async Sheets Service - Gọi services/sheets.py trên thread pool
+Các hàm gspread là blocking (HTTP), chạy trực tiếp trong handler sẽ chặn
+event loop của python-telegram-bot → mọi update khác phải chờ.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from services import metrics, ratelimit, sheets, storage
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get worker pool (singleton, giới hạn SHEETS_MAX_WORKERS thread)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=config.SHEETS_MAX_WORKERS,
+                thread_name_prefix="sheets"
+            )
+    return _executor
+
+
+def _interactive_call(tags, func, *args, **kwargs):
+    """
+    Request Sheets gọi từ handler được ưu tiên hơn việc nền khi gần hết quota,
+    metrics gắn tag (hàm service, handler) cho các request trong lần gọi này
+    """
+    with ratelimit.interactive(), metrics.tagged(*tags):
+        return func(*args, **kwargs)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Chạy 1 hàm blocking trên worker pool và await kết quả"""
+    loop = asyncio.get_running_loop()
+    # Handler tìm trên stack lúc còn ở event loop (worker thread không thấy stack của handler)
+    tags = (getattr(func, '__name__', None), metrics.caller_handler())
+    return await loop.run_in_executor(
+        _get_executor(), functools.partial(_interactive_call, tags, func, *args, **kwargs)
+    )
+
+
+def shutdown(wait: bool = True):
+    """Đóng worker pool (gọi khi bot dừng)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+def _wrap(name: str):
+    """Tạo bản async của <backend>.<name> (tra cứu hàm lúc gọi, không lúc import)"""
+    async def wrapper(*args, **kwargs):
+        return await run_blocking(getattr(storage.get_backend(), name), *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__qualname__ = name
+    wrapper.__doc__ = getattr(sheets, name).__doc__
+    return wrapper
+
+
+# Hàm không gọi API → dùng trực tiếp, không cần thread pool
+get_local_now = sheets.get_local_now
+get_local_date = sheets.get_local_date
+
+
+def get_cache_stats():
+    """Thống kê cache của backend đang dùng"""
+    return storage.get_backend().get_cache_stats()
+
+
+def invalidate_cache(sheet_name: str = None):
+    """Xóa cache của backend đang dùng"""
+    storage.get_backend().invalidate_cache(sheet_name)
+
+
+# ==================== PRODUCTS ====================
+get_all_products = _wrap('get_all_products')
+find_product_by_sku = _wrap('find_product_by_sku')
+find_product_by_name = _wrap('find_product_by_name')
+search_products = _wrap('search_products')
+get_product = _wrap('get_product')
+add_product = _wrap('add_product')
+update_product = _wrap('update_product')
+delete_product = _wrap('delete_product')
+
+# ==================== SALES ====================
+add_sale = _wrap('add_sale')
+get_today_sales = _wrap('get_today_sales')
+get_today_sales_summary = _wrap('get_today_sales_summary')
+get_month_sales_summary = _wrap('get_month_sales_summary')
+get_sales_by_date = _wrap('get_sales_by_date')
+get_recent_sales = _wrap('get_recent_sales')
+delete_sale = _wrap('delete_sale')
+get_sale_by_row = _wrap('get_sale_by_row')
+get_sale = _wrap('get_sale')
+update_sale = _wrap('update_sale')
+
+# ==================== EXPENSES ====================
+add_expense = _wrap('add_expense')
+get_today_expenses = _wrap('get_today_expenses')
+get_today_expense_summary = _wrap('get_today_expense_summary')
+get_month_expense_summary = _wrap('get_month_expense_summary')
+get_expenses_by_date = _wrap('get_expenses_by_date')
+get_recent_expenses = _wrap('get_recent_expenses')
+delete_expense = _wrap('delete_expense')
+
+# ==================== DASHBOARD ====================
+get_today_overview = _wrap('get_today_overview')
+get_month_overview = _wrap('get_month_overview')
+
+# ==================== DEBT MANAGEMENT ====================
+add_debt = _wrap('add_debt')
+get_all_debts = _wrap('get_all_debts')
+get_debts_by_customer = _wrap('get_debts_by_customer')
+get_customer_total_debt = _wrap('get_customer_total_debt')
+get_all_customers_with_debt = _wrap('get_all_customers_with_debt')
+mark_debt_paid = _wrap('mark_debt_paid')
+mark_customer_debts_paid = _wrap('mark_customer_debts_paid')
+get_debt_summary = _wrap('get_debt_summary')
+delete_debt = _wrap('delete_debt')
+get_customer_telegram_id = _wrap('get_customer_telegram_id')
+set_customer_telegram_id = _wrap('set_customer_telegram_id')
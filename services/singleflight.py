@@ -0,0 +1,66 @@
+"""
+Single Flight - Gộp các lần đọc trùng nhau đang chạy cùng lúc
+2 update cần cùng dữ liệu cùng lúc (admin bấm debt_list 2 lần, 2 lệnh nối tiếp
+trên 2 worker thread...) → chỉ 1 request tới Sheets, cả 2 nhận cùng kết quả.
+Key = (worksheet, range); chỉ gộp khi đang có lần gọi cùng key chưa xong (không cache).
+"""
+
+import threading
+from typing import Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    do(key, fn): người gọi đầu tiên chạy fn(), người gọi sau (cùng key, lúc fn chưa xong)
+    chờ và nhận cùng kết quả hoặc cùng exception.
+    """
+
+    def __init__(self):
+        self._calls = {}  # key -> _Call đang chạy
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls),
+            }
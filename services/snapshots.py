@@ -0,0 +1,133 @@
+"""
+Month Snapshots - Báo cáo của các tháng đã kết thúc, tính 1 lần rồi lưu lại
+Tháng đã qua gần như không đổi → báo cáo tháng cũ đọc từ file JSON trên đĩa
+thay vì tính lại từ từng dòng. Sửa/xóa 1 dòng của tháng cũ chỉ xóa snapshot
+của đúng tháng đó (lần xem sau tính lại và lưu lại).
+Sheet có thể bị sửa tay: mỗi snapshot lưu kèm số dòng của tháng (so với cột Day
+trước khi dùng) và hết hạn sau SNAPSHOT_TTL giây (bắt được sửa giá trị trong dòng).
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _month_key(year: int, month: int) -> str:
+    return f"{year:04d}-{month:02d}"
+
+
+def _restore(summary: Dict) -> Dict:
+    """JSON đổi key số thành chuỗi → trả lại key ngày dạng int như lúc tính"""
+    if isinstance(summary.get('by_day'), dict):
+        summary['by_day'] = {int(day): value for day, value in summary['by_day'].items()}
+    return summary
+
+
+class MonthSnapshots:
+    """
+    Snapshot báo cáo theo (sheet, tháng), lưu trong 1 file JSON.
+    {sheet_name: {'yyyy-mm': {'summary', 'rows', 'saved'}}}; summary là dict trả về của
+    hàm báo cáo tháng, rows = số dòng của tháng lúc tính (None = không đối chiếu).
+    ttl: số giây snapshot còn dùng được (0 = không hết hạn).
+    """
+
+    def __init__(self, path: str, ttl: float = 0):
+        self.path = path
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.expired = 0
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self._data = json.load(f)
+        except ValueError as e:
+            logger.warning(f"Snapshots: bỏ qua file lỗi {self.path}: {e}")
+            self._data = {}
+
+    def _save(self):
+        """Ghi file tạm rồi thay thế (không để file dở dang nếu bot dừng giữa chừng)"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _valid(self, entry: Dict, rows: Optional[int]) -> bool:
+        """Snapshot còn hạn và số dòng của tháng chưa đổi (rows=None → không đối chiếu)"""
+        if 'summary' not in entry:
+            return False  # Định dạng cũ (chưa lưu số dòng) → tính lại 1 lần
+        if self.ttl > 0 and time.time() - entry.get('saved', 0) > self.ttl:
+            return False
+        return rows is None or entry.get('rows') is None or entry['rows'] == rows
+
+    def get(self, sheet_name: str, year: int, month: int, rows: Optional[int] = None) -> Optional[Dict]:
+        """
+        Get bản sao snapshot của 1 tháng, None nếu chưa có.
+        Hết hạn hoặc rows khác số dòng lúc lưu (sheet bị thêm/xóa dòng bằng tay) → xóa, return None.
+        """
+        key = _month_key(year, month)
+        with self._lock:
+            months = self._data.get(sheet_name, {})
+            entry = months.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if not self._valid(entry, rows):
+                del months[key]
+                self.expired += 1
+                self.misses += 1
+                self._save()
+                return None
+            self.hits += 1
+            return _restore(copy.deepcopy(entry['summary']))
+
+    def has(self, sheet_name: str, year: int, month: int) -> bool:
+        """Có snapshot còn hạn (chưa đối chiếu số dòng)"""
+        with self._lock:
+            entry = self._data.get(sheet_name, {}).get(_month_key(year, month))
+            return entry is not None and self._valid(entry, None)
+
+    def put(self, sheet_name: str, year: int, month: int, summary: Dict, rows: Optional[int] = None):
+        with self._lock:
+            self._data.setdefault(sheet_name, {})[_month_key(year, month)] = {
+                'summary': copy.deepcopy(summary), 'rows': rows, 'saved': time.time(),
+            }
+            self._save()
+
+    def invalidate(self, sheet_name: str, year: int, month: int):
+        """Xóa snapshot của đúng 1 tháng (dòng của tháng đó vừa bị sửa/xóa)"""
+        with self._lock:
+            if self._data.get(sheet_name, {}).pop(_month_key(year, month), None) is not None:
+                self.invalidations += 1
+                self._save()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'path': self.path,
+                'months': {name: sorted(months) for name, months in self._data.items()},
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'expired': self.expired,
+                'ttl': self.ttl,
+            }
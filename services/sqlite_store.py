@@ -0,0 +1,595 @@
+"""
+SQLite Store - Lưu dữ liệu shop trong file SQLite (thay cho Google Sheets)
+Cùng các hàm và kiểu dữ liệu trả về như services/sheets.py; 'row' là id của dòng.
+Index theo ngày, SKU, khách hàng, trạng thái nợ → truy vấn dưới 1ms trên máy local.
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, date, timedelta
+from typing import Optional, List, Dict
+
+import config
+from services.indexes import NameIndex, _sku_key
+from services.models import Debt, Expense, Product, Sale
+from services.records import get_local_date, iso_day
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    sku TEXT NOT NULL,
+    sku_key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL DEFAULT '',
+    cost REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS sales (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    day TEXT NOT NULL,
+    sku TEXT NOT NULL DEFAULT '',
+    qty INTEGER NOT NULL DEFAULT 0,
+    price REAL NOT NULL DEFAULT 0,
+    cost REAL NOT NULL DEFAULT 0,
+    profit REAL NOT NULL DEFAULT 0,
+    customer TEXT NOT NULL DEFAULT '',
+    note TEXT NOT NULL DEFAULT '',
+    ref INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_sales_day ON sales (day);
+CREATE INDEX IF NOT EXISTS idx_sales_sku ON sales (sku);
+
+CREATE TABLE IF NOT EXISTS expenses (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    day TEXT NOT NULL,
+    amount REAL NOT NULL DEFAULT 0,
+    description TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT '',
+    ref INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_expenses_day ON expenses (day);
+
+CREATE TABLE IF NOT EXISTS debts (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    customer TEXT NOT NULL DEFAULT '',
+    customer_key TEXT NOT NULL DEFAULT '',
+    amount REAL NOT NULL DEFAULT 0,
+    note TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'pending',
+    paid_date TEXT NOT NULL DEFAULT '',
+    telegram_id TEXT NOT NULL DEFAULT '',
+    ref INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_debts_status_customer ON debts (status, customer_key);
+CREATE INDEX IF NOT EXISTS idx_debts_customer ON debts (customer_key);
+"""
+
+# Bảng có cột ref = ID cố định của dòng (= id khi dùng SQLite trực tiếp, = cột ID trên sheet với bản sao)
+REF_TABLES = ('sales', 'expenses', 'debts')
+
+
+def _month_range(month: int, year: int):
+    """(ngày đầu tháng, ngày đầu tháng sau) dạng ISO, dùng cho day >= ? AND day < ?"""
+    first = date(year, month, 1)
+    following = (first + timedelta(days=32)).replace(day=1)
+    return first.isoformat(), following.isoformat()
+
+
+def _current_month(month: int = None, year: int = None):
+    now = datetime.now(config.VN_TIMEZONE)
+    return month or now.month, year or now.year
+
+
+class SqliteStore:
+    """
+    Backend SQLite: 1 connection dùng chung cho worker pool (khóa bằng lock).
+    Các hàm đọc trả về dict giống services/sheets.py để handler không cần đổi.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._lock = threading.RLock()
+        self._catalog = None  # list product cho NameIndex, None = cần đọc lại
+        self._name_index = NameIndex()
+        self.queries = 0
+
+    def _migrate(self):
+        """Thêm cột ref cho file tạo trước khi có ID cố định (ref = id)"""
+        with self._conn:
+            for table in REF_TABLES:
+                columns = [r[1] for r in self._conn.execute(f"PRAGMA table_info({table})")]
+                if 'ref' not in columns:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN ref INTEGER")
+                    self._conn.execute(f"UPDATE {table} SET ref = id")
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_ref ON {table} (ref)")
+
+    def _query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._lock:
+            self.queries += 1
+            return self._conn.execute(sql, params).fetchall()
+
+    def _execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        with self._lock:
+            self.queries += 1
+            with self._conn:
+                return self._conn.execute(sql, params)
+
+    def _insert(self, table: str, values: Dict) -> int:
+        """Insert 1 dòng, ref = id mới. Return id"""
+        columns = ', '.join(values)
+        placeholders = ', '.join('?' * len(values))
+        with self._lock:
+            self.queries += 1
+            with self._conn:
+                row_id = self._conn.execute(
+                    f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", tuple(values.values())
+                ).lastrowid
+                self._conn.execute(f"UPDATE {table} SET ref = id WHERE id = ?", (row_id,))
+            return row_id
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def table_rows(self, table: str, columns: List[str]) -> Dict[int, tuple]:
+        """Get {id: (giá trị các cột)} của 1 bảng (dùng cho so sánh khi đồng bộ)"""
+        rows = self._query(f"SELECT id, {', '.join(columns)} FROM {table}")
+        return {r[0]: tuple(r[1:]) for r in rows}
+
+    def replace_rows(self, table: str, columns: List[str], delete_ids: List[int], rows: Dict[int, tuple]):
+        """
+        Xóa các id trong delete_ids và ghi lại rows {id: values} trong 1 transaction.
+        Dòng trong rows được xóa trước rồi insert lại → không đụng ràng buộc UNIQUE giữa các dòng đổi chỗ.
+        """
+        placeholders = ', '.join('?' * (len(columns) + 1))
+        with self._lock:
+            self.queries += 1
+            with self._conn:
+                self._conn.executemany(
+                    f"DELETE FROM {table} WHERE id = ?",
+                    [(row_id,) for row_id in (*delete_ids, *rows)]
+                )
+                self._conn.executemany(
+                    f"INSERT INTO {table} (id, {', '.join(columns)}) VALUES ({placeholders})",
+                    [(row_id, *values) for row_id, values in rows.items()]
+                )
+            if table == 'products':
+                self._catalog = None
+
+    # ==================== CACHE ====================
+
+    def get_cache_stats(self) -> Dict:
+        """Thống kê backend (không có cache, chỉ đếm truy vấn)"""
+        return {'backend': 'sqlite', 'path': self.path, 'queries': self.queries}
+
+    def invalidate_cache(self, sheet_name: str = None):
+        """Xóa catalog đang giữ cho tìm kiếm theo tên"""
+        with self._lock:
+            self._catalog = None
+
+    # ==================== PRODUCTS ====================
+
+    @staticmethod
+    def _product(row: sqlite3.Row) -> Product:
+        return Product(row=row['id'], sku=row['sku'], name=row['name'], cost=row['cost'])
+
+    def get_all_products(self) -> List[Product]:
+        """Get all products"""
+        return [self._product(r) for r in self._query("SELECT * FROM products ORDER BY id")]
+
+    def find_product_by_sku(self, sku: str) -> Optional[Product]:
+        """Find product by SKU (không phân biệt hoa/thường)"""
+        rows = self._query("SELECT * FROM products WHERE sku_key = ?", (_sku_key(sku),))
+        return self._product(rows[0]) if rows else None
+
+    def search_products(self, query: str, limit: int = 10, fuzzy: bool = True) -> List[Product]:
+        """Search products by name (bỏ dấu, xếp hạng như bản Sheets)"""
+        with self._lock:
+            if self._catalog is None:
+                self._catalog = self.get_all_products()
+            catalog = self._catalog
+        self._name_index.sync(catalog, lambda _, product: product)
+        by_sku = {_sku_key(p['sku']): p for p in catalog}
+        return [by_sku[sku].copy() for sku in self._name_index.search(query, limit, fuzzy=fuzzy)]
+
+    def find_product_by_name(self, name: str) -> Optional[Product]:
+        """Find product by name (exact match first, then substring)"""
+        results = self.search_products(name, limit=1, fuzzy=False)
+        return results[0] if results else None
+
+    def get_product(self, sku: str) -> Optional[Product]:
+        """Get product by SKU (alias for find_product_by_sku)"""
+        return self.find_product_by_sku(sku)
+
+    def add_product(self, sku: str, name: str, cost: float) -> bool:
+        """Add new product"""
+        try:
+            self._execute(
+                "INSERT INTO products (sku, sku_key, name, cost) VALUES (?, ?, ?, ?)",
+                (sku, _sku_key(sku), name, cost)
+            )
+        except sqlite3.IntegrityError:
+            return False
+        self.invalidate_cache()
+        return True
+
+    def update_product(self, sku: str, cost: float = None, name: str = None) -> bool:
+        """Update product"""
+        product = self.find_product_by_sku(sku)
+        if not product:
+            return False
+        self._execute(
+            "UPDATE products SET name = ?, cost = ? WHERE id = ?",
+            (name or product['name'], product['cost'] if cost is None else cost, product['row'])
+        )
+        self.invalidate_cache()
+        return True
+
+    def delete_product(self, sku: str) -> bool:
+        """Delete product"""
+        deleted = self._execute("DELETE FROM products WHERE sku_key = ?", (_sku_key(sku),)).rowcount
+        self.invalidate_cache()
+        return deleted > 0
+
+    # ==================== SALES ====================
+
+    @staticmethod
+    def _sale(row: sqlite3.Row) -> Sale:
+        return Sale(
+            id=row['ref'],
+            row=row['id'],
+            date=row['date'],
+            sku=row['sku'],
+            quantity=row['qty'],
+            price=row['price'],
+            cost=row['cost'],
+            profit=row['profit'],
+            customer=row['customer'],
+            note=row['note']
+        )
+
+    def add_sale(self, sku: str, quantity: int, price: float, cost: float,
+                 customer: str = "", note: str = "") -> Sale:
+        """Add sale transaction (price = tổng tiền thu, profit = price - cost × quantity)"""
+        today = get_local_date()
+        total_cost = cost * quantity
+        profit = price - total_cost
+        sale_id = self._insert('sales', {
+            'date': today, 'day': iso_day(today), 'sku': sku, 'qty': quantity, 'price': price,
+            'cost': cost, 'profit': profit, 'customer': customer, 'note': note
+        })
+        return Sale(
+            id=sale_id,
+            date=today,
+            sku=sku,
+            quantity=quantity,
+            price=price,
+            cost=cost,
+            total_cost=total_cost,
+            profit=profit,
+            revenue=price,
+            customer=customer
+        )
+
+    def _sales_on(self, day: str) -> List[Sale]:
+        rows = self._query("SELECT * FROM sales WHERE day = ? ORDER BY id", (day,))
+        return [self._sale(r) for r in rows]
+
+    def get_today_sales(self) -> List[Sale]:
+        """Get today's sales"""
+        return self._sales_on(iso_day(get_local_date()))
+
+    def get_today_sales_summary(self) -> Dict:
+        """Get today's sales summary"""
+        sales = self.get_today_sales()
+        return {
+            'sale_count': len(sales),
+            'total_quantity': sum(s['quantity'] for s in sales),
+            'total_revenue': sum(s['price'] * s['quantity'] for s in sales),
+            'total_profit': sum(s['profit'] for s in sales)
+        }
+
+    def get_month_sales_summary(self, month: int = None, year: int = None) -> Dict:
+        """Get monthly sales summary (GROUP BY ngày, SKU trên index day)"""
+        month, year = _current_month(month, year)
+        rows = self._query(
+            "SELECT CAST(substr(day, 9, 2) AS INTEGER) AS d, sku, COUNT(*) AS count, "
+            "SUM(price) AS revenue, SUM(profit) AS profit, SUM(qty) AS quantity "
+            "FROM sales WHERE day >= ? AND day < ? GROUP BY d, sku",
+            _month_range(month, year)
+        )
+
+        summary = {
+            'month': month,
+            'year': year,
+            'sale_count': 0,
+            'total_quantity': 0,
+            'total_revenue': 0,
+            'total_profit': 0,
+            'by_day': {},
+            'by_sku': {}
+        }
+        for r in rows:
+            summary['sale_count'] += r['count']
+            summary['total_quantity'] += r['quantity']
+            summary['total_revenue'] += r['revenue']
+            summary['total_profit'] += r['profit']
+            day = summary['by_day'].setdefault(r['d'], {'revenue': 0, 'profit': 0, 'count': 0})
+            sku = summary['by_sku'].setdefault(
+                r['sku'], {'revenue': 0, 'profit': 0, 'quantity': 0, 'count': 0}
+            )
+            for field in ('revenue', 'profit', 'count'):
+                day[field] += r[field]
+            for field in ('revenue', 'profit', 'quantity', 'count'):
+                sku[field] += r[field]
+        return summary
+
+    def get_sales_by_date(self, day: int, month: int = None, year: int = None) -> List[Sale]:
+        """Get sales details for a specific date"""
+        month, year = _current_month(month, year)
+        return self._sales_on(f"{year}-{month:02d}-{day:02d}")
+
+    def get_recent_sales(self, limit: int = 10) -> List[Sale]:
+        """Get recent sales"""
+        rows = self._query("SELECT * FROM sales ORDER BY id DESC LIMIT ?", (limit,))
+        return [self._sale(r) for r in rows]
+
+    def delete_sale(self, sale_id: int) -> bool:
+        """Delete sale by ID"""
+        return self._execute("DELETE FROM sales WHERE ref = ?", (sale_id,)).rowcount > 0
+
+    def get_sale_by_row(self, row_num: int) -> Optional[Sale]:
+        """Get sale details by row number"""
+        rows = self._query("SELECT * FROM sales WHERE id = ?", (row_num,))
+        return self._sale(rows[0]) if rows else None
+
+    def get_sale(self, sale_id: int) -> Optional[Sale]:
+        """Get sale details by ID"""
+        rows = self._query("SELECT * FROM sales WHERE ref = ?", (sale_id,))
+        return self._sale(rows[0]) if rows else None
+
+    def update_sale(self, sale_id: int, quantity: int = None, price: float = None,
+                    customer: str = None, note: str = None) -> bool:
+        """Update sale by ID, tính lại profit nếu đổi quantity/price"""
+        current = self.get_sale(sale_id)
+        if not current:
+            return False
+        qty = current['quantity'] if quantity is None else quantity
+        price = current['price'] if price is None else price
+        self._execute(
+            "UPDATE sales SET qty = ?, price = ?, profit = ?, customer = ?, note = ? WHERE id = ?",
+            (
+                qty, price, price - current['cost'] * qty,
+                current['customer'] if customer is None else customer,
+                current['note'] if note is None else note,
+                current['row']
+            )
+        )
+        return True
+
+    # ==================== EXPENSES ====================
+
+    @staticmethod
+    def _expense(row: sqlite3.Row) -> Expense:
+        return Expense(
+            id=row['ref'],
+            row=row['id'],
+            date=row['date'],
+            amount=row['amount'],
+            description=row['description'],
+            category=row['category']
+        )
+
+    def add_expense(self, amount: float, description: str, category: str = "Living") -> Expense:
+        """Add expense"""
+        today = get_local_date()
+        expense_id = self._insert('expenses', {
+            'date': today, 'day': iso_day(today), 'amount': amount,
+            'description': description, 'category': category
+        })
+        return Expense(
+            id=expense_id, date=today, amount=amount,
+            description=description, category=category
+        )
+
+    def _expenses_on(self, day: str) -> List[Expense]:
+        rows = self._query("SELECT * FROM expenses WHERE day = ? ORDER BY id", (day,))
+        return [self._expense(r) for r in rows]
+
+    def get_today_expenses(self) -> List[Expense]:
+        """Get today's expenses"""
+        return self._expenses_on(iso_day(get_local_date()))
+
+    def get_today_expense_summary(self) -> Dict:
+        """Get today's expense summary"""
+        expenses = self.get_today_expenses()
+        by_category = {}
+        for e in expenses:
+            cat = e['category'] or 'Other'
+            by_category[cat] = by_category.get(cat, 0) + e['amount']
+        return {
+            'count': len(expenses),
+            'total': sum(e['amount'] for e in expenses),
+            'by_category': by_category
+        }
+
+    def get_month_expense_summary(self, month: int = None, year: int = None) -> Dict:
+        """Get monthly expense summary (GROUP BY ngày, loại trên index day)"""
+        month, year = _current_month(month, year)
+        rows = self._query(
+            "SELECT CAST(substr(day, 9, 2) AS INTEGER) AS d, "
+            "COALESCE(NULLIF(category, ''), 'Other') AS category, "
+            "COUNT(*) AS count, SUM(amount) AS amount "
+            "FROM expenses WHERE day >= ? AND day < ? GROUP BY d, 2",
+            _month_range(month, year)
+        )
+
+        total = 0
+        count = 0
+        by_category = {}
+        by_day = {}
+        for r in rows:
+            total += r['amount']
+            count += r['count']
+            by_category[r['category']] = by_category.get(r['category'], 0) + r['amount']
+            by_day[r['d']] = by_day.get(r['d'], 0) + r['amount']
+        return {
+            'month': month,
+            'year': year,
+            'count': count,
+            'total': total,
+            'by_category': by_category,
+            'by_day': by_day
+        }
+
+    def get_expenses_by_date(self, day: int, month: int = None, year: int = None) -> List[Expense]:
+        """Get expense details for a specific date"""
+        month, year = _current_month(month, year)
+        return self._expenses_on(f"{year}-{month:02d}-{day:02d}")
+
+    def get_recent_expenses(self, limit: int = 10) -> List[Expense]:
+        """Get recent expenses"""
+        rows = self._query("SELECT * FROM expenses ORDER BY id DESC LIMIT ?", (limit,))
+        return [self._expense(r) for r in rows]
+
+    def delete_expense(self, expense_id: int) -> bool:
+        """Delete expense by ID"""
+        return self._execute("DELETE FROM expenses WHERE ref = ?", (expense_id,)).rowcount > 0
+
+    # ==================== DASHBOARD ====================
+
+    def get_today_overview(self) -> Dict:
+        """Tổng kết hôm nay (bán + chi)"""
+        return {'sales': self.get_today_sales_summary(), 'expenses': self.get_today_expense_summary()}
+
+    def get_month_overview(self, month: int = None, year: int = None) -> Dict:
+        """Tổng kết tháng (bán + chi)"""
+        return {
+            'sales': self.get_month_sales_summary(month, year),
+            'expenses': self.get_month_expense_summary(month, year)
+        }
+
+    # ==================== DEBT MANAGEMENT ====================
+
+    @staticmethod
+    def _debt(row: sqlite3.Row) -> Debt:
+        return Debt(
+            id=row['ref'],
+            row=row['id'],
+            date=row['date'],
+            customer=row['customer'],
+            amount=row['amount'],
+            note=row['note'],
+            status=row['status'],
+            paid_date=row['paid_date'],
+            telegram_id=row['telegram_id'].strip()
+        )
+
+    def add_debt(self, customer: str, amount: float, note: str = "", telegram_id: str = "") -> Debt:
+        """Add new debt record"""
+        today = get_local_date()
+        debt_id = self._insert('debts', {
+            'date': today, 'customer': customer, 'customer_key': customer.lower(),
+            'amount': amount, 'note': note, 'telegram_id': str(telegram_id)
+        })
+        return Debt(
+            id=debt_id,
+            date=today,
+            customer=customer,
+            amount=amount,
+            note=note,
+            status='pending',
+            telegram_id=telegram_id
+        )
+
+    def get_all_debts(self, status: str = None) -> List[Debt]:
+        """Get all debts, optionally filter by status (pending/paid)"""
+        if status is None:
+            rows = self._query("SELECT * FROM debts ORDER BY id")
+        else:
+            rows = self._query("SELECT * FROM debts WHERE status = ? ORDER BY id", (status,))
+        return [self._debt(r) for r in rows]
+
+    def get_debts_by_customer(self, customer: str) -> List[Debt]:
+        """Get all pending debts for a specific customer"""
+        rows = self._query(
+            "SELECT * FROM debts WHERE status = 'pending' AND customer_key = ? ORDER BY id",
+            (customer.lower(),)
+        )
+        return [self._debt(r) for r in rows]
+
+    def get_customer_total_debt(self, customer: str) -> float:
+        """Get total pending debt for a customer"""
+        rows = self._query(
+            "SELECT COALESCE(SUM(amount), 0) FROM debts WHERE status = 'pending' AND customer_key = ?",
+            (customer.lower(),)
+        )
+        return rows[0][0]
+
+    def get_all_customers_with_debt(self) -> List[Dict]:
+        """Get list of all customers with pending debt"""
+        customers = {}
+        for d in self.get_all_debts(status='pending'):
+            name = d['customer']
+            if name not in customers:
+                customers[name] = {'customer': name, 'total': 0, 'count': 0, 'telegram_id': ''}
+            customers[name]['total'] += d['amount']
+            customers[name]['count'] += 1
+            if d['telegram_id'] and not customers[name]['telegram_id']:
+                customers[name]['telegram_id'] = d['telegram_id']
+        return list(customers.values())
+
+    def mark_debt_paid(self, debt_id: int) -> bool:
+        """Mark a debt as paid (theo ID)"""
+        return self._execute(
+            "UPDATE debts SET status = 'paid', paid_date = ? WHERE ref = ?",
+            (get_local_date(), debt_id)
+        ).rowcount == 1
+
+    def mark_customer_debts_paid(self, customer: str) -> int:
+        """Mark all debts for a customer as paid, return count"""
+        return self._execute(
+            "UPDATE debts SET status = 'paid', paid_date = ? "
+            "WHERE status = 'pending' AND customer_key = ?",
+            (get_local_date(), customer.lower())
+        ).rowcount
+
+    def get_debt_summary(self) -> Dict:
+        """Get overall debt summary"""
+        row = self._query(
+            "SELECT COALESCE(SUM(amount), 0), COUNT(*), COUNT(DISTINCT customer) "
+            "FROM debts WHERE status = 'pending'"
+        )[0]
+        return {'total_amount': row[0], 'debt_count': row[1], 'customer_count': row[2]}
+
+    def delete_debt(self, debt_id: int) -> bool:
+        """Delete debt by ID"""
+        return self._execute("DELETE FROM debts WHERE ref = ?", (debt_id,)).rowcount > 0
+
+    def get_customer_telegram_id(self, customer: str) -> str:
+        """Get Telegram ID for a customer from their debt records"""
+        rows = self._query(
+            "SELECT telegram_id FROM debts WHERE status = 'pending' AND customer_key = ? "
+            "AND TRIM(telegram_id) != '' ORDER BY id LIMIT 1",
+            (customer.lower(),)
+        )
+        return rows[0][0].strip() if rows else ''
+
+    def set_customer_telegram_id(self, customer: str, telegram_id: str) -> int:
+        """Set Telegram ID for all pending debt records of a customer, return count"""
+        return self._execute(
+            "UPDATE debts SET telegram_id = ? WHERE status = 'pending' AND customer_key = ?",
+            (str(telegram_id), customer.lower())
+        ).rowcount
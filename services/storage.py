@@ -0,0 +1,71 @@
+"""
+Storage Backend - Chọn nơi lưu dữ liệu (Google Sheets hoặc SQLite) theo config
+Mọi backend cung cấp cùng các hàm trong OPERATIONS, cùng tham số và kiểu trả về
+như services/sheets.py. Handler gọi qua services/sheets_async.py, không phụ thuộc backend.
+"""
+
+import threading
+
+import config
+
+
+# Các hàm mọi backend phải có
+OPERATIONS = (
+    # Cache
+    'get_cache_stats', 'invalidate_cache',
+    # Products
+    'get_all_products', 'find_product_by_sku', 'find_product_by_name', 'search_products',
+    'get_product', 'add_product', 'update_product', 'delete_product',
+    # Sales
+    'add_sale', 'get_today_sales', 'get_today_sales_summary', 'get_month_sales_summary',
+    'get_sales_by_date', 'get_recent_sales', 'delete_sale', 'get_sale_by_row', 'get_sale', 'update_sale',
+    # Expenses
+    'add_expense', 'get_today_expenses', 'get_today_expense_summary', 'get_month_expense_summary',
+    'get_expenses_by_date', 'get_recent_expenses', 'delete_expense',
+    # Dashboard
+    'get_today_overview', 'get_month_overview',
+    # Debts
+    'add_debt', 'get_all_debts', 'get_debts_by_customer', 'get_customer_total_debt',
+    'get_all_customers_with_debt', 'mark_debt_paid', 'mark_customer_debts_paid',
+    'get_debt_summary', 'delete_debt', 'get_customer_telegram_id', 'set_customer_telegram_id',
+)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _create_backend(name: str):
+    if name == 'sheets':
+        from services import sheets
+        return sheets
+    if name == 'sqlite':
+        from services.sqlite_store import SqliteStore
+        return SqliteStore(config.SQLITE_PATH)
+    if name == 'replica':
+        from services.replica import SheetsReplica
+        return SheetsReplica(config.REPLICA_PATH, config.REPLICA_SYNC_INTERVAL)
+    raise ValueError(f"❌ STORAGE_BACKEND không hợp lệ: '{name}' (sheets | sqlite | replica)")
+
+
+def get_backend():
+    """Get backend đang dùng (singleton, chọn theo STORAGE_BACKEND)"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            backend = _create_backend(config.STORAGE_BACKEND)
+            missing = [op for op in OPERATIONS if not callable(getattr(backend, op, None))]
+            if missing:
+                raise TypeError(f"Backend '{config.STORAGE_BACKEND}' thiếu hàm: {', '.join(missing)}")
+            _backend = backend
+    return _backend
+
+
+def shutdown():
+    """Đóng backend (dừng thread nền, đóng file SQLite) khi bot dừng"""
+    global _backend
+    with _backend_lock:
+        close = getattr(_backend, 'close', None)
+        if callable(close):
+            close()
+        _backend = None
@@ -0,0 +1,167 @@
+"""
+Worksheet Registry - Cache object Worksheet theo tên tab
+spreadsheet.worksheet(name) gọi fetch_sheet_metadata mỗi lần → thêm 1 round trip
+ẩn cho mọi lần đọc/ghi. Registry tải metadata 1 lần cho tất cả tab và giữ lại.
+"""
+
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import gspread
+from gspread.utils import absolute_range_name
+
+
+# Range A1 hợp lệ (A1, A2:K, 1:1, A:A...) - lỗi parse range với A1 đúng cú pháp = tên tab sai
+_A1 = re.compile(r"^\$?[A-Za-z]{0,3}\$?\d*(:\$?[A-Za-z]{0,3}\$?\d*)?$")
+_UNPARSABLE_RANGE = re.compile(r"Unable to parse range: (.+?)!([^\s'\"]*)")
+
+
+def _error_message(error: Exception) -> str:
+    detail = getattr(error, 'error', None)
+    if isinstance(detail, dict):
+        return str(detail.get('message', ''))
+    return str(error)
+
+
+def _is_stale_handle_error(error: Exception, title: str) -> bool:
+    """
+    Lỗi "không tìm thấy tab" của handle cũ (tab title), không phải mọi lỗi 400:
+    - 'No grid with id' → tab bị xóa rồi tạo lại (sheetId cũ)
+    - 'Unable to parse range: <title>!<A1 hợp lệ>' → tab bị đổi tên
+    Range sai cú pháp/lỗi khác → raise luôn, không tải lại metadata.
+    """
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) != 400:
+        return False
+    message = _error_message(error)
+    if 'No grid with id' in message:
+        return True
+    match = _UNPARSABLE_RANGE.search(message)
+    if match is None:
+        return False
+    tab, a1 = match.group(1).strip("'").replace("''", "'"), match.group(2)
+    return tab == title and bool(_A1.match(a1))
+
+
+class WorksheetRegistry:
+    """
+    Giữ Worksheet theo tên tab.
+    - Lần đầu: 1 lần spreadsheet.worksheets() cho TẤT CẢ tab
+    - Tab bị đổi tên: tìm lại theo sheet id cũ
+    - Tab bị xóa rồi tạo lại: tìm lại theo tên
+    """
+
+    def __init__(self, get_spreadsheet: Callable):
+        self._get_spreadsheet = get_spreadsheet
+        self._by_name = {}  # config name -> gspread.Worksheet
+        self._lock = threading.Lock()
+        self.metadata_fetches = 0
+        self.metadata_fetches_saved = 0
+
+    def _load(self) -> Dict[str, gspread.Worksheet]:
+        """Tải metadata toàn bộ tab (1 request)"""
+        self.metadata_fetches += 1
+        return {ws.title: ws for ws in self._get_spreadsheet().worksheets()}
+
+    def get(self, name: str, count: bool = False) -> gspread.Worksheet:
+        """
+        Get Worksheet theo tên (không gọi API nếu đã có trong cache).
+        count=True: lần tra cứu thay cho 1 lần spreadsheet.worksheet(name) trước đây
+        → tính vào metadata_fetches_saved nếu lấy được từ cache.
+        """
+        with self._lock:
+            sheet = self._by_name.get(name)
+            if sheet is not None:
+                self.metadata_fetches_saved += int(count)
+                return sheet
+
+            tabs = self._load()
+            self._by_name.update(tabs)
+            if name not in tabs:
+                raise gspread.exceptions.WorksheetNotFound(name)
+            return tabs[name]
+
+    def refresh(self, name: str) -> gspread.Worksheet:
+        """Tải lại handle của 1 tab sau khi phát hiện handle cũ không còn dùng được"""
+        with self._lock:
+            old = self._by_name.pop(name, None)
+            tabs = self._load()
+            sheet = tabs.get(name)
+            if sheet is None and old is not None:
+                # Tab bị đổi tên → theo sheet id
+                sheet = next((ws for ws in tabs.values() if ws.id == old.id), None)
+            if sheet is None:
+                raise gspread.exceptions.WorksheetNotFound(name)
+            self._by_name[name] = sheet
+            return sheet
+
+    def values_batch_get(self, ranges: List[Tuple[str, Optional[str]]], **kwargs) -> Dict:
+        """
+        spreadsheet.values_batch_get theo (tên tab trong config, A1 hoặc None = cả tab).
+        Range dựng từ title hiện tại của tab → tab bị đổi tên thì refresh rồi thử lại 1 lần
+        như WorksheetHandle.
+        """
+        def build() -> List[str]:
+            return [absolute_range_name(self.get(name).title, a1) if a1
+                    else absolute_range_name(self.get(name).title) for name, a1 in ranges]
+
+        try:
+            return self._get_spreadsheet().values_batch_get(build(), **kwargs)
+        except gspread.exceptions.APIError as e:
+            stale = [name for name in dict.fromkeys(name for name, _ in ranges)
+                     if _is_stale_handle_error(e, self.get(name).title)]
+            if not stale:
+                raise
+            for name in stale:
+                self.refresh(name)
+            return self._get_spreadsheet().values_batch_get(build(), **kwargs)
+
+    def clear(self):
+        """Xóa toàn bộ handle (lần get sau sẽ tải lại metadata)"""
+        with self._lock:
+            self._by_name.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'tabs': sorted(self._by_name),
+                'metadata_fetches': self.metadata_fetches,
+                'metadata_fetches_saved': self.metadata_fetches_saved,
+            }
+
+
+class WorksheetHandle:
+    """
+    Proxy thay cho gspread.Worksheet, dùng như Worksheet bình thường.
+    Nếu 1 lệnh lỗi vì handle cũ (tab đổi tên/tạo lại) → refresh và thử lại 1 lần.
+    """
+
+    def __init__(self, registry: WorksheetRegistry, name: str):
+        self._registry = registry
+        self._name = name
+        self._counted = False
+
+    @property
+    def worksheet(self) -> gspread.Worksheet:
+        return self._registry.get(self._name)
+
+    def _call(self, method: str, *args, **kwargs):
+        # 1 handle = 1 lần get_worksheet (trước đây mỗi lần tốn 1 request metadata)
+        sheet = self._registry.get(self._name, count=not self._counted)
+        self._counted = True
+        try:
+            return getattr(sheet, method)(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            if not _is_stale_handle_error(e, sheet.title):
+                raise
+            sheet = self._registry.refresh(self._name)
+            return getattr(sheet, method)(*args, **kwargs)
+
+    def __getattr__(self, attr: str):
+        if callable(getattr(gspread.Worksheet, attr, None)):
+            return lambda *args, **kwargs: self._call(attr, *args, **kwargs)
+        return getattr(self.worksheet, attr)
+
+    def __repr__(self) -> str:
+        return f"<WorksheetHandle {self._name!r}>"
@@ -0,0 +1,58 @@
+"""
+Fixture dùng chung: services/sheets.py chạy trên Sheets giả (services/fake_sheets.py),
+mọi trạng thái cấp module (cache, index, ID, snapshot...) làm mới cho từng test,
+file của bot đặt trong tmp_path.
+"""
+
+import pytest
+
+import config
+from services.cache import RecordCache
+from services.fake_sheets import FakeClient
+from services.indexes import DayLocator, NameIndex, RowIdIndex, SkuIndex
+from services.sequences import IdSequences
+from services.singleflight import SingleFlight
+from services.snapshots import MonthSnapshots
+
+
+@pytest.fixture
+def sheets(tmp_path, monkeypatch):
+    """services.sheets trên Sheets giả chỉ có header (outbox, compaction, rate limit tắt)"""
+    monkeypatch.setattr(config, 'SHEETS_CLIENT', 'fake')
+    monkeypatch.setattr(config, 'FAKE_SHEETS_DATA', '')
+    monkeypatch.setattr(config, 'SOFT_DELETE', False)
+    from services import sheets
+    state = {
+        '_client': None,
+        '_spreadsheet': None,
+        '_outbox': None,
+        '_compactor': None,
+        '_limiter': None,
+        '_cache': RecordCache(config.SHEETS_CACHE_TTL),
+        '_sku_index': SkuIndex(),
+        '_name_index': NameIndex(),
+        '_columns': {},
+        '_date_indexes': {},
+        '_id_indexes': {name: RowIdIndex() for name in sheets.ID_SHEETS},
+        '_id_sequences': IdSequences(str(tmp_path / 'ids.json'), lambda name: sheets._max_sheet_id(name)),
+        '_day_locators': {name: DayLocator() for name in sheets.ID_SHEETS},
+        '_snapshots': MonthSnapshots(str(tmp_path / 'snapshots.json'), config.SNAPSHOT_TTL),
+        '_flights': SingleFlight(),
+    }
+    for name, value in state.items():
+        monkeypatch.setattr(sheets, name, value)
+    sheets._worksheets.clear()
+    yield sheets
+    sheets._worksheets.clear()
+
+
+@pytest.fixture
+def use_data(sheets, monkeypatch):
+    """use_data({tab: rows}) → thay Sheets giả bằng dữ liệu cho trước, return FakeClient"""
+    def use(data):
+        client = FakeClient(data)
+        monkeypatch.setattr(sheets, '_client', client)
+        monkeypatch.setattr(sheets, '_spreadsheet', client.open_by_key('fake'))
+        sheets._worksheets.clear()
+        return client
+    return use
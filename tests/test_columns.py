@@ -0,0 +1,104 @@
+"""
+Test ColumnStore (services/columns.py): dùng như list records (đọc lại đúng giá trị/kiểu),
+tổng theo ngày/nhóm của tháng giữ đúng sau mỗi lần thêm/sửa/xóa.
+
+Chạy: python -m pytest tests
+"""
+
+import pytest
+
+from services import columns
+from services.columns import ColumnStore
+from services.models import Sale
+
+TOTALS = {'revenue': 'price', 'quantity': 'quantity'}
+
+
+def brute_month(records, year, month):
+    """Cộng lại từ đầu trên list record (cách cũ)"""
+    days, groups = {}, {}
+    for r in records:
+        try:
+            d, m, y = (int(p) for p in str(r.get('date', '')).split('/'))
+        except ValueError:
+            continue
+        if (y, m) != (year, month):
+            continue
+        for buckets, key in ((days, d), (groups, r.get('sku', '') or 'Other')):
+            bucket = buckets.setdefault(key, dict.fromkeys(['count', *TOTALS], 0))
+            bucket['count'] += 1
+            for name, field in TOTALS.items():
+                bucket[name] += r.get(field, 0) or 0
+    return {'days': days, 'groups': groups}
+
+
+@pytest.fixture(params=['array', 'numpy'])
+def store(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(columns, 'np', None)
+    return ColumnStore(Sale, ['id', 'quantity', 'price'], 'sku', TOTALS, default_group='Other')
+
+
+def make_records():
+    return [
+        Sale(id=1, date='30/09/2026', sku='SP01', quantity=1, price=100),
+        Sale(id=2, date='01/10/2026', sku='SP01', quantity=2, price=200, note='giao sau'),
+        Sale(id=3, date='01/10/2026', sku='SP02', quantity=1, price=150),
+        Sale(id='', date='', sku='', quantity='', price=''),  # dòng trống
+        Sale(id=5, date='01/10/2026', sku='SP01', quantity=3, price=300),
+        Sale(id=6, date='15/10/2026', sku='', quantity=1, price=2.5),
+    ]
+
+
+def test_rows_read_back(store):
+    records = make_records()
+    store.extend(records)
+    assert len(store) == 6
+    assert list(store) == records
+    assert store[-1] == records[-1] and store[1:3] == records[1:3]
+    assert isinstance(store[0], Sale) and 'note' not in store[0]
+    assert type(store[0]['quantity']) is int and type(store[5]['price']) is float
+    assert store[3]['price'] == ''
+
+    store.append(Sale(id=7, date='02/10/2026', sku='SP03', quantity='nhiều', price=10, note='x'))
+    assert store[6]['quantity'] == 'nhiều' and store[6]['note'] == 'x'
+    assert store.pop(0) == records[0]
+    assert store[5]['quantity'] == 'nhiều' and len(store) == 6
+    with pytest.raises(IndexError):
+        store[6]
+
+
+def test_month_totals(store):
+    records = make_records()
+    store.extend(records)
+    assert store.month(2026, 10) == brute_month(records, 2026, 10)
+    assert store.month(2026, 10)['groups']['SP01'] == {'count': 2, 'revenue': 500, 'quantity': 5}
+    assert store.month(2026, 9) == {
+        'days': {30: {'count': 1, 'revenue': 100, 'quantity': 1}},
+        'groups': {'SP01': {'count': 1, 'revenue': 100, 'quantity': 1}},
+    }
+    assert store.month(2026, 11) == {'days': {}, 'groups': {}}
+
+
+def test_writes_keep_totals(store):
+    records = make_records()
+    store.extend(records)
+
+    records.append(Sale(id=7, date='02/10/2026', sku='SP03', quantity=4, price=400))
+    store.append(records[-1])
+    record = store[1]
+    record.update({'sku': 'SP02', 'price': 250})
+    store[1] = records[1] = record
+    del records[0]
+    del store[0]
+    records[3] = Sale(id='', date='', sku='', quantity='', price='')  # đánh dấu xóa
+    store[3] = records[3]
+
+    assert list(store) == records
+    assert store.month(2026, 10) == brute_month(records, 2026, 10)
+    assert store.month(2026, 9) == {'days': {}, 'groups': {}}
+
+    store.rebuild()
+    assert store.month(2026, 10) == brute_month(records, 2026, 10)
@@ -0,0 +1,36 @@
+"""
+Test xóa mềm + dọn dòng đã xóa (compact_deleted, services/compaction.py): xóa mềm không dồn dòng,
+compaction xóa hẳn trong 1 request, ID không đổi sau khi dọn.
+
+Chạy: python -m pytest tests
+"""
+
+import config
+from services.compaction import Compactor
+
+
+def test_soft_delete_then_compact(sheets, monkeypatch):
+    monkeypatch.setattr(config, 'SOFT_DELETE', True)
+    sales = [sheets.add_sale(f'SP0{i}', 1, 100 * i, 50) for i in range(1, 6)]
+    expense = sheets.add_expense(30, 'Điện', 'Bills')
+    worksheet = sheets.get_worksheet(config.SHEET_SALES)
+
+    for sale in sales[1:3] + sales[4:]:
+        assert sheets.delete_sale(sale['id'])
+    assert sheets.delete_expense(expense['id'])
+    assert len(worksheet.get_all_values()) == 6  # chỉ đánh dấu, không dồn dòng
+    assert [s['id'] for s in sheets.get_recent_sales(10)] == [sales[3]['id'], sales[0]['id']]
+
+    compactor = Compactor(sheets.compact_deleted, config.COMPACTION_HOUR, config.VN_TIMEZONE)
+    assert compactor.run_now() == {config.SHEET_SALES: 3, config.SHEET_EXPENSES: 1}
+    assert compactor.stats()['rows_removed'] == 4
+    rows = worksheet.get_all_values()
+    assert [row[1] for row in rows[1:]] == ['SP01', 'SP04']
+    assert all(row[9] == '' for row in rows[1:])
+
+    # Row number đổi sau khi dọn, ID thì không
+    assert sheets.get_sale(sales[3]['id'])['row'] == 3
+    assert sheets.update_sale(sales[3]['id'], quantity=2)
+    assert worksheet.get_all_values()[2][2] == '2'
+    assert sheets.compact_deleted() == {}
+    assert 0 < compactor.seconds_until_next_run() <= 24 * 3600
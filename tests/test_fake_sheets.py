@@ -0,0 +1,83 @@
+"""
+Test Fake Sheets (services/fake_sheets.py): API giống gspread và luồng thêm/đọc/xóa
+của services/sheets.py chạy trên Sheets giả.
+
+Chạy: python -m pytest tests
+"""
+
+import gspread
+import pytest
+
+from services.fake_sheets import FakeClient
+
+
+@pytest.fixture
+def spreadsheet():
+    return FakeClient({'Sales': [['Date', 'SKU', 'Qty']]}).open_by_key('fake')
+
+
+def test_append_get_delete(spreadsheet):
+    sheet = spreadsheet.worksheet('Sales')
+    sheet.append_rows([['01/10/2026', 'SP01', 2], ['02/10/2026', 'SP02', 3]])
+    assert sheet.get_all_records() == [
+        {'Date': '01/10/2026', 'SKU': 'SP01', 'Qty': 2},
+        {'Date': '02/10/2026', 'SKU': 'SP02', 'Qty': 3},
+    ]
+    assert sheet.get('B2:C') == [['SP01', '2'], ['SP02', '3']]
+
+    sheet.delete_rows(2)
+    assert sheet.get_all_values() == [['Date', 'SKU', 'Qty'], ['02/10/2026', 'SP02', '3']]
+
+
+def test_user_entered_strips_apostrophe(spreadsheet):
+    sheet = spreadsheet.worksheet('Sales')
+    sheet.append_row(["'2026-10-01", "'SP01", 1], value_input_option='USER_ENTERED')
+    sheet.append_row(["'2026-10-02", 'SP02', 1], value_input_option='RAW')
+    sheet.update_cell(3, 2, "'SP03")
+    assert sheet.get('A2:B3') == [['2026-10-01', 'SP01'], ["'2026-10-02", 'SP03']]
+
+
+def test_values_batch_get_unknown_tab(spreadsheet):
+    response = spreadsheet.values_batch_get(["'Sales'!A1:A1"])
+    assert response['valueRanges'][0]['values'] == [['Date']]
+    with pytest.raises(gspread.exceptions.APIError) as error:
+        spreadsheet.values_batch_get(["'Bán hàng'!A1:A1"])
+    assert error.value.response.status_code == 400
+    assert 'Unable to parse range' in str(error.value)
+
+
+def test_batch_update_requests(spreadsheet):
+    sheet = spreadsheet.worksheet('Sales')
+    sheet.append_rows([[str(i), 'SP', 1] for i in range(5)])
+    spreadsheet.batch_update({'requests': [
+        {'deleteDimension': {'range': {'sheetId': sheet.id, 'dimension': 'ROWS', 'startIndex': 1, 'endIndex': 2}}},
+        {'deleteDimension': {'range': {'sheetId': sheet.id, 'dimension': 'ROWS', 'startIndex': 3, 'endIndex': 4}}},
+        {'updateSheetProperties': {'properties': {'sheetId': sheet.id, 'title': 'Bán hàng'}, 'fields': 'title'}},
+    ]})
+    assert [row[0] for row in spreadsheet.worksheet('Bán hàng').get('A2:A')] == ['1', '3', '4']
+
+    with pytest.raises(gspread.exceptions.APIError) as error:
+        spreadsheet.batch_update({'requests': [{'repeatCell': {}}]})
+    assert error.value.response.status_code == 400
+
+
+def test_quota_error():
+    client = FakeClient({'Sales': [['Date']]})
+    client.fail_next()
+    with pytest.raises(gspread.exceptions.APIError) as error:
+        client.open_by_key('fake').worksheet('Sales')
+    assert error.value.response.status_code == 429
+    assert client.open_by_key('fake').worksheet('Sales').title == 'Sales'
+
+
+def test_sheets_add_get_delete(sheets):
+    first = sheets.add_sale('SP01', 2, 300_000, 100_000, customer='An')
+    second = sheets.add_sale('SP02', 1, 150_000, 100_000)
+    assert (first['id'], second['id']) == (1, 2)
+    assert [s['sku'] for s in sheets.get_today_sales()] == ['SP01', 'SP02']
+    assert sheets.get_sale(1)['profit'] == 100_000
+
+    assert sheets.delete_sale(1)
+    assert [s['id'] for s in sheets.get_recent_sales(10)] == [2]
+    assert sheets.get_sale(1) is None
+    assert sheets.get_today_sales_summary()['sale_count'] == 1
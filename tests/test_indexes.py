@@ -0,0 +1,113 @@
+"""
+Test index trong bộ nhớ (services/indexes.py): SKU, tìm theo tên (trigram), ngày, ID dòng, cột Day.
+
+Chạy: python -m pytest tests
+"""
+
+from services.indexes import DateIndex, DayLocator, NameIndex, RowIdIndex, SkuIndex, fold_text
+from services.models import Sale
+
+PRODUCTS = [
+    {'SKU': 'SP01', 'Name': 'Áo thun trắng'},
+    {'SKU': 'sp02', 'Name': 'Quần jean'},
+    {'SKU': 'SP03', 'Name': 'Áo sơ mi'},
+    {'SKU': 'SP01', 'Name': 'Trùng SKU'},
+    {'SKU': 'SP04', 'Name': 'Đầm hoa'},
+]
+
+
+def to_product(row_num, record):
+    return {'row': row_num, 'sku': record['SKU'], 'name': record['Name']}
+
+
+def test_sku_index_lookup_and_row_shift():
+    index = SkuIndex()
+    index.sync(PRODUCTS, to_product)
+    assert len(index) == 4
+    assert index.get(' sp01 ') == {'row': 2, 'sku': 'SP01', 'name': 'Áo thun trắng'}  # SKU trùng → dòng đầu
+    assert index.get('SP02')['row'] == 3
+
+    index.get('SP03')['row'] = 99  # get trả bản sao
+    assert index.get('SP03')['row'] == 4
+    index.add({'row': 7, 'sku': 'SP05', 'name': 'Mũ'})
+    index.update('sp05', {'name': 'Mũ lưỡi trai'})
+    index.remove('SP02')
+    assert index.get('SP02') is None
+    assert [index.get(s)['row'] for s in ('SP01', 'SP03', 'SP04', 'SP05')] == [2, 3, 5, 6]
+    assert index.get('SP05')['name'] == 'Mũ lưỡi trai'
+
+    index.sync(PRODUCTS, to_product)  # cùng records → không build lại
+    assert index.get('SP02') is None
+    index.sync(list(PRODUCTS), to_product)
+    assert index.get('SP02')['row'] == 3
+
+
+def test_name_index_ranking():
+    index = NameIndex()
+    index.sync(PRODUCTS, to_product)
+    assert fold_text('  Đầm  HOA ') == 'dam hoa'
+    assert index.search('ao') == ['sp03', 'sp01']  # bắt đầu bằng query (theo tên), không dấu
+    assert index.search('thun') == ['sp01']  # chứa query
+    assert index.search('hun') == ['sp01']  # giữa từ
+    assert index.search('jean quan') == ['sp02']  # đảo thứ tự từ
+    assert index.search('jean quan', fuzzy=False) == []
+    assert index.search('ao so', limit=1) == ['sp03']
+    assert index.search('dam hao') == ['sp04']  # gõ sai → gần đúng
+    assert index.search('') == [] and index.search('ao', limit=0) == []
+
+    index.update('SP04', 'Váy hoa')
+    index.remove('SP03')
+    index.add('SP06', 'Áo khoác')
+    assert index.search('dam') == []
+    assert index.search('vay') == ['sp04']
+    assert index.search('ao') == ['sp06', 'sp01']
+
+
+def test_date_index_rows():
+    records = [Sale(date='01/10/2026'), Sale(date='02/10/2026'), Sale(date='01/10/2026'), Sale(date='')]
+    index = DateIndex()
+    index.sync(records)
+    assert index.rows('01/10/2026') == [2, 4]
+    index.add('01/10/2026', 6)
+    index.remove(3)  # các dòng dưới dồn lên
+    assert index.rows('01/10/2026') == [2, 3, 5]
+    assert index.rows('02/10/2026') == [] and '02/10/2026' not in index.dates()
+    index.discard(3)  # đánh dấu xóa: không dồn dòng
+    assert index.rows('01/10/2026') == [2, 5]
+
+
+def test_row_id_index():
+    records = [Sale(id=5, sku='SP01'), Sale(id='', sku=''), Sale(id='', sku='SP02'), Sale(id=9, sku='SP03')]
+    index = RowIdIndex()
+    index.sync(records)
+    assert (index.row(5), index.row(9), index.row(7)) == (2, 5, None)
+    assert index.missing == [4] and index.max_id == 9  # dòng trống không cần ID
+
+    index.add(10, 6)
+    index.remove(3)
+    assert (index.row(5), index.row(9), index.row(10), index.missing) == (2, 4, 5, [3])
+    index.discard(4)
+    assert (index.row(9), index.row(10)) == (None, 5)
+
+    index.sync([Sale(id=1)])  # max_id không giảm (ID đã cấp không dùng lại)
+    assert index.row(1) == 2 and index.max_id == 10
+
+
+def test_day_locator_spans():
+    locator = DayLocator()
+    assert not locator.ready and not locator.is_fresh(60)
+    locator.load(['2026-09-30', '2026-10-01', '', '2026-10-01', '2026-10-03'])
+    assert locator.ready and locator.is_fresh(60) and not locator.is_fresh(0)
+    assert locator.span('2026-10-01', '2026-10-01') == (3, 5)  # dòng trống lấy Day dòng trên
+    assert locator.span('2026-10-02', '2026-10-02') is None
+    assert locator.count('2026-10-01', '2026-10-31') == 4
+
+    locator.append('2026-10-04')
+    locator.remove(2)
+    assert locator.span('2026-10-01', '2026-10-31') == (2, 6)
+    assert locator.matches(['2026-10-01', '', '2026-10-01', '2026-10-03', '2026-10-04'])
+    assert not locator.matches(['2026-10-01'])
+
+    locator.append('2026-09-01')  # ghi bù ngày cũ → không tìm bằng bisect được nữa
+    assert not locator.ready
+    assert locator.count('2026-09-01', '2026-09-30') == 1
@@ -0,0 +1,86 @@
+"""
+Test outbox ghi dòng mới ở nền (services/outbox.py): gửi lại từ journal sau khi khởi động lại
+(không append 2 lần), dòng bị từ chối chuyển sang dead-letter.
+
+Chạy: python -m pytest tests
+"""
+
+import json
+
+import gspread
+import pytest
+
+from services.fake_sheets import invalid_argument, quota_error
+from services.outbox import Outbox
+
+
+class FakeSheet:
+    """append_rows giả: errors = các lỗi raise ở những lần gọi tới, dòng 'BAD' luôn bị từ chối"""
+
+    def __init__(self):
+        self.rows = []
+        self.requests = 0
+        self.errors = []
+
+    def append_rows(self, sheet_name, rows, value_input_option):
+        self.requests += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        if any(row[0] == 'BAD' for row in rows):
+            raise invalid_argument('bad row')
+        self.rows.extend(rows)
+
+    def ids(self, sheet_name):
+        return {row[1] for row in self.rows}
+
+
+@pytest.fixture
+def sheet():
+    return FakeSheet()
+
+
+def open_outbox(tmp_path, sheet):
+    # batch_delay dài: thread nền không tự gửi trong lúc test, test gọi flush()
+    return Outbox(str(tmp_path / 'outbox.jsonl'), sheet.append_rows, batch_delay=60, existing_ids=sheet.ids)
+
+
+def test_replay_after_restart_skips_rows_already_sent(tmp_path, sheet):
+    outbox = open_outbox(tmp_path, sheet)
+    outbox.enqueue('Sales', ['ok', 1], row_id=1)
+    outbox.enqueue('Sales', ['ok', 2], row_id=2)
+    assert outbox.read(lambda: list(sheet.rows), ['Sales']) == ([], {'Sales': [['ok', 1], ['ok', 2]]})
+
+    sheet.errors += [quota_error(), quota_error()]
+    with pytest.raises(gspread.exceptions.APIError):
+        outbox.flush()
+    outbox.close(timeout=0)  # vẫn lỗi khi dừng: giữ trong journal
+    assert len(outbox) == 2
+
+    # Lần trước đã lên sheet dòng 1 nhưng chưa kịp ghi lại journal
+    sheet.rows.append(['ok', 1])
+    outbox = open_outbox(tmp_path, sheet)
+    assert outbox.pending('Sales') == [['ok', 1], ['ok', 2]]
+    assert outbox.flush() == 1
+    assert sheet.rows == [['ok', 1], ['ok', 2]]
+    assert outbox.stats()['duplicates_skipped'] == 1
+    assert open(tmp_path / 'outbox.jsonl').read() == ''
+    outbox.close()
+
+
+def test_rejected_row_goes_to_dead_letter(tmp_path, sheet):
+    outbox = open_outbox(tmp_path, sheet)
+    for i, first in enumerate(['ok', 'BAD', 'ok'], start=1):
+        outbox.enqueue('Sales', [first, i], row_id=i)
+    outbox.enqueue('Debts', ['ok', 9], value_input_option='USER_ENTERED', row_id=9)
+
+    assert outbox.flush('Sales') == 2
+    assert sheet.rows == [['ok', 1], ['ok', 3]]
+    assert outbox.pending() == [['ok', 9]]
+    with open(tmp_path / 'outbox.failed.jsonl') as f:
+        failed = [json.loads(line) for line in f]
+    assert [(e['row'], e['row_id']) for e in failed] == [(['BAD', 2], 2)]
+    assert 'bad row' in failed[0]['error']
+    assert outbox.stats()['dead_letters'] == 1
+
+    outbox.close()
+    assert sheet.rows[-1] == ['ok', 9] and len(outbox) == 0
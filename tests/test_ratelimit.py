@@ -0,0 +1,66 @@
+"""
+Test token bucket trước request Sheets (services/ratelimit.py): request của người dùng được cấp
+token trước việc nền, 429 → tạm dừng bucket rồi thử lại.
+
+Chạy: python -m pytest tests
+"""
+
+import threading
+import time
+
+import gspread
+import pytest
+
+from services import ratelimit
+from services.fake_sheets import invalid_argument, quota_error
+from services.ratelimit import RateLimiter, TokenBucket, interactive
+
+
+def test_interactive_request_goes_first():
+    bucket = TokenBucket('read', 600)  # 10 token/giây
+    for _ in range(600):
+        bucket.acquire()
+    order = []
+
+    def take(name):
+        if name == 'user':
+            with interactive():
+                bucket.acquire(ratelimit.current_priority())
+        else:
+            bucket.acquire()
+        order.append(name)
+
+    threads = [threading.Thread(target=take, args=(name,)) for name in ('job 1', 'job 2', 'user')]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)  # vào hàng theo thứ tự
+    assert bucket.stats()['interactive_waiting'] == 1
+    for thread in threads:
+        thread.join(5)
+    assert order == ['user', 'job 1', 'job 2']
+    assert ratelimit.current_priority() == ratelimit.BACKGROUND
+
+
+def test_quota_error_pauses_and_retries(monkeypatch):
+    monkeypatch.setattr(ratelimit.random, 'uniform', lambda a, b: 0)
+    limiter = RateLimiter(6000, 6000, max_retries=2, max_backoff=0.01)
+    errors = [quota_error(), quota_error()]
+
+    def request(method, url):
+        if errors:
+            raise errors.pop(0)
+        return f"{method} {url}"
+
+    limited = limiter.wrap_http(request)
+    assert limited('post', '/values:append') == 'post /values:append'
+    stats = limiter.stats()
+    assert (stats['retries'], stats['write']['pauses'], stats['write']['acquired']) == (2, 2, 3)
+    assert stats['read']['acquired'] == 0
+
+    errors.extend([quota_error()] * 3)  # quá max_retries → raise
+    with pytest.raises(gspread.exceptions.APIError):
+        limited('GET', '/values')
+    errors[:] = [invalid_argument('bad range')]  # lỗi khác 429 → raise ngay, không thử lại
+    with pytest.raises(gspread.exceptions.APIError):
+        limited('GET', '/values')
+    assert limiter.stats()['read']['acquired'] == 4
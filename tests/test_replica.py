@@ -0,0 +1,44 @@
+"""
+Test backend replica (services/replica.py): đọc từ bản sao SQLite, ghi vào Sheets rồi đồng bộ lại,
+sửa tay trên sheet vào bản sao ở lần đồng bộ sau.
+
+Chạy: python -m pytest tests
+"""
+
+import pytest
+
+import config
+from services.records import get_local_date
+from services.replica import SheetsReplica
+
+
+@pytest.fixture
+def replica(sheets, tmp_path):
+    replica = SheetsReplica(str(tmp_path / 'replica.db'), interval=0)
+    yield replica
+    replica.close()
+
+
+def test_writes_and_hand_edits_reach_replica(replica, sheets):
+    first = replica.add_sale('SP01', 2, 300, 100, customer='An')
+    second = replica.add_sale('SP02', 1, 150, 100)
+    replica.add_expense(50, 'Điện', 'Bills')
+    assert [(s['id'], s['row'], s['sku']) for s in replica.get_recent_sales(5)] == [
+        (second['id'], 3, 'SP02'), (first['id'], 2, 'SP01'),
+    ]
+    assert replica.get_recent_expenses(5)[0]['description'] == 'Điện'
+
+    assert replica.update_sale(first['id'], quantity=1)
+    assert replica.get_sale(first['id'])['profit'] == 200
+    assert replica.delete_sale(second['id'])
+    assert [s['id'] for s in replica.get_recent_sales(5)] == [first['id']]
+
+    # Sửa tay trên sheet: bản sao chỉ thấy sau lần đồng bộ kế tiếp
+    worksheet = sheets.get_worksheet(config.SHEET_SALES)
+    worksheet.update_cell(2, 2, 'SP09')
+    worksheet.append_row([get_local_date(), 'SP05', 1, 80, 50, 30, '', '', 99])
+    assert replica.get_sale(first['id'])['sku'] == 'SP01'
+    assert replica.sync(config.SHEET_SALES) == 2
+    assert [(s['id'], s['sku']) for s in replica.get_recent_sales(5)] == [(99, 'SP05'), (first['id'], 'SP09')]
+    assert replica.sync() == 0  # không đổi gì → không ghi SQLite
+    assert replica.get_cache_stats()['replica']['rows'][config.SHEET_SALES] == 2
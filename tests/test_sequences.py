@@ -0,0 +1,34 @@
+"""
+Test cấp ID dòng (services/sequences.py): đọc ID lớn nhất trên sheet 1 lần, không cấp lại ID
+đã dùng sau khi khởi động lại.
+
+Chạy: python -m pytest tests
+"""
+
+from services.sequences import IdSequences
+
+
+def test_next_id_seeds_once_and_survives_restart(tmp_path):
+    path = str(tmp_path / 'ids.json')
+    seeds = []
+
+    def seed(name):
+        seeds.append(name)
+        return {'Sales': 7}.get(name, 0)
+
+    ids = IdSequences(path, seed)
+    assert [ids.next_id('Sales'), ids.next_id('Sales'), ids.next_id('Debts')] == [8, 9, 1]
+    assert seeds == ['Sales', 'Debts']
+    ids.observe('Debts', 5)  # thấy ID lớn hơn khi tải cả sheet
+    ids.observe('Debts', 3)
+    assert ids.last('Debts') == 5
+
+    # Khởi động lại, dòng ID 9 đã bị xóa trên sheet (ID lớn nhất còn lại là 7)
+    ids = IdSequences(path, seed)
+    assert ids.next_id('Sales') == 10 and ids.next_id('Debts') == 6
+
+
+def test_broken_file_is_ignored(tmp_path):
+    path = tmp_path / 'ids.json'
+    path.write_text('{"Sales": ')
+    assert IdSequences(str(path), lambda name: 2).next_id('Sales') == 3
@@ -0,0 +1,100 @@
+"""
+Test services/sheets.py trên Sheets giả: ID dòng, sửa/xóa theo row number, đọc theo khoảng ngày.
+
+Chạy: python -m pytest tests
+"""
+
+import config
+from services.records import get_local_date, iso_day
+
+LEGACY_SALES = ['Date', 'SKU', 'Qty', 'Price', 'Cost', 'Profit', 'Customer', 'Note']
+LEGACY_DEBTS = ['Date', 'Customer', 'Amount', 'Note', 'Status', 'PaidDate', 'TelegramID']
+
+
+def test_legacy_sheet_gets_ids_on_first_read(sheets, use_data):
+    today = get_local_date()
+    client = use_data({
+        config.SHEET_PRODUCTS: [sheets.PRODUCTS_HEADERS],
+        config.SHEET_SALES: [LEGACY_SALES, [today, 'SP01', 1, 100, 60, 40], [today, 'SP02', 2, 200, 120, 80]],
+    })
+    assert [(s['id'], s['sku']) for s in sheets.get_today_sales()] == [(2, 'SP01'), (3, 'SP02')]
+    sales = client.open_by_key('fake').worksheet(config.SHEET_SALES).get_all_values()
+    assert sales[0][8] == 'ID'
+    assert [row[8] for row in sales[1:]] == ['2', '3']
+    assert sheets.add_sale('SP03', 1, 100, 60)['id'] == 4
+
+
+def test_scan_without_cache_assigns_ids(sheets, use_data, monkeypatch):
+    monkeypatch.setattr(sheets._cache, 'ttl', 0)
+    use_data({config.SHEET_DEBTS: [
+        LEGACY_DEBTS,
+        ['01/10/2026', 'An', 100, '', 'pending'],
+        ['02/10/2026', 'Bình', 50, '', 'pending'],
+        ['03/10/2026', 'An', 30, '', 'pending'],
+    ]})
+    assert [(d['id'], d['customer']) for d in sheets.get_all_debts('pending')] == [(2, 'An'), (3, 'Bình'), (4, 'An')]
+
+
+def test_set_customer_telegram_id_updates_every_debt(sheets, use_data):
+    client = use_data({config.SHEET_DEBTS: [
+        sheets.DEBTS_HEADERS,
+        ['01/10/2026', 'An', 100, '', 'pending', '', '', 1],
+        ['02/10/2026', 'Bình', 50, '', 'pending', '', '', 2],
+        ['03/10/2026', 'An', 30, '', 'pending'],  # thêm tay, chưa có ID
+    ]})
+    assert sheets.set_customer_telegram_id('Bình', '999') == 1
+    assert sheets.set_customer_telegram_id('An', '12345') == 2
+    rows = client.open_by_key('fake').worksheet(config.SHEET_DEBTS).get_all_values()
+    assert [row[6] for row in rows[1:]] == ['12345', '999', '12345']
+    assert sheets.get_customer_telegram_id('An') == '12345'
+
+
+def test_product_row_checked_before_write(sheets, use_data):
+    products = [sheets.PRODUCTS_HEADERS] + [[f'SP0{i}', f'Áo {i}', 100 * i] for i in range(1, 5)]
+    client = use_data({config.SHEET_PRODUCTS: products})
+    assert sheets.find_product_by_sku('SP03')['row'] == 4
+    # Xóa tay dòng SP01 trên sheet khi cache còn hạn → row trong index lệch 1
+    client.open_by_key('fake').worksheet(config.SHEET_PRODUCTS).delete_rows(2)
+
+    assert sheets.delete_product('SP03')
+    assert sheets.update_product('SP04', cost=450)
+    rows = client.open_by_key('fake').worksheet(config.SHEET_PRODUCTS).get_all_values()
+    assert rows[1:] == [['SP02', 'Áo 2', '200'], ['SP04', 'Áo 4', '450']]
+    assert sheets.find_product_by_sku('SP04')['row'] == 3
+
+
+def test_reads_do_not_write_missing_day(sheets, use_data):
+    today = get_local_date()
+    day, month, year = (int(p) for p in today.split('/'))
+    client = use_data({config.SHEET_SALES: [
+        sheets.SALES_HEADERS,
+        ['01/01/2020', 'SP09', 1, 50, 20, 30, '', '', 1],
+        [today, 'SP01', 1, 100, 60, 40, '', '', 2],  # gõ tay, chưa có Day
+        [today, 'SP02', 2, 200, 120, 80, '', '', 3],
+    ]})
+    worksheet = client.open_by_key('fake').worksheet(config.SHEET_SALES)
+    before = worksheet.get_all_values()
+
+    assert [s['id'] for s in sheets.get_today_sales()] == [2, 3]
+    assert sheets._cache.peek(config.SHEET_SALES) is None  # chỉ đọc khoảng dòng của hôm nay
+    assert sheets.get_month_sales_summary(month, year)['total_revenue'] == 300
+    assert [s['id'] for s in sheets.get_recent_sales(2)] == [3, 2]
+    assert worksheet.get_all_values() == before
+
+    assert sheets.backfill_days(config.SHEET_SALES) == {config.SHEET_SALES: 3}
+    assert [row[10] for row in worksheet.get_all_values()[1:]] == ['2020-01-01'] + [iso_day(today)] * 2
+
+
+def test_month_summary_follows_writes(sheets):
+    day, month, year = (int(p) for p in get_local_date().split('/'))
+    first = sheets.add_sale('SP01', 2, 300, 100)
+    sheets.add_sale('SP02', 1, 150, 100)
+    assert sheets.get_month_sales_summary(month, year)['total_revenue'] == 450
+
+    assert sheets.update_sale(first['id'], price=400)
+    sheets.add_sale('SP01', 1, 120, 100)
+    assert sheets.delete_sale(2)
+    summary = sheets.get_month_sales_summary(month, year)
+    assert (summary['sale_count'], summary['total_revenue'], summary['total_profit']) == (2, 520, 220)
+    assert summary['by_sku'] == {'SP01': {'revenue': 520, 'profit': 220, 'quantity': 3, 'count': 2}}
+    assert summary['by_day'] == {day: {'revenue': 520, 'profit': 220, 'count': 2}}
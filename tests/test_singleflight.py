@@ -0,0 +1,58 @@
+"""
+Test gộp đọc trùng (services/singleflight.py): các lần gọi cùng key lúc đang chạy → 1 lần gọi thật,
+cùng kết quả hoặc cùng exception; không cache sau khi xong.
+
+Chạy: python -m pytest tests
+"""
+
+import threading
+
+import pytest
+
+from services.singleflight import SingleFlight
+
+
+def run_together(flight, key, fn, count=4):
+    """count thread cùng gọi flight.do(key, fn) trong lúc fn đang chạy, return kết quả/exception"""
+    release = threading.Event()
+    results = []
+
+    def call():
+        try:
+            results.append(flight.do(key, lambda: release.wait(5) and fn()))
+        except Exception as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    while flight.stats()['coalesced'] < count - 1:
+        threading.Event().wait(0.005)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_calls_share_one_request():
+    flight = SingleFlight()
+    calls = []
+    results = run_together(flight, ('Debts', None), lambda: calls.append(1) or ['row'])
+    assert results == [['row']] * 4 and calls == [1]
+    assert flight.stats() == {'calls': 1, 'coalesced': 3, 'in_flight': 0}
+
+    assert flight.do(('Debts', None), lambda: 'again') == 'again'  # xong rồi → gọi lại
+    assert flight.do(('Sales', None), lambda: 'other') == 'other'
+
+
+def test_error_is_shared():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError('quota')
+
+    results = run_together(flight, 'key', fail, count=3)
+    assert len(results) == 3 and all(isinstance(r, ValueError) for r in results)
+    with pytest.raises(ValueError):
+        flight.do('key', fail)
+    assert flight.stats()['in_flight'] == 0
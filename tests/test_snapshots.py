@@ -0,0 +1,61 @@
+"""
+Test snapshot báo cáo tháng đã kết thúc (services/snapshots.py): lưu/đọc lại từ file, hết hạn,
+số dòng của tháng đổi, sửa/xóa dòng tháng cũ xóa đúng snapshot của tháng đó.
+
+Chạy: python -m pytest tests
+"""
+
+import time
+
+import config
+from services import snapshots
+from services.records import get_local_date
+from services.snapshots import MonthSnapshots
+
+SUMMARY = {'month': 9, 'year': 2026, 'total': 150, 'by_day': {1: 100, 30: 50}}
+
+
+def test_snapshot_round_trip_and_expiry(tmp_path, monkeypatch):
+    path = str(tmp_path / 'snapshots.json')
+    store = MonthSnapshots(path, ttl=60)
+    assert store.get('Sales', 2026, 9) is None
+    store.put('Sales', 2026, 9, SUMMARY, rows=2)
+
+    store = MonthSnapshots(path, ttl=60)  # bot khởi động lại: đọc từ file, key ngày vẫn là int
+    assert store.has('Sales', 2026, 9) and not store.has('Expenses', 2026, 9)
+    assert store.get('Sales', 2026, 9, rows=2) == SUMMARY
+    store.get('Sales', 2026, 9)['by_day'][1] = 0  # get trả bản sao
+    assert store.get('Sales', 2026, 9) == SUMMARY
+
+    assert store.get('Sales', 2026, 9, rows=3) is None  # sheet bị thêm dòng bằng tay
+    assert not store.has('Sales', 2026, 9)
+
+    store.put('Sales', 2026, 9, SUMMARY, rows=2)
+    now = time.time()
+    monkeypatch.setattr(snapshots.time, 'time', lambda: now + 61)
+    assert not store.has('Sales', 2026, 9)
+    assert store.get('Sales', 2026, 9) is None
+    assert store.stats()['expired'] == 2 and store.stats()['months'] == {'Sales': []}
+
+
+def test_closed_month_summary_uses_snapshot(sheets, use_data):
+    day, month, year = (int(p) for p in get_local_date().split('/'))
+    month, year = (month - 1, year) if month > 1 else (12, year - 1)
+    date, iso = f"05/{month:02d}/{year}", f"{year}-{month:02d}-05"
+    client = use_data({config.SHEET_SALES: [
+        sheets.SALES_HEADERS,
+        [date, 'SP01', 2, 300, 100, 100, '', '', 1, '', iso],
+        [date, 'SP02', 1, 150, 100, 50, '', '', 2, '', iso],
+    ]})
+    assert sheets.get_month_sales_summary(month, year)['total_revenue'] == 450
+    requests = client.stats()['requests']
+    assert sheets.get_month_sales_summary(month, year)['total_revenue'] == 450
+    assert client.stats()['requests'] == requests  # snapshot + cột Day còn hạn → không gọi API
+    assert sheets._snapshots.stats()['hits'] == 1
+
+    assert sheets.update_sale(1, price=400)  # sửa dòng tháng cũ → tính lại đúng tháng đó
+    assert sheets.get_month_sales_summary(month, year)['total_revenue'] == 550
+    assert sheets.delete_sale(2)
+    summary = sheets.get_month_sales_summary(month, year)
+    assert (summary['sale_count'], summary['total_revenue']) == (1, 400)
+    assert sheets._snapshots.stats()['invalidations'] == 2
@@ -0,0 +1,40 @@
+"""
+Test backend SQLite (services/sqlite_store.py): cùng kiểu dữ liệu trả về như services/sheets.py.
+
+Chạy: python -m pytest tests
+"""
+
+import pytest
+
+from services.sqlite_store import SqliteStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SqliteStore(str(tmp_path / 'shop.db'))
+    yield store
+    store.close()
+
+
+def test_recent_sales_same_shape_as_sheets(store, sheets):
+    store.add_sale('SP01', 2, 300_000, 100_000, customer='An', note='ghi chú')
+    sheets.add_sale('SP01', 2, 300_000, 100_000, customer='An', note='ghi chú')
+    sheets.invalidate_cache()
+
+    recent, expected = store.get_recent_sales(1)[0], sheets.get_recent_sales(1)[0]
+    assert sorted(recent.keys()) == sorted(expected.keys())
+    assert {key: recent[key] for key in ('id', 'row', 'sku', 'quantity', 'price', 'cost', 'profit', 'note')} == {
+        'id': 1, 'row': 1, 'sku': 'SP01', 'quantity': 2, 'price': 300_000, 'cost': 100_000,
+        'profit': 100_000, 'note': 'ghi chú',
+    }
+    assert store.get_recent_sales(1) == [store.get_sale(1)]
+
+
+def test_sales_update_delete_by_id(store):
+    first = store.add_sale('SP01', 2, 300_000, 100_000)
+    second = store.add_sale('SP02', 1, 150_000, 100_000)
+    assert store.update_sale(first['id'], quantity=1)
+    assert store.get_sale(first['id'])['profit'] == 200_000
+    assert store.delete_sale(first['id'])
+    assert [s['id'] for s in store.get_recent_sales(10)] == [second['id']]
+    assert store.get_today_sales_summary()['sale_count'] == 1